@@ -0,0 +1,130 @@
+"""
+Measure /api/decks/feed query latency as the number of followed authors grows.
+
+Seeds authors, decks and follow relationships inside a transaction that is
+rolled back at the end, so it can be pointed at a migrated development
+database (see `make migrate`) without leaving data behind.
+
+    python benchmarks/feed_latency.py --followees 10 100 1000 5000
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+from psycopg2 import connect
+
+from flashly.models.deck import DeckModel
+
+load_dotenv()
+
+
+def seed(cur, authors: int, decks_per_author: int):
+    cur.execute(
+        """
+        INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+        SELECT gen_random_uuid(), 'Bench', 'Author', 'bench_author_' || i, 'bench_author_' || i || '@example.com', 'x'
+        FROM generate_series(1, %s) i
+        """,
+        (authors,),
+    )
+    cur.execute(
+        """
+        INSERT INTO decks (id, name, description, publish_status, owner_id, rating, created_at)
+        SELECT
+            gen_random_uuid(),
+            'Deck ' || n,
+            'Benchmark deck',
+            CASE WHEN n %% 5 = 0 THEN 'private' ELSE 'public' END,
+            u.id,
+            (n %% 50) / 10.0,
+            now() - (random() * interval '365 days')
+        FROM users u
+        CROSS JOIN generate_series(1, %s) n
+        WHERE u.username LIKE 'bench_author_%%'
+        """,
+        (decks_per_author,),
+    )
+    cur.execute("ANALYZE users")
+    cur.execute("ANALYZE decks")
+
+
+def create_follower(cur, name: str, followees: int):
+    cur.execute(
+        """
+        INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+        VALUES (gen_random_uuid(), 'Bench', 'Reader', %s, %s, 'x')
+        RETURNING id
+        """,
+        (name, f"{name}@example.com"),
+    )
+    follower_id = cur.fetchone()[0]
+    cur.execute(
+        """
+        INSERT INTO followers (follower_id, following_id)
+        SELECT %s, id FROM users
+        WHERE username LIKE 'bench_author_%%'
+        ORDER BY random()
+        LIMIT %s
+        """,
+        (follower_id, followees),
+    )
+    cur.execute("ANALYZE followers")
+    return follower_id
+
+
+def time_page(db_conn, follower_id, limit: int, cursor, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        DeckModel.find_feed_decks(db_conn, follower_id, limit=limit + 1, cursor=cursor)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def deep_cursor(db_conn, follower_id, limit: int, pages: int):
+    cursor = None
+    for _ in range(pages):
+        decks = DeckModel.find_feed_decks(db_conn, follower_id, limit=limit + 1, cursor=cursor)
+        if not decks or len(decks) <= limit:
+            break
+        last = decks[limit - 1]
+        cursor = (last[4].isoformat(), str(last[0]))
+    return cursor
+
+
+def run_benchmark():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--followees", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--decks-per-author", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--deep-pages", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=25)
+    args = parser.parse_args()
+
+    conn = connect(
+        f"dbname={os.getenv('DB_NAME')} "
+        f"user={os.getenv('DB_USER')} "
+        f"password={os.getenv('DB_PASSWORD')} "
+        f"host={os.getenv('DB_HOST')}"
+    )
+    try:
+        with conn.cursor() as cur:
+            seed(cur, max(args.followees), args.decks_per_author)
+
+            print(f"{'followees':>10} {'page 1 (ms)':>12} {'page ' + str(args.deep_pages) + ' (ms)':>14}")
+            for followees in args.followees:
+                follower_id = create_follower(cur, f"bench_reader_{followees}", followees)
+                first = time_page(conn, follower_id, args.limit, None, args.repeat)
+                cursor = deep_cursor(conn, follower_id, args.limit, args.deep_pages)
+                deep = time_page(conn, follower_id, args.limit, cursor, args.repeat)
+                print(f"{followees:>10} {first:>12.2f} {deep:>14.2f}")
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+if __name__ == "__main__":
+    run_benchmark()
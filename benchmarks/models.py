@@ -0,0 +1,90 @@
+"""
+Measure the memory and time of materializing card rows into models, per 100k rows,
+with a plain @dataclass built field by field (how models were built before) and with
+the slotted CardModel built by CardModel.from_rows.
+
+Works on synthetic rows shaped like psycopg2's, no database is needed.
+
+    python benchmarks/models.py --rows 100000 --repeat 5
+"""
+
+import argparse
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+
+from flashly.models.card import CardModel
+from flashly.models.rows import CardRow
+from row_memory import make_rows
+
+
+@dataclass
+class LegacyCardModel:
+    # CardModel as it was before @dataclass(slots=True)
+    id: object
+    front_text: str
+    back_text: str
+    difficulty: str
+    times_reviewed: int
+    success_rate: float
+    deck_id: object
+    created_at: datetime
+    updated_at: datetime
+
+
+def legacy_from_rows(rows):
+    return [
+        LegacyCardModel(
+            id=row[0],
+            front_text=row[1],
+            back_text=row[2],
+            difficulty=row[3],
+            times_reviewed=row[4],
+            success_rate=row[5],
+            deck_id=row[6],
+            created_at=row[7],
+            updated_at=row[8],
+        )
+        for row in rows
+    ]
+
+
+def mib_per_100k(build, rows) -> float:
+    # Only the models are new, the column values are shared with the fetched rows
+    tracemalloc.start()
+    try:
+        built = build(rows)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del built
+    return size / 1024 / 1024 * 100000 / len(rows)
+
+
+def time_per_100k(build, rows, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build(rows)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings) * 100000 / len(rows)
+
+
+def run_benchmark():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = list(map(CardRow._make, make_rows(args.rows)))
+    assert CardModel.from_rows(rows)[0].to_json() == rows[0]._asdict()
+
+    print(f"{'models':>10} {'MiB/100k':>10} {'build (ms/100k)':>16}")
+    for name, build in (("dataclass", legacy_from_rows), ("slotted", CardModel.from_rows)):
+        print(f"{name:>10} {mib_per_100k(build, rows):>10.1f} {time_per_100k(build, rows, args.repeat):>16.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
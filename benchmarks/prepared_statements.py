@@ -0,0 +1,114 @@
+"""
+Compare per-query latency of the hot model queries with and without
+server-side prepared statements.
+
+Seeds a user, a deck and its cards inside transactions that are rolled back
+at the end, so it can be pointed at a migrated development database (see
+`make migrate`) without leaving data behind.
+
+    python benchmarks/prepared_statements.py --repeat 2000
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+from psycopg2 import connect
+
+from flashly.models.card import CardModel
+from flashly.models.deck import DeckModel
+from flashly.models.prepared import PreparingConnection
+from flashly.models.user import UserModel
+
+load_dotenv()
+
+
+def seed(cur, username: str, cards: int):
+    email = f"{username}@example.com"
+    cur.execute(
+        """
+        INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+        VALUES (gen_random_uuid(), 'Bench', 'Prepared', %s, %s, 'x')
+        RETURNING id
+        """,
+        (username, email),
+    )
+    user_id = cur.fetchone()[0]
+    cur.execute(
+        """
+        INSERT INTO decks (id, name, description, publish_status, owner_id, rating, card_count)
+        VALUES (gen_random_uuid(), 'Bench deck', 'Prepared statements', 'public', %s, 4.5, %s)
+        RETURNING id
+        """,
+        (user_id, cards),
+    )
+    deck_id = cur.fetchone()[0]
+    cur.execute(
+        """
+        INSERT INTO cards (id, front_text, back_text, deck_id)
+        SELECT gen_random_uuid(), 'Front ' || n, 'Back ' || n, %s
+        FROM generate_series(1, %s) n
+        """,
+        (deck_id, cards),
+    )
+    return {"user_id": user_id, "deck_id": deck_id, "email": email}
+
+
+QUERIES = {
+    "deck.find_deck_by_id": lambda conn, ids: DeckModel.find_deck_by_id(conn, ids["deck_id"]),
+    "deck.find_decks_by_user_id": lambda conn, ids: DeckModel.find_decks_by_user_id(conn, ids["user_id"]),
+    "deck.find_explore_decks": lambda conn, ids: DeckModel.find_explore_decks(conn, limit=21),
+    "card.find_cards_by_deck_id": lambda conn, ids: CardModel.find_cards_by_deck_id(conn, ids["deck_id"]),
+    "user.find_by_email": lambda conn, ids: UserModel.find_by_email(conn, ids["email"]),
+    "user.get_profile_with_details": lambda conn, ids: UserModel.get_profile_with_details(conn, ids["user_id"]),
+}
+
+
+def time_query(query, conn, ids, repeat: int) -> float:
+    # Warm up so the prepared run does not pay for PREPARE in its timings
+    query(conn, ids)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query(conn, ids)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(timings)
+
+
+def run_benchmark():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    dsn = (
+        f"dbname={os.getenv('DB_NAME')} "
+        f"user={os.getenv('DB_USER')} "
+        f"password={os.getenv('DB_PASSWORD')} "
+        f"host={os.getenv('DB_HOST')}"
+    )
+    plain = connect(dsn)
+    prepared = connect(dsn, connection_factory=PreparingConnection)
+    try:
+        # Seed on each connection, the rows are only visible inside its own transaction
+        with plain.cursor() as cur:
+            plain_ids = seed(cur, "bench_plain", args.cards)
+        with prepared.cursor() as cur:
+            prepared_ids = seed(cur, "bench_prepared", args.cards)
+
+        print(f"{'query':<32} {'plain (us)':>11} {'prepared (us)':>14} {'speedup':>8}")
+        for name, query in QUERIES.items():
+            before = time_query(query, plain, plain_ids, args.repeat)
+            after = time_query(query, prepared, prepared_ids, args.repeat)
+            print(f"{name:<32} {before:>11.1f} {after:>14.1f} {before / after:>7.2f}x")
+    finally:
+        plain.rollback()
+        plain.close()
+        prepared.rollback()
+        prepared.close()
+
+
+if __name__ == "__main__":
+    run_benchmark()
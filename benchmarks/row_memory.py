@@ -0,0 +1,90 @@
+"""
+Measure the memory held by a page of card rows, per 10k rows, as the plain tuples
+psycopg2 returns, as dicts keyed by column name and as the CardRow named rows the
+models now return. Also times building each from the fetched tuples.
+
+Works on synthetic rows shaped like psycopg2's, no database is needed.
+
+    python benchmarks/row_memory.py --rows 10000 --repeat 20
+"""
+
+import argparse
+import statistics
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flashly.models.rows import CardRow
+
+
+def make_rows(count: int):
+    # Decoded column values, each builder wraps them in a container of its own
+    deck_id = uuid.uuid4()
+    start = datetime(2024, 1, 1, 12, 0, 0, 123456)
+    return [
+        [
+            uuid.uuid4(),
+            f"Question {i}",
+            f"Answer {i}",
+            ("easy", "medium", "hard")[i % 3],
+            i % 40,
+            Decimal(i % 10000) / 100,
+            deck_id,
+            start + timedelta(seconds=i),
+            start + timedelta(seconds=i, minutes=5),
+        ]
+        for i in range(count)
+    ]
+
+
+def as_tuples(rows):
+    return [tuple(row) for row in rows]
+
+
+def as_dicts(rows):
+    return [dict(zip(CardRow._fields, row)) for row in rows]
+
+
+def as_named(rows):
+    return list(map(CardRow._make, rows))
+
+
+def kib_per_10k(build, rows) -> float:
+    # Only the containers are new, the column values are shared with the fetched rows
+    tracemalloc.start()
+    try:
+        built = build(rows)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del built
+    return size / 1024 * 10000 / len(rows)
+
+
+def time_per_10k(build, rows, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build(rows)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings) * 10000 / len(rows)
+
+
+def run_benchmark():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    assert as_named(rows)[0]._asdict() == as_dicts(rows)[0]
+
+    print(f"{'rows':>8} {'KiB/10k':>10} {'build (ms/10k)':>15}")
+    for name, build in (("tuple", as_tuples), ("dict", as_dicts), ("CardRow", as_named)):
+        print(f"{name:>8} {kib_per_10k(build, rows):>10.0f} {time_per_10k(build, rows, args.repeat):>15.2f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,102 @@
+"""
+Measure the cost of serializing and encoding card lists, per 10k cards, with the
+former path (str()/isoformat() in Python, then the stdlib json module) and the
+current one (raw rows encoded natively by orjson), whole and streamed.
+
+Works on synthetic rows shaped like psycopg2's, no database is needed.
+
+    python benchmarks/serialization.py --cards 10000 --repeat 20
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flashly.models.card import serialize_single_card_tuple
+from flashly.renderers import dumps
+from flashly.streaming import encode_chunks, iter_json
+
+
+def make_rows(count: int):
+    deck_id = str(uuid.uuid4())
+    start = datetime(2024, 1, 1, 12, 0, 0, 123456)
+    return [
+        (
+            str(uuid.uuid4()),
+            f"Question {i}",
+            f"Answer {i}",
+            ("easy", "medium", "hard")[i % 3],
+            i % 40,
+            Decimal(i % 10000) / 100,
+            deck_id,
+            start + timedelta(seconds=i),
+            start + timedelta(seconds=i, minutes=5),
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_serialize(card_tuple):
+    # serialize_single_card_tuple as it was before the orjson renderer
+    return {
+        "id": str(card_tuple[0]),
+        "front_text": card_tuple[1],
+        "back_text": card_tuple[2],
+        "difficulty": card_tuple[3],
+        "times_reviewed": int(card_tuple[4]),
+        "success_rate": float(card_tuple[5]),
+        "deck_id": str(card_tuple[6]),
+        "created_at": card_tuple[7].isoformat() if card_tuple[7] else None,
+        "updated_at": card_tuple[8].isoformat() if card_tuple[8] else None,
+    }
+
+
+def legacy_render(rows) -> bytes:
+    return json.dumps({"cards": [legacy_serialize(row) for row in rows]}).encode("utf-8")
+
+
+def legacy_stream(rows) -> bytes:
+    # The json_stream renderer before: str parts from json.dumps, encoded at flush time
+    parts = ['{"cards": [', ", ".join(json.dumps(legacy_serialize(row)) for row in rows), "]}"]
+    return b"".join(encode_chunks(parts))
+
+
+def render(rows) -> bytes:
+    return dumps({"cards": [serialize_single_card_tuple(row) for row in rows]})
+
+
+def stream(rows) -> bytes:
+    return b"".join(encode_chunks(iter_json({"cards": (serialize_single_card_tuple(row) for row in rows)})))
+
+
+def time_per_10k(encode, rows, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode(rows)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings) * 10000 / len(rows)
+
+
+def run_benchmark():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.cards)
+    assert json.loads(legacy_render(rows)) == json.loads(render(rows)) == json.loads(stream(rows))
+
+    print(f"{'path':>10} {'stdlib (ms/10k)':>16} {'orjson (ms/10k)':>16} {'speedup':>8}")
+    for name, before, after in (("json", legacy_render, render), ("stream", legacy_stream, stream)):
+        old = time_per_10k(before, rows, args.repeat)
+        new = time_per_10k(after, rows, args.repeat)
+        print(f"{name:>10} {old:>16.2f} {new:>16.2f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run_benchmark()
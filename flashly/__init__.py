@@ -23,17 +23,49 @@ def main(global_config=None, **settings):
         "db.user": os.getenv("DB_USER"),
         "db.password": os.getenv("DB_PASSWORD"),
         "db.port": os.getenv("DB_PORT", "5432"),
+        "db.pool.min": os.getenv("DB_POOL_MIN", "1"),
+        "db.pool.max": os.getenv("DB_POOL_MAX", "20"),
+        "db.pool.timeout": os.getenv("DB_POOL_TIMEOUT", "30"),
+        "db.pool.validate_idle": os.getenv("DB_POOL_VALIDATE_IDLE", "30"),
+        "db.prepared_statements": os.getenv("DB_PREPARED_STATEMENTS", "true"),
+        "db.replica.host": os.getenv("DB_REPLICA_HOST"),
+        "db.replica.name": os.getenv("DB_REPLICA_NAME"),
+        "db.replica.user": os.getenv("DB_REPLICA_USER"),
+        "db.replica.password": os.getenv("DB_REPLICA_PASSWORD"),
+        "db.replica.port": os.getenv("DB_REPLICA_PORT"),
+        "db.replica.stickiness": os.getenv("DB_REPLICA_STICKINESS", "5"),
+        "cache.deck_acl.size": os.getenv("CACHE_DECK_ACL_SIZE", "10000"),
+        "cache.deck_acl.ttl": os.getenv("CACHE_DECK_ACL_TTL", "30"),
+        "cache.deck.size": os.getenv("CACHE_DECK_SIZE", "10000"),
+        "cache.deck.ttl": os.getenv("CACHE_DECK_TTL", "30"),
+        "cache.compressed.size": os.getenv("CACHE_COMPRESSED_SIZE", "256"),
+        "cache.compressed.ttl": os.getenv("CACHE_COMPRESSED_TTL", "300"),
+        "cache.invalidation.listen": os.getenv("CACHE_INVALIDATION_LISTEN", "true"),
+        "compression.min_size": os.getenv("COMPRESSION_MIN_SIZE", "1024"),
+        "request.max_body_size": os.getenv("REQUEST_MAX_BODY_SIZE", "65536"),
+        "password.rounds": os.getenv("PASSWORD_HASH_ROUNDS"),
+        "password.target_ms": os.getenv("PASSWORD_HASH_TARGET_MS", "250"),
+        "password.workers": os.getenv("PASSWORD_HASH_WORKERS"),
+        "password.max_pending": os.getenv("PASSWORD_HASH_MAX_PENDING"),
+        "password.timeout": os.getenv("PASSWORD_HASH_TIMEOUT", "5"),
+        "json_stream.flush_size": os.getenv("JSON_STREAM_FLUSH_SIZE", "65536"),
         "secret_key": os.getenv("SECRET_KEY"),
     }
     settings.update(env_vars)
 
     with Configurator(settings=settings) as config:
         # Add static views for React build files
-        config.add_static_view('static', 'flashly:./dist', cache_max_age=3600)
-        config.add_static_view('assets', 'flashly:./dist/assets', cache_max_age=31536000)  # 1 year cache for assets
+        config.add_static_view("static", "flashly:./dist", cache_max_age=3600)
+        config.add_static_view("assets", "flashly:./dist/assets", cache_max_age=31536000)  # 1 year cache for assets
 
         config.include(".routes")
+        config.include(".renderers")
+        config.include(".streaming")
+        config.include(".compression")
+        config.include(".cache")
+        config.include(".hashing")
         config.include(".models")
+        config.include(".invalidation")
         config.scan()
 
     return config.make_wsgi_app()
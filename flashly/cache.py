@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache whose entries also expire ttl seconds after
+    they were stored. A maxsize of 0 disables it: nothing is stored and every
+    lookup misses. Counts hits, misses, evictions, expirations and invalidations
+    so it can be sized from /api/status.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (value, expires), least recently used first
+        self._entries: "OrderedDict[Any, Tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def configure(self, maxsize: int, ttl: float):
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self._entries.clear()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                self.expirations += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            if self._entries.pop(key, _MISSING) is not _MISSING:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# Permission data of decks: (owner_id, publish_status, updated_at, name) by deck id
+DECK_ACL = TTLCache(maxsize=10000, ttl=30)
+
+# Serialized decks as returned by get_deck, by deck id
+DECK_METADATA = TTLCache(maxsize=10000, ttl=30)
+
+# Compressed bodies of public responses by (path and query, ETag, encoding), see flashly.compression.
+# Keys carry the version, so nothing needs to be invalidated: old versions age out.
+COMPRESSED = TTLCache(maxsize=256, ttl=300)
+
+# Every cache by the name it is configured and reported under
+CACHES = {"deck_acl": DECK_ACL, "deck": DECK_METADATA, "compressed": COMPRESSED}
+
+# Caches holding entries of each kind of object, emptied by invalidate()
+_BY_KIND = {"deck": [DECK_ACL, DECK_METADATA]}
+
+
+def invalidate(kind: str, key):
+    """
+    Drop the entries cached for the object kind:key, called by the model write paths
+    """
+    for cache in _BY_KIND.get(kind, ()):
+        cache.pop(str(key))
+
+
+def clear():
+    """
+    Empty every cache, when invalidations may have been missed
+    """
+    for cache in CACHES.values():
+        cache.clear()
+
+
+def snapshot() -> dict:
+    """
+    Counters of every cache, by name
+    """
+    return {name: cache.snapshot() for name, cache in CACHES.items()}
+
+
+def includeme(config):
+    """
+    Size the caches from the settings, cache.<name>.size = 0 disables a cache
+    """
+    settings = config.get_settings()
+    for name, cache in CACHES.items():
+        cache.configure(
+            maxsize=int(settings.get(f"cache.{name}.size") or cache.maxsize),
+            ttl=float(settings.get(f"cache.{name}.ttl") or cache.ttl),
+        )
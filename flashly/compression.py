@@ -0,0 +1,182 @@
+import zlib
+
+from flashly.cache import COMPRESSED
+from flashly.streaming import StreamingBody
+
+try:
+    import brotli  # type: ignore[import]
+except ImportError:  # optional dependency, responses are only gzipped without it
+    brotli = None
+
+# Content types worth compressing, the API only sends JSON (and NDJSON/CSV exports)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/csv")
+
+# Bodies smaller than this are sent as they are, compressing them saves less than it costs
+DEFAULT_MIN_SIZE = 1024
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def negotiate_encoding(request):
+    """
+    Pick the encoding to send according to Accept-Encoding, brotli first when both are
+    equally acceptable. Returns None when the client did not ask for compression.
+    """
+    if "Accept-Encoding" not in request.headers:
+        return None
+    offers = ["br", "gzip"] if brotli is not None else ["gzip"]
+    accepted = request.accept_encoding.acceptable_offers(offers)
+    return accepted[0][0] if accepted else None
+
+
+def compressor(encoding: str):
+    """
+    Return (compress, finish) functions of a fresh incremental compressor
+    """
+    if encoding == "br":
+        c = brotli.Compressor(quality=BROTLI_QUALITY)
+        return c.process, c.finish
+    # wbits 31 produces the gzip container rather than a raw zlib stream
+    c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return c.compress, c.flush
+
+
+def compress_chunks(chunks, encoding: str):
+    compress, finish = compressor(encoding)
+    for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def _head(app_iter, min_size: int):
+    """
+    Read chunks off app_iter until min_size bytes are buffered or it runs out.
+    Returns the buffered chunks, the iterator over the rest and whether it ran out.
+    """
+    iterator = iter(app_iter)
+    head = []
+    size = 0
+    for chunk in iterator:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= min_size:
+            return head, iterator, False
+    return head, iterator, True
+
+
+def _chain(head, rest):
+    yield from head
+    yield from rest
+
+
+def _response_encoding(request, response):
+    """
+    Encoding to compress response with, or None when it is sent as it is
+    """
+    if response.content_type not in COMPRESSIBLE_TYPES:
+        return None
+    # The body depends on Accept-Encoding from here on, shared caches must know it
+    vary = tuple(response.vary or ())
+    if "Accept-Encoding" not in vary:
+        response.vary = vary + ("Accept-Encoding",)
+
+    if request.method == "HEAD" or response.status_code != 200 or response.content_encoding is not None:
+        return None
+    return negotiate_encoding(request)
+
+
+def _compress(response, encoding: str, etag, cache_key, min_size: int):
+    app_iter = response.app_iter
+    head, rest, complete = _head(app_iter, min_size)
+    if complete and sum(len(chunk) for chunk in head) < min_size:
+        # Too small to be worth it, send the bytes already read as they are
+        _close(app_iter)
+        response.app_iter = head
+        response.content_length = sum(len(chunk) for chunk in head)
+        return response
+
+    # Bodies already held in memory (the json renderer's) keep their Content-Length
+    if cache_key is not None or isinstance(app_iter, (list, tuple)):
+        try:
+            body = b"".join(compress_chunks(_chain(head, rest), encoding))
+        finally:
+            _close(app_iter)
+        if cache_key is not None:
+            COMPRESSED.set(cache_key, body)
+        _set_compressed(response, encoding, etag, body)
+        return response
+
+    # Compress while streaming, the sources of the original body are closed with it
+    response.app_iter = StreamingBody(compress_chunks(_chain(head, rest), encoding), _Closer(app_iter))
+    response.content_length = None
+    _set_headers(response, encoding, etag)
+    return response
+
+
+def compression_tween_factory(handler, registry):
+    """
+    Compress JSON responses of at least compression.min_size bytes with brotli or gzip,
+    as negotiated with Accept-Encoding. Streamed bodies stay streamed. The compressed
+    bytes of public responses carrying an ETag are kept in COMPRESSED, so each version
+    is compressed once rather than once per request.
+    """
+    min_size = int(registry.settings.get("compression.min_size") or DEFAULT_MIN_SIZE)
+
+    def compression_tween(request):
+        response = handler(request)
+        encoding = _response_encoding(request, response)
+        if encoding is None:
+            return response
+
+        etag = response.etag
+        cache_key = None
+        if etag and response.cache_control.public:
+            cache_key = (request.path_qs, etag, encoding)
+            body = COMPRESSED.get(cache_key)
+            if body is not None:
+                _close(response.app_iter)
+                _set_compressed(response, encoding, etag, body)
+                return response
+
+        return _compress(response, encoding, etag, cache_key, min_size)
+
+    return compression_tween
+
+
+class _Closer:
+    def __init__(self, app_iter):
+        self._app_iter = app_iter
+
+    def close(self):
+        _close(self._app_iter)
+
+
+def _close(app_iter):
+    close = getattr(app_iter, "close", None)
+    if close is not None:
+        close()
+
+
+def _set_headers(response, encoding: str, etag):
+    response.content_encoding = encoding
+    if etag:
+        # The compressed bytes differ from the identity ones, the ETag can only be a weak
+        # one now. If-None-Match compares weakly, so revalidations still match it.
+        response.etag = (etag, False)
+
+
+def _set_compressed(response, encoding: str, etag, body: bytes):
+    response.app_iter = [body]
+    response.content_length = len(body)
+    _set_headers(response, encoding, etag)
+
+
+def includeme(config):
+    """
+    Register the compression tween, compression.min_size sets the threshold in bytes.
+    It sits above the exception view so error responses are compressed too.
+    """
+    config.add_tween("flashly.compression.compression_tween_factory")
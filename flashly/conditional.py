@@ -0,0 +1,62 @@
+import hashlib
+from datetime import datetime, timezone
+
+from pyramid.httpexceptions import HTTPNotModified
+
+
+def is_conditional(request) -> bool:
+    """
+    Tell whether the client sent a validator that could make the request a 304
+    """
+    return bool(request.if_none_match) or request.if_modified_since is not None
+
+
+def deck_etag(deck_id: str, updated_at: datetime) -> str:
+    """
+    Strong ETag of the representations of a deck and its cards. Every write to a deck
+    or its cards moves decks.updated_at, so it serves as the deck's version.
+    """
+    version = f"{deck_id}:{updated_at.isoformat()}"
+    return hashlib.sha1(version.encode("utf-8")).hexdigest()
+
+
+def _last_modified(updated_at: datetime) -> datetime:
+    # decks.updated_at is stored without a time zone, every write sets it to timezone('UTC', now())
+    return updated_at.replace(tzinfo=timezone.utc)
+
+
+def set_validators(request, deck_id: str, updated_at: datetime, public: bool = False):
+    """
+    Send the ETag and Last-Modified of a deck with a full response. Clients must
+    revalidate before reusing it, and only responses of public decks may be stored by
+    shared caches (or have their compressed body cached, see flashly.compression).
+    """
+    response = request.response
+    response.etag = deck_etag(deck_id, updated_at)
+    response.last_modified = _last_modified(updated_at)
+    response.cache_control.no_cache = True
+    if public:
+        response.cache_control.public = True
+    else:
+        response.cache_control.private = True
+
+
+def not_modified(request, deck_id: str, updated_at: datetime):
+    """
+    Return a 304 response when the client's copy of the deck is current, otherwise None.
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110.
+    """
+    etag = deck_etag(deck_id, updated_at)
+    last_modified = _last_modified(updated_at)
+
+    if request.if_none_match:
+        current = etag in request.if_none_match
+    elif request.if_modified_since is not None:
+        # HTTP dates have a one second resolution
+        current = last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        current = False
+
+    if not current:
+        return None
+    return HTTPNotModified(etag=etag, last_modified=last_modified)
@@ -0,0 +1,176 @@
+import atexit
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Optional
+
+import bcrypt
+
+# bcrypt's own default, used until the cost is configured or calibrated
+DEFAULT_ROUNDS = 12
+
+# Calibration never goes below or above these costs
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+DEFAULT_TARGET_MS = 250
+
+
+class HashingBusy(RuntimeError):
+    """
+    Raised when no hashing slot frees up within the timeout, the request should be retried later
+    """
+
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+def rounds_of(hashed: str) -> int:
+    """
+    Cost a bcrypt hash was made with, from its $2b$<rounds>$ prefix
+    """
+    return int(hashed.split("$")[2])
+
+
+def calibrate(target_ms: float, min_rounds: int = MIN_ROUNDS, max_rounds: int = MAX_ROUNDS) -> int:
+    """
+    Highest bcrypt cost whose hashes take at most target_ms on this machine. Each round
+    doubles the work, so one hash at min_rounds is enough to extrapolate.
+    """
+    start = time.perf_counter()
+    _hashpw(b"calibration", min_rounds)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    rounds = min_rounds + math.floor(math.log2(target_ms / elapsed_ms)) if elapsed_ms < target_ms else min_rounds
+    return max(min_rounds, min(rounds, max_rounds))
+
+
+class PasswordHasher:
+    """
+    Hash and check passwords with bcrypt in a pool of worker processes, so a burst of
+    logins neither holds the GIL nor ties up every waitress thread. At most workers +
+    max_pending hashes are running or queued: callers take a slot first, and give up
+    with HashingBusy after timeout seconds. With 0 workers hashing runs in the calling
+    thread, still bounded by the slots.
+
+    Slots are re-entrant per thread, so a view can take one around the whole sign-in
+    (before it checks out a database connection) and the hashes it runs reuse it.
+    """
+
+    def __init__(self, rounds: int = DEFAULT_ROUNDS, workers: int = 0, max_pending: int = 4, timeout: float = 5.0):
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._held = threading.local()
+        self.configure(rounds, workers, max_pending, timeout)
+
+    def configure(self, rounds: int, workers: int, max_pending: int, timeout: float):
+        with self._lock:
+            self.rounds = rounds
+            self.workers = workers
+            self.max_pending = max_pending
+            self.timeout = timeout
+            self._slots = threading.BoundedSemaphore(max(workers, 1) + max_pending)
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the parent runs waitress, pool and listener threads
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _drop_executor(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            # Another thread may already have replaced it
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        executor = self._get_executor()
+        try:
+            return executor.submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory): start a new pool and retry once
+            self._drop_executor(executor)
+            return self._get_executor().submit(fn, *args).result()
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold a hashing slot for the duration of the block
+
+        :raises HashingBusy: when none frees up within timeout seconds
+        """
+        depth = getattr(self._held, "depth", 0)
+        if depth == 0:
+            slots = self._slots
+            if not slots.acquire(timeout=self.timeout):
+                raise HashingBusy("Too many password hashes in progress")
+        self._held.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._held.depth = depth
+            if depth == 0:
+                slots.release()
+
+    def hash(self, password: str) -> str:
+        with self.slot():
+            return self._run(_hashpw, password.encode("utf-8"), self.rounds).decode("utf-8")
+
+    def check(self, password: str, hashed: str) -> bool:
+        with self.slot():
+            return self._run(_checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """
+        Whether hashed was made with a lower cost than the configured one. Calibrated costs
+        can differ between workers, so hashes are only ever upgraded, never downgraded.
+        """
+        return rounds_of(hashed) < self.rounds
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+# Used by UserModel, configured from the settings by includeme
+HASHER = PasswordHasher()
+atexit.register(HASHER.shutdown)
+
+
+def includeme(config):
+    """
+    Configure HASHER from the settings. password.rounds fixes the bcrypt cost, otherwise
+    it is calibrated so a hash takes about password.target_ms on this machine.
+    """
+    settings = config.get_settings()
+    rounds = settings.get("password.rounds")
+    if rounds:
+        rounds = int(rounds)
+    else:
+        rounds = calibrate(float(settings.get("password.target_ms") or DEFAULT_TARGET_MS))
+
+    workers = int(settings.get("password.workers") or os.cpu_count() or 1)
+    HASHER.configure(
+        rounds=rounds,
+        workers=workers,
+        max_pending=int(settings.get("password.max_pending") or 2 * workers),
+        timeout=float(settings.get("password.timeout") or 5),
+    )
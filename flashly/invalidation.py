@@ -0,0 +1,113 @@
+import os
+import select
+import threading
+from typing import Optional
+
+import psycopg2
+
+from flashly import cache
+from flashly.models import connection_kwargs
+
+# Channel the decks trigger (migrations/012) publishes "<kind>:<id>" payloads on
+CHANNEL = "flashly_invalidate"
+
+
+class InvalidationListener(threading.Thread):
+    """
+    Background thread that LISTENs on CHANNEL over a dedicated connection and evicts
+    the object named by each notification from this process's caches, so a write
+    handled by one worker reaches the caches of every other worker.
+
+    Notifications published while the connection is down are lost, so every cache is
+    cleared each time the listener (re)connects. Reconnects back off exponentially
+    from reconnect_delay up to max_reconnect_delay seconds.
+    """
+
+    def __init__(
+        self,
+        connect,
+        poll_interval: float = 5.0,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 30.0,
+    ):
+        super().__init__(name="flashly-invalidation", daemon=True)
+        self._connect = connect
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = threading.Event()
+        self.backend_pid = None
+        self._stopped = threading.Event()
+        # Written to by stop() to wake the thread up from select()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+
+    def run(self):
+        delay = self.reconnect_delay
+        while not self._stopped.is_set():
+            try:
+                conn = self._connect()
+            except psycopg2.OperationalError as e:
+                print(f"Invalidation listener cannot connect, retrying in {delay}s: {e}")
+                self._stopped.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            delay = self.reconnect_delay
+            try:
+                self._listen(conn)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                print(f"Invalidation listener lost its connection, reconnecting: {e}")
+            finally:
+                self.connected.clear()
+                conn.close()
+
+    def _listen(self, conn):
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        self.backend_pid = conn.get_backend_pid()
+
+        # Whatever was published before LISTEN took effect never reaches us
+        cache.clear()
+        self.connected.set()
+
+        while not self._stopped.is_set():
+            readable, _, _ = select.select([conn, self._wakeup_r], [], [], self.poll_interval)
+            if not readable:
+                # Nothing happened for a while, make sure the connection is still alive
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                continue
+            if self._wakeup_r in readable:
+                return
+
+            conn.poll()
+            while conn.notifies:
+                kind, _, key = conn.notifies.pop(0).payload.partition(":")
+                cache.invalidate(kind, key)
+
+    def stop(self, timeout: Optional[float] = None):
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        os.write(self._wakeup_w, b"x")
+        self.join(timeout)
+        if not self.is_alive():
+            os.close(self._wakeup_r)
+            os.close(self._wakeup_w)
+
+
+def includeme(config):
+    """
+    Start the invalidation listener against the primary database, unless
+    cache.invalidation.listen is turned off (a single worker does not need it)
+    """
+    settings = config.get_settings()
+    if str(settings.get("cache.invalidation.listen", "true")).lower() in ("false", "0", "no", "off"):
+        return
+
+    # NOTIFY is not replicated, the listener always connects to the primary
+    kwargs = connection_kwargs(settings)
+    listener = InvalidationListener(lambda: psycopg2.connect(**kwargs))
+    listener.start()
+    config.registry.settings["cache_invalidation_listener"] = listener
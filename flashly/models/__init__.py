@@ -1,4 +1,94 @@
-from psycopg2.pool import SimpleConnectionPool
+from flashly.models.pool import BlockingConnectionPool
+from flashly.models.prepared import PreparingConnection
+from flashly.models.routing import RecentWriters
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Set on the responses to writes for db.replica.stickiness seconds: the author's browser sends it with every
+# read, with or without a token, so those reads go to the primary until the replica has caught up
+READ_PRIMARY_COOKIE = "flashly_read_primary"
+
+
+def _setting(settings, prefix: str, key: str, default):
+    """
+    Setting key under prefix, falling back to the primary's (under "db") and then to default
+    """
+    return settings.get(f"{prefix}.{key}") or settings.get(f"db.{key}") or default
+
+
+def connection_kwargs(settings, prefix: str = "db"):
+    """
+    psycopg2.connect arguments from the settings under prefix ("db" for the primary, "db.replica" for the replica).
+    Settings missing under prefix fall back to the primary ones.
+    """
+    return {
+        "host": _setting(settings, prefix, "host", "localhost"),
+        "database": _setting(settings, prefix, "name", "flashly_dev"),
+        "user": _setting(settings, prefix, "user", "user"),
+        "password": _setting(settings, prefix, "password", "password"),
+        "port": _setting(settings, prefix, "port", 5432),
+    }
+
+
+def create_pool(settings, prefix: str = "db"):
+    """
+    Create a connection pool from the settings under prefix ("db" for the primary, "db.replica" for the replica).
+    Settings missing under prefix fall back to the primary ones.
+    """
+    # Hot queries are prepared once per connection, unless a transaction-pooling
+    # proxy such as pgbouncer sits in front of Postgres and cannot keep them
+    prepare = str(settings.get("db.prepared_statements", "true")).lower() not in ("false", "0", "no", "off")
+
+    return BlockingConnectionPool(
+        minconn=int(_setting(settings, prefix, "pool.min", 1)),
+        maxconn=int(_setting(settings, prefix, "pool.max", 20)),
+        timeout=float(_setting(settings, prefix, "pool.timeout", 30)),
+        validate_idle=float(_setting(settings, prefix, "pool.validate_idle", 30)),
+        connection_factory=PreparingConnection if prepare else None,
+        **connection_kwargs(settings, prefix),
+    )
+
+
+def _create_pools(settings):
+    """
+    Primary pool, and the read replica pool when db.replica.host is set (None otherwise)
+    """
+    # create thread-safe db pool for psql, requests wait for a free connection up to db.pool.timeout
+    db_pool = create_pool(settings)
+    # create optional read replica pool for GET routes
+    db_replica_pool = create_pool(settings, "db.replica") if settings.get("db.replica.host") else None
+    return db_pool, db_replica_pool
+
+
+def get_db_read_pool(request):
+    settings = request.registry.settings
+    replica_pool = settings["db_replica_pool"]
+    if replica_pool is None:
+        return settings["db_pool"]
+    # The author of a recent write reads from the primary until the replica has caught up
+    token = request.params.get("token")
+    if request.cookies.get(READ_PRIMARY_COOKIE) or settings["db_recent_writers"].wrote_recently(token):
+        return settings["db_pool"]
+    return replica_pool
+
+
+def reads_from_primary(request):
+    # Only rows read from the primary may fill the caches, see DeckModel.find_deck_acl
+    return request.db_read_pool is request.registry.settings["db_pool"]
+
+
+def get_db_read_connection(request):
+    read_pool = request.db_read_pool
+    if read_pool is request.registry.settings["db_pool"]:
+        return request.db_conn
+
+    conn = read_pool.getconn()
+
+    def cleanup(request):
+        read_pool.putconn(conn)
+
+    request.add_finished_callback(cleanup)
+    return conn
 
 
 def includeme(config):
@@ -7,18 +97,16 @@ def includeme(config):
     """
     settings = config.get_settings()
 
-    # create db pool for psql
-    db_pool = SimpleConnectionPool(
-        minconn=1,
-        maxconn=20,
-        host=settings.get("db.host", "localhost"),
-        database=settings.get("db.name", "flashly_dev"),
-        user=settings.get("db.user", "user"),
-        password=settings.get("db.password", "password"),
-        port=settings.get("db.port", 5432),
-    )
-
+    db_pool, db_replica_pool = _create_pools(settings)
     config.registry.settings["db_pool"] = db_pool
+    config.registry.settings["db_replica_pool"] = db_replica_pool
+
+    stickiness = float(settings.get("db.replica.stickiness") or 5)
+    recent_writers = RecentWriters(stickiness=stickiness)
+    config.registry.settings["db_recent_writers"] = recent_writers
+
+    def pin_to_primary(request, response):
+        response.set_cookie(READ_PRIMARY_COOKIE, "1", max_age=int(stickiness) or 1, httponly=True, samesite="Lax")
 
     def get_db_connection(request):
         pool = request.registry.settings["db_pool"]
@@ -26,8 +114,16 @@ def includeme(config):
 
         def cleanup(request):
             pool.putconn(conn)
+            # Send the author's next reads to the primary until the replica has their write
+            if request.method not in READ_METHODS:
+                recent_writers.mark(request.params.get("token"))
 
         request.add_finished_callback(cleanup)
+        if request.method not in READ_METHODS:
+            request.add_response_callback(pin_to_primary)
         return conn
 
     config.add_request_method(get_db_connection, "db_conn", reify=True)
+    config.add_request_method(get_db_read_pool, "db_read_pool", reify=True)
+    config.add_request_method(reads_from_primary, "db_read_primary", reify=True)
+    config.add_request_method(get_db_read_connection, "db_read", reify=True)
@@ -0,0 +1,33 @@
+from itertools import starmap
+from typing import Tuple
+
+
+class RowModel:
+    """
+    Base of the model dataclasses, declared with @dataclass(slots=True) so instances
+    carry no __dict__. Fields are declared in the order the queries select the columns,
+    so a row maps onto a model positionally.
+    """
+
+    __slots__: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Build a model from one database row, or None when there is no row
+        """
+        return cls(*row) if row is not None else None
+
+    @classmethod
+    def from_rows(cls, rows) -> list:
+        """
+        Build a model from each of rows. __init__ still runs once per row, starmap only
+        saves the loop and argument unpacking of a comprehension.
+        """
+        return list(starmap(cls, rows))
+
+    def to_json(self) -> dict:
+        """
+        Fields by name, values left as they are for the json renderer to encode
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
@@ -2,9 +2,20 @@ from dataclasses import dataclass
 from datetime import datetime
 from uuid import UUID
 
+import psycopg2
+from psycopg2.extras import execute_values
 
-@dataclass
-class CardModel:
+from flashly.models.base import RowModel
+from flashly.cache import invalidate
+from flashly.models.prepared import execute_prepared
+from flashly.models.rows import CardRow, fetchall, fetchone
+from flashly.streaming import ServerSideRows
+
+VALID_DIFFICULTIES = ["easy", "medium", "hard"]
+
+
+@dataclass(slots=True)
+class CardModel(RowModel):
     __tablename__ = "cards"
 
     id: UUID
@@ -17,60 +28,175 @@ class CardModel:
     created_at: datetime
     updated_at: datetime
 
-    def save(self, db_conn):
-        with db_conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO cards (id, front_text, back_text, difficulty, times_reviewed, success_rate, deck_id)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    self.id,
-                    self.front_text,
-                    self.back_text,
-                    self.difficulty,
-                    self.times_reviewed,
-                    self.success_rate,
-                    self.deck_id,
-                ),
-            )
-            db_conn.commit()
+    @classmethod
+    def create_for_owner(cls, db_conn, deck_id: str, owner_id: str, card_id: str, front_text, back_text, difficulty):
+        """
+        Insert a card into a deck owned by owner_id and touch the deck, in one statement and one commit
 
-    def update(self, db_conn):
-        with db_conn.cursor() as cur:
-            cur.execute(
-                """
-                UPDATE cards
-                SET front_text = %s, back_text = %s, difficulty = %s, times_reviewed = %s, success_rate = %s, updated_at = %s
-                WHERE id = %s
-                """,
-                (
-                    self.front_text,
-                    self.back_text,
-                    self.difficulty,
-                    self.times_reviewed,
-                    self.success_rate,
-                    self.updated_at,
-                    self.id,
-                ),
-            )
-            db_conn.commit()
+        :returns: the inserted CardRow, or None when the deck does not exist or belongs to
+            someone else
+        """
+        try:
+            with db_conn.cursor() as cur:
+                cur.execute(
+                    """
+                    WITH inserted AS (
+                        INSERT INTO cards (id, front_text, back_text, difficulty, deck_id)
+                        SELECT %s, %s, %s, %s, d.id
+                        FROM decks d
+                        WHERE d.id = %s AND d.owner_id::text = %s
+                        RETURNING
+                            id, front_text, back_text, difficulty, times_reviewed, success_rate, deck_id,
+                            created_at, updated_at
+                    ), touched AS (
+                        UPDATE decks SET card_count = card_count + 1, updated_at = timezone('UTC', now())
+                        WHERE id IN (SELECT deck_id FROM inserted)
+                    )
+                    SELECT * FROM inserted
+                    """,
+                    (card_id, front_text, back_text, difficulty, deck_id, owner_id),
+                )
+                card = fetchone(cur, CardRow)
+                db_conn.commit()
+        except psycopg2.DataError:
+            # Malformed ids match no deck
+            db_conn.rollback()
+            return None
+        if card is not None:
+            invalidate("deck", deck_id)
+        return card
+
+    @classmethod
+    def update_for_owner(
+        cls, db_conn, deck_id: str, card_id: str, owner_id: str, front_text=None, back_text=None, difficulty=None
+    ):
+        """
+        Update the given fields of a card of a deck owned by owner_id and touch the deck, in one
+        statement and one commit. Fields left to None keep their value.
+
+        :returns: the updated CardRow, or None when the card is not in that deck or the deck
+            belongs to someone else
+        """
+        try:
+            with db_conn.cursor() as cur:
+                cur.execute(
+                    """
+                    WITH updated AS (
+                        UPDATE cards c SET
+                            front_text = coalesce(%s, c.front_text),
+                            back_text = coalesce(%s, c.back_text),
+                            difficulty = coalesce(%s, c.difficulty),
+                            updated_at = timezone('UTC', now())
+                        FROM decks d
+                        WHERE c.id = %s AND c.deck_id = %s AND d.id = c.deck_id AND d.owner_id::text = %s
+                        RETURNING
+                            c.id, c.front_text, c.back_text, c.difficulty, c.times_reviewed, c.success_rate, c.deck_id,
+                            c.created_at, c.updated_at
+                    ), touched AS (
+                        UPDATE decks SET updated_at = timezone('UTC', now())
+                        WHERE id IN (SELECT deck_id FROM updated)
+                    )
+                    SELECT * FROM updated
+                    """,
+                    (front_text, back_text, difficulty, card_id, deck_id, owner_id),
+                )
+                card = fetchone(cur, CardRow)
+                db_conn.commit()
+        except psycopg2.DataError:
+            db_conn.rollback()
+            return None
+        if card is not None:
+            invalidate("deck", deck_id)
+        return card
+
+    @classmethod
+    def delete_for_owner(cls, db_conn, deck_id: str, card_id: str, owner_id: str) -> bool:
+        """
+        Delete a card of a deck owned by owner_id and update the deck, in one statement and one commit
+
+        :returns: False when the card is not in that deck or the deck belongs to someone else
+        """
+        try:
+            with db_conn.cursor() as cur:
+                cur.execute(
+                    """
+                    WITH deleted AS (
+                        DELETE FROM cards c
+                        USING decks d
+                        WHERE c.id = %s AND c.deck_id = %s AND d.id = c.deck_id AND d.owner_id::text = %s
+                        RETURNING c.deck_id
+                    ), touched AS (
+                        UPDATE decks SET card_count = card_count - 1, updated_at = timezone('UTC', now())
+                        WHERE id IN (SELECT deck_id FROM deleted)
+                    )
+                    SELECT deck_id FROM deleted
+                    """,
+                    (card_id, deck_id, owner_id),
+                )
+                deleted = cur.fetchone() is not None
+                db_conn.commit()
+        except psycopg2.DataError:
+            db_conn.rollback()
+            return False
+        if deleted:
+            invalidate("deck", deck_id)
+        return deleted
 
-    def delete(self, db_conn):
+    @classmethod
+    def find_deck_id(cls, db_conn, card_id: str):
+        """
+        Return the id of the deck a card belongs to, or None when the card does not exist
+        """
+        try:
+            with db_conn.cursor() as cur:
+                cur.execute("SELECT deck_id FROM cards WHERE id = %s", (card_id,))
+                row = cur.fetchone()
+                return row[0] if row else None
+        except psycopg2.DataError:
+            db_conn.rollback()
+            return None
+
+    @classmethod
+    def bulk_create(cls, db_conn, deck_id: str, cards):
+        """
+        Insert many cards into a deck with one set-based statement that also bumps the deck's
+        card_count and updated_at once, then commit
+
+        :param cards: (id, front_text, back_text, difficulty) tuples
+        :returns: the inserted CardRows
+        """
         with db_conn.cursor() as cur:
-            cur.execute(
+            # page_size covers every card so execute_values sends a single statement
+            rows = execute_values(
+                cur,
                 """
-                DELETE FROM cards WHERE id = %s
+                WITH inserted AS (
+                    INSERT INTO cards (id, front_text, back_text, difficulty, deck_id)
+                    VALUES %s
+                    RETURNING id, front_text, back_text, difficulty, times_reviewed, success_rate, deck_id, created_at, updated_at
+                ), touched AS (
+                    UPDATE decks
+                    SET card_count = card_count + (SELECT COUNT(*) FROM inserted), updated_at = timezone('UTC', now())
+                    WHERE id IN (SELECT deck_id FROM inserted)
+                )
+                SELECT id, front_text, back_text, difficulty, times_reviewed, success_rate, deck_id, created_at, updated_at
+                FROM inserted
                 """,
-                (self.id,),
+                [(*card, deck_id) for card in cards],
+                page_size=max(len(cards), 1),
+                fetch=True,
             )
             db_conn.commit()
+        invalidate("deck", deck_id)
+        return list(map(CardRow._make, rows))
 
     @classmethod
     def find_cards_by_deck_id(cls, db_conn, deck_id: str):
         try:
             with db_conn.cursor() as cur:
-                cur.execute(
+                execute_prepared(
+                    cur,
+                    "card_by_deck",
                     """
                     SELECT id, front_text, back_text, difficulty, times_reviewed, success_rate, deck_id, created_at, updated_at
                     FROM cards
@@ -79,17 +205,37 @@ class CardModel:
                     """,
                     (deck_id,),
                 )
-                cards = cur.fetchall()
+                cards = fetchall(cur, CardRow)
                 return cards
         except Exception as e:
             print(f"Error in find_cards_by_deck_id: {e}")
             return None
 
+    @classmethod
+    def stream_cards_by_deck_id(cls, pool, deck_id: str) -> ServerSideRows:
+        """
+        Iterate over the cards of a deck as CardRows, through a server-side cursor on a
+        connection of its own. Close the result once done.
+        """
+        return ServerSideRows(
+            pool,
+            """
+            SELECT id, front_text, back_text, difficulty, times_reviewed, success_rate, deck_id, created_at, updated_at
+            FROM cards
+            WHERE deck_id = %s
+            ORDER BY created_at ASC
+            """,
+            (deck_id,),
+            row_type=CardRow,
+        )
+
     @classmethod
     def find_card_by_id(cls, db_conn, card_id: str):
         try:
             with db_conn.cursor() as cur:
-                cur.execute(
+                execute_prepared(
+                    cur,
+                    "card_by_id",
                     """
                     SELECT id, front_text, back_text, difficulty, times_reviewed, success_rate, deck_id, created_at, updated_at
                     FROM cards
@@ -97,7 +243,7 @@ class CardModel:
                     """,
                     (card_id,),
                 )
-                card = cur.fetchone()
+                card = fetchone(cur, CardRow)
                 return card
         except Exception as e:
             print(f"Error in find_card_by_id: {e}")
@@ -106,21 +252,11 @@ class CardModel:
 
 def serialize_single_card_tuple(card_tuple):
     """
-    Sérialise un tuple de données de carte en format JSON.
+    Sérialise une ligne de carte (CardRow) en format JSON, les clés sont les noms des colonnes.
+    Les UUID, dates et décimaux sont laissés tels quels, le renderer json les encode.
     """
-    if len(card_tuple) == 9:
-        # Format standard pour les cartes
-        return {
-            "id": str(card_tuple[0]),
-            "front_text": card_tuple[1],
-            "back_text": card_tuple[2],
-            "difficulty": card_tuple[3],
-            "times_reviewed": int(card_tuple[4]),
-            "success_rate": float(card_tuple[5]),
-            "deck_id": str(card_tuple[6]),
-            "created_at": card_tuple[7].isoformat() if card_tuple[7] else None,
-            "updated_at": card_tuple[8].isoformat() if card_tuple[8] else None,
-        }
+    if hasattr(card_tuple, "_asdict"):
+        return card_tuple._asdict()
     else:
         # Fallback pour des formats non reconnus
         return card_tuple
@@ -134,15 +270,15 @@ def serialize_card_data(card_data):
     if isinstance(card_data, CardModel):
         # Si c'est une instance de CardModel
         return {
-            "id": str(card_data.id),
+            "id": card_data.id,
             "front_text": card_data.front_text,
             "back_text": card_data.back_text,
             "difficulty": card_data.difficulty,
             "times_reviewed": card_data.times_reviewed,
             "success_rate": card_data.success_rate,
-            "deck_id": str(card_data.deck_id),
-            "created_at": (card_data.created_at.isoformat() if card_data.created_at else None),
-            "updated_at": (card_data.updated_at.isoformat() if card_data.updated_at else None),
+            "deck_id": card_data.deck_id,
+            "created_at": card_data.created_at,
+            "updated_at": card_data.updated_at,
         }
     elif isinstance(card_data, (list, tuple)) and card_data:
         if isinstance(card_data[0], (list, tuple)):
@@ -0,0 +1,171 @@
+import csv
+import re
+
+import psycopg2
+
+from flashly.cache import invalidate
+from flashly.models.card import VALID_DIFFICULTIES
+
+# Bytes handed to COPY per read, the upload is never held in memory as a whole
+COPY_CHUNK_SIZE = 64 * 1024
+
+# Invalid rows reported back to the client, the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+# Delimiter of each accepted format, as a SQL literal for COPY
+DELIMITERS = {"csv": "','", "tsv": "E'\\t'"}
+
+# Accepted header names, compared lowercase without spaces, dashes or underscores
+COLUMN_ALIASES = {
+    "front": "front_text",
+    "fronttext": "front_text",
+    "question": "front_text",
+    "back": "back_text",
+    "backtext": "back_text",
+    "answer": "back_text",
+    "difficulty": "difficulty",
+}
+
+
+# Staging rows as they would be stored: trimmed text and a lowercase difficulty defaulting to easy.
+# Normalizing on read saves rewriting the whole staging table with an UPDATE.
+NORMALIZED_ROWS = """
+    SELECT
+        row_number,
+        btrim(front_text) AS front_text,
+        btrim(back_text) AS back_text,
+        coalesce(nullif(lower(btrim(difficulty)), ''), 'easy') AS difficulty
+    FROM card_import
+"""
+
+
+class CardImportError(ValueError):
+    """
+    Raised when an uploaded file cannot be imported, rows lists the first invalid rows
+    """
+
+    def __init__(self, message: str, rows=None, rejected: int = 0):
+        super().__init__(message)
+        self.rows = rows or []
+        self.rejected = rejected
+
+
+def parse_header(line: str, delimiter: str):
+    """
+    Map the header row of an upload to staging table columns, unknown columns are
+    loaded into throwaway columns and ignored
+    """
+    names = next(csv.reader([line], delimiter=delimiter), [])
+    columns = []
+    for position, name in enumerate(names):
+        column = COLUMN_ALIASES.get(re.sub(r"[\s_-]", "", name.lower()))
+        if column is None or column in columns:
+            column = f"ignored_{position}"
+        columns.append(column)
+
+    missing = [column for column in ("front_text", "back_text") if column not in columns]
+    if missing:
+        raise CardImportError(f"Missing required columns: {', '.join(missing)}")
+
+    return columns
+
+
+def import_cards(db_conn, deck_id: str, stream, file_format: str = "csv"):
+    """
+    Stream a CSV/TSV file with a header row into a deck. The rows are loaded with
+    COPY into a temporary staging table, validated there set-wise, then inserted
+    into cards with one INSERT ... SELECT and the deck is updated once, all in a
+    single transaction. Nothing is imported when any row is invalid.
+
+    :param stream: binary file object positioned at the header row
+    :returns: the number of imported cards
+    :raises CardImportError: when the file is malformed or contains invalid rows
+    """
+    if file_format not in DELIMITERS:
+        raise CardImportError(f"Invalid format. Must be one of: {', '.join(DELIMITERS)}")
+
+    header = stream.readline().decode("utf-8-sig", errors="replace").rstrip("\r\n")
+    if not header:
+        raise CardImportError("The file is empty")
+    columns = parse_header(header, "\t" if file_format == "tsv" else ",")
+
+    try:
+        with db_conn.cursor() as cur:
+            staging_columns = ", ".join(f"{column} text" for column in columns if column != "difficulty")
+            cur.execute(f"""
+                CREATE TEMP TABLE card_import (
+                    row_number bigserial,
+                    difficulty text,
+                    {staging_columns}
+                ) ON COMMIT DROP
+                """)
+            cur.copy_expert(
+                f"""
+                COPY card_import ({", ".join(columns)})
+                FROM STDIN WITH (FORMAT csv, DELIMITER {DELIMITERS[file_format]}, ENCODING 'UTF8')
+                """,
+                stream,
+                size=COPY_CHUNK_SIZE,
+            )
+
+            # Validate every row in one query instead of one by one in Python
+            cur.execute(
+                f"""
+                WITH invalid AS (
+                    SELECT
+                        row_number,
+                        CASE
+                            WHEN coalesce(front_text, '') = '' AND coalesce(back_text, '') = ''
+                                THEN 'Missing required fields: frontText, backText'
+                            WHEN coalesce(front_text, '') = '' THEN 'Missing required fields: frontText'
+                            WHEN coalesce(back_text, '') = '' THEN 'Missing required fields: backText'
+                            ELSE 'Invalid difficulty. Must be one of: ' || %s
+                        END AS error
+                    FROM ({NORMALIZED_ROWS}) c
+                    WHERE coalesce(front_text, '') = ''
+                    OR coalesce(back_text, '') = ''
+                    OR difficulty <> ALL(%s)
+                )
+                SELECT row_number, error, COUNT(*) OVER () FROM invalid ORDER BY row_number LIMIT %s
+                """,
+                (", ".join(VALID_DIFFICULTIES), VALID_DIFFICULTIES, MAX_REPORTED_ERRORS),
+            )
+            invalid = cur.fetchall()
+            if invalid:
+                raise CardImportError(
+                    f"{invalid[0][2]} invalid rows, nothing was imported",
+                    # Row numbers count the header as row 1, like a spreadsheet does
+                    rows=[{"row": row_number + 1, "error": error} for row_number, error, _ in invalid],
+                    rejected=invalid[0][2],
+                )
+
+            # Cards keep the order of the file, created_at is what decks sort their cards by
+            cur.execute(
+                f"""
+                INSERT INTO cards (id, front_text, back_text, difficulty, deck_id, created_at, updated_at)
+                SELECT
+                    gen_random_uuid(), front_text, back_text, difficulty, %s,
+                    now() + row_number * interval '1 microsecond', now()
+                FROM ({NORMALIZED_ROWS}) c
+                """,
+                (deck_id,),
+            )
+            imported = cur.rowcount
+            cur.execute(
+                """
+                UPDATE decks SET card_count = card_count + %s, updated_at = timezone('UTC', now())
+                WHERE id = %s
+                """,
+                (imported, deck_id),
+            )
+            db_conn.commit()
+    except CardImportError:
+        db_conn.rollback()
+        raise
+    except psycopg2.DataError as e:
+        # COPY rejects rows with the wrong number of columns, bad quoting or invalid UTF-8
+        db_conn.rollback()
+        raise CardImportError(f"Malformed file: {(e.pgerror or str(e)).splitlines()[0]}")
+
+    invalidate("deck", deck_id)
+    return imported
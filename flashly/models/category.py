@@ -2,9 +2,11 @@ from dataclasses import dataclass
 from datetime import datetime
 from uuid import UUID
 
+from flashly.models.base import RowModel
 
-@dataclass
-class CategoryModel:
+
+@dataclass(slots=True)
+class CategoryModel(RowModel):
     __tablename__ = "categories"
 
     id: UUID
@@ -2,9 +2,18 @@ from dataclasses import dataclass
 from datetime import datetime
 from uuid import UUID
 
+import psycopg2
 
-@dataclass
-class DeckModel:
+from flashly.models.base import RowModel
+from flashly.cache import DECK_ACL, DECK_METADATA, invalidate
+from flashly.models.prepared import execute_prepared
+from flashly.models.rows import DeckAclRow, DeckRow, DeckSummaryRow, OwnedDeckRow, fetchall, fetchone
+
+VALID_PUBLISH_STATUSES = ["private", "public"]
+
+
+@dataclass(slots=True)
+class DeckModel(RowModel):
     __tablename__ = "decks"
 
     id: UUID
@@ -15,6 +24,7 @@ class DeckModel:
     rating: float
     created_at: datetime
     updated_at: datetime
+    card_count: int = 0
 
     def save(self, db_conn):
         with db_conn.cursor() as cur:
@@ -34,40 +44,193 @@ class DeckModel:
             )
             db_conn.commit()
 
-    def update(self, db_conn):
-        with db_conn.cursor() as cur:
-            cur.execute(
-                """
-                UPDATE decks
-                SET name = %s, description = %s, publish_status = %s, updated_at = %s
-                WHERE id = %s
-                """,
-                (
-                    self.name,
-                    self.description,
-                    self.publish_status,
-                    self.updated_at,
-                    self.id,
-                ),
-            )
-            db_conn.commit()
+    @classmethod
+    def update_for_owner(cls, db_conn, deck_id: str, owner_id: str, name=None, description=None, publish_status=None):
+        """
+        Update the given fields of a deck owned by owner_id in one statement and one commit.
+        Fields left to None keep their value.
+
+        :returns: the updated DeckRow, or None when the deck does not exist or belongs to
+            someone else
+        """
+        try:
+            with db_conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE decks d SET
+                        name = coalesce(%s, d.name),
+                        description = coalesce(%s, d.description),
+                        publish_status = coalesce(%s, d.publish_status),
+                        updated_at = timezone('UTC', now())
+                    FROM users u
+                    WHERE d.id = %s AND d.owner_id::text = %s AND u.id = d.owner_id
+                    RETURNING
+                        d.id,
+                        d.name,
+                        d.description,
+                        d.publish_status,
+                        d.owner_id,
+                        d.rating,
+                        d.created_at,
+                        d.updated_at,
+                        u.username as owner,
+                        d.card_count
+                    """,
+                    (name, description, publish_status, deck_id, owner_id),
+                )
+                deck = fetchone(cur, DeckRow)
+                db_conn.commit()
+        except psycopg2.DataError:
+            # Malformed ids match no deck
+            db_conn.rollback()
+            return None
+        if deck is not None:
+            invalidate("deck", deck_id)
+            # Write through, the next get_deck is served the updated deck without a query
+            DECK_METADATA.set(str(deck_id), serialize_deck_data(deck))
+        return deck
+
+    @classmethod
+    def delete_for_owner(cls, db_conn, deck_id: str, owner_id: str) -> bool:
+        """
+        Delete a deck owned by owner_id, its cards and categories go with it through ON DELETE CASCADE
+
+        :returns: False when the deck does not exist or belongs to someone else
+        """
+        try:
+            with db_conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM decks WHERE id = %s AND owner_id::text = %s RETURNING id",
+                    (deck_id, owner_id),
+                )
+                deleted = cur.fetchone() is not None
+                db_conn.commit()
+        except psycopg2.DataError:
+            db_conn.rollback()
+            return False
+        if deleted:
+            invalidate("deck", deck_id)
+        return deleted
 
-    def delete(self, db_conn):
+    @classmethod
+    def touch_for_owner(cls, db_conn, owner_id: str) -> list:
+        """
+        Bump updated_at of every deck of owner_id in the caller's transaction, when something
+        the decks are served with (the owner's username) changes. Their validators change with
+        it, so no 304 keeps the old value. Returns the deck ids to invalidate once committed.
+        """
         with db_conn.cursor() as cur:
             cur.execute(
-                """
-                DELETE FROM decks WHERE id = %s
-                """,
-                (self.id,),
+                "UPDATE decks SET updated_at = timezone('UTC', now()) WHERE owner_id = %s RETURNING id",
+                (owner_id,),
             )
-            db_conn.commit()
+            return [row[0] for row in cur.fetchall()]
 
     @classmethod
-    def find_explore_decks(cls, db_conn):
+    def find_serialized_deck(cls, db_conn, deck_id: str, fill_cache: bool = True, version=None):
+        """
+        Return the deck serialized the way get_deck sends it, or None when it does not exist.
+        Answers from DECK_METADATA until the entry expires or a write path invalidates it.
+        Pass fill_cache=False when db_conn reads from the replica: a lagging replica could
+        otherwise put back a row older than the write that invalidated the entry. Pass the
+        version (find_deck_version) the response's validators are built from to read an
+        entry with another updated_at again.
+        """
+        key = str(deck_id)
+        deck = DECK_METADATA.get(key)
+        if deck is not None and (version is None or deck["updated_at"] == version):
+            return deck
+
+        row = cls.find_deck_by_id(db_conn, deck_id)
+        if row is None:
+            return None
+
+        deck = serialize_deck_data(row)
+        if fill_cache:
+            DECK_METADATA.set(key, deck)
+        return deck
+
+    @classmethod
+    def find_deck_version(cls, db_conn, deck_id: str):
+        """
+        Return the updated_at of a deck, which every write to the deck or its cards moves,
+        or None when it does not exist. Always read from the database, it decides 304s.
+        """
         try:
             with db_conn.cursor() as cur:
-                cur.execute(
-                    """
+                execute_prepared(cur, "deck_version", "SELECT updated_at FROM decks WHERE id = %s", (deck_id,))
+                row = cur.fetchone()
+                return row[0] if row else None
+        except psycopg2.DataError:
+            db_conn.rollback()
+            return None
+
+    @classmethod
+    def find_deck_acl(cls, db_conn, deck_id: str, fill_cache: bool = True, version=None):
+        """
+        Return what permission checks need to know about a deck as a DeckAclRow, or None
+        when it does not exist. Unlike find_deck_by_id this reads
+        the decks row alone, and answers from DECK_ACL until the entry expires or a write
+        path invalidates it. Like find_serialized_deck, only fill the cache from the primary,
+        and pass version to read an entry with another updated_at again.
+        """
+        key = str(deck_id)
+        acl = DECK_ACL.get(key)
+        if acl is not None and (version is None or acl.updated_at == version):
+            return acl
+
+        try:
+            with db_conn.cursor() as cur:
+                execute_prepared(
+                    cur,
+                    "deck_acl",
+                    "SELECT owner_id, publish_status, updated_at, name FROM decks WHERE id = %s",
+                    (deck_id,),
+                )
+                acl = fetchone(cur, DeckAclRow)
+        except psycopg2.DataError:
+            # Malformed ids match no deck
+            db_conn.rollback()
+            return None
+
+        if acl is not None and fill_cache:
+            DECK_ACL.set(key, acl)
+        return acl
+
+    @classmethod
+    def find_owner_id(cls, db_conn, deck_id: str):
+        """
+        Return the owner of a deck, or None when the deck does not exist. Used to tell a
+        missing deck from a forbidden one once a write matched no row.
+        """
+        try:
+            with db_conn.cursor() as cur:
+                cur.execute("SELECT owner_id FROM decks WHERE id = %s", (deck_id,))
+                row = cur.fetchone()
+                return row[0] if row else None
+        except psycopg2.DataError:
+            db_conn.rollback()
+            return None
+
+    @classmethod
+    def find_explore_decks(cls, db_conn, limit: int = 20, cursor=None):
+        try:
+            with db_conn.cursor() as cur:
+                # Keyset pagination: the cursor is the (rating, created_at, id) of the last deck of the
+                # previous page, so every page is a range scan on idx_decks_public_explore
+                statement = "deck_explore"
+                cursor_clause = ""
+                params = []
+                if cursor is not None:
+                    statement = "deck_explore_after"
+                    cursor_clause = "AND (d.rating, d.created_at, d.id) < (%s::numeric, %s::timestamp, %s::uuid)"
+                    params.extend(cursor)
+                params.append(limit)
+
+                execute_prepared(
+                    cur,
+                    statement,
+                    f"""
                     SELECT
                         d.id,
                         d.name,
@@ -76,16 +239,17 @@ class DeckModel:
                         d.created_at,
                         d.updated_at,
                         u.username as owner,
-                        COUNT(c.id) as card_count
+                        d.card_count
                     FROM decks d
                     JOIN users u on d.owner_id = u.id
-                    LEFT JOIN cards c ON d.id = c.deck_id
                     WHERE d.publish_status = 'public'
-                    GROUP BY d.id, d.name, d.description, d.rating, d.created_at, d.updated_at, u.username
-                    ORDER BY d.rating DESC, d.created_at DESC
-                    """
+                    {cursor_clause}
+                    ORDER BY d.rating DESC, d.created_at DESC, d.id DESC
+                    LIMIT %s
+                    """,
+                    params,
                 )
-                decks = cur.fetchall()
+                decks = fetchall(cur, DeckSummaryRow)
 
                 return decks
         except Exception as e:
@@ -93,11 +257,24 @@ class DeckModel:
             return None
 
     @classmethod
-    def find_feed_decks(cls, db_conn, user_id):
+    def find_feed_decks(cls, db_conn, user_id, limit: int = 20, cursor=None):
         try:
             with db_conn.cursor() as cur:
-                cur.execute(
-                    """
+                # Keyset pagination on (created_at, id); followees are probed through the
+                # followers unique index and their decks through idx_decks_public_owner_created
+                statement = "deck_feed"
+                cursor_clause = ""
+                params = [user_id]
+                if cursor is not None:
+                    statement = "deck_feed_after"
+                    cursor_clause = "AND (d.created_at, d.id) < (%s::timestamp, %s::uuid)"
+                    params.extend(cursor)
+                params.append(limit)
+
+                execute_prepared(
+                    cur,
+                    statement,
+                    f"""
                     SELECT
                         d.id,
                         d.name,
@@ -106,19 +283,20 @@ class DeckModel:
                         d.created_at,
                         d.updated_at,
                         u.username as owner,
-                        COUNT(c.id) as card_count
+                        d.card_count
                     FROM decks d
                     JOIN users u ON d.owner_id = u.id
-                    JOIN followers f ON d.owner_id = f.following_id
-                    LEFT JOIN cards c ON d.id = c.deck_id
                     WHERE d.publish_status = 'public'
-                    AND f.follower_id = %s
-                    GROUP BY d.id, d.name, d.description, d.rating, d.created_at, d.updated_at, u.username
-                    ORDER BY d.created_at DESC, d.rating DESC
+                    AND d.owner_id IN (
+                        SELECT f.following_id FROM followers f WHERE f.follower_id = %s
+                    )
+                    {cursor_clause}
+                    ORDER BY d.created_at DESC, d.id DESC
+                    LIMIT %s
                     """,
-                    (user_id,),
+                    params,
                 )
-                decks = cur.fetchall()
+                decks = fetchall(cur, DeckSummaryRow)
 
                 return decks
         except Exception as e:
@@ -129,7 +307,9 @@ class DeckModel:
     def find_decks_by_user_id(cls, db_conn, user_id: str):
         try:
             with db_conn.cursor() as cur:
-                cur.execute(
+                execute_prepared(
+                    cur,
+                    "deck_by_owner",
                     """
                     SELECT
                         d.id,
@@ -140,17 +320,15 @@ class DeckModel:
                         d.created_at,
                         d.updated_at,
                         u.username as owner,
-                        COUNT(c.id) as card_count
+                        d.card_count
                     FROM decks d
                     JOIN users u ON d.owner_id = u.id
-                    LEFT JOIN cards c ON d.id = c.deck_id
                     WHERE d.owner_id = %s
-                    GROUP BY d.id, d.name, d.description, d.publish_status, d.rating, d.created_at, d.updated_at, u.username
                     ORDER BY d.created_at DESC
                     """,
                     (user_id,),
                 )
-                decks = cur.fetchall()
+                decks = fetchall(cur, OwnedDeckRow)
 
                 return decks
         except Exception as e:
@@ -161,7 +339,9 @@ class DeckModel:
     def find_deck_by_id(cls, db_conn, id: str):
         try:
             with db_conn.cursor() as cur:
-                cur.execute(
+                execute_prepared(
+                    cur,
+                    "deck_by_id",
                     """
                     SELECT
                         d.id,
@@ -173,16 +353,14 @@ class DeckModel:
                         d.created_at,
                         d.updated_at,
                         u.username as owner,
-                        COUNT(c.id) as card_count
+                        d.card_count
                     FROM decks d
                     JOIN users u ON d.owner_id = u.id
-                    LEFT JOIN cards c ON d.id = c.deck_id
                     WHERE d.id = %s
-                    GROUP BY d.id, d.name, d.description, d.publish_status, d.owner_id, d.rating, d.created_at, d.updated_at, u.username
                     """,
                     (id,),
                 )
-                deck = cur.fetchone()
+                deck = fetchone(cur, DeckRow)
 
                 return deck
         except Exception as e:
@@ -192,48 +370,12 @@ class DeckModel:
 
 def serialize_single_deck_tuple(deck_tuple):
     """
-    Sérialise un tuple de données de deck en format JSON.
-    Gère différents formats de tuples selon la requête SQL.
+    Sérialise une ligne de deck (DeckRow, DeckSummaryRow, OwnedDeckRow) en format JSON.
+    Les clés sont les noms des colonnes que la requête a sélectionnées.
+    Les UUID, dates et décimaux sont laissés tels quels, le renderer json les encode.
     """
-    if len(deck_tuple) == 8:
-        # Format pour explore_decks et feed_decks (sans publish_status et owner_id)
-        return {
-            "id": str(deck_tuple[0]),
-            "name": deck_tuple[1],
-            "description": deck_tuple[2],
-            "rating": float(deck_tuple[3]),
-            "created_at": deck_tuple[4].isoformat() if deck_tuple[4] else None,
-            "updated_at": deck_tuple[5].isoformat() if deck_tuple[5] else None,
-            "owner": deck_tuple[6],
-            "card_count": int(deck_tuple[7]),
-        }
-    elif len(deck_tuple) == 9:
-        # Format pour find_decks_by_user_id (avec publish_status)
-        return {
-            "id": str(deck_tuple[0]),
-            "name": deck_tuple[1],
-            "description": deck_tuple[2],
-            "publish_status": deck_tuple[3],
-            "rating": float(deck_tuple[4]),
-            "created_at": deck_tuple[5].isoformat() if deck_tuple[5] else None,
-            "updated_at": deck_tuple[6].isoformat() if deck_tuple[6] else None,
-            "owner": deck_tuple[7],
-            "card_count": int(deck_tuple[8]),
-        }
-    elif len(deck_tuple) == 10:
-        # Format pour find_deck_by_id (avec publish_status et owner_id)
-        return {
-            "id": str(deck_tuple[0]),
-            "name": deck_tuple[1],
-            "description": deck_tuple[2],
-            "publish_status": deck_tuple[3],
-            "owner_id": str(deck_tuple[4]),
-            "rating": float(deck_tuple[5]),
-            "created_at": deck_tuple[6].isoformat() if deck_tuple[6] else None,
-            "updated_at": deck_tuple[7].isoformat() if deck_tuple[7] else None,
-            "owner": deck_tuple[8],
-            "card_count": int(deck_tuple[9]),
-        }
+    if hasattr(deck_tuple, "_asdict"):
+        return deck_tuple._asdict()
     else:
         # Fallback pour des formats non reconnus
         return deck_tuple
@@ -247,14 +389,15 @@ def serialize_deck_data(deck_data):
     if isinstance(deck_data, DeckModel):
         # Si c'est une instance de DeckModel
         return {
-            "id": str(deck_data.id),
+            "id": deck_data.id,
             "name": deck_data.name,
             "description": deck_data.description,
             "publish_status": deck_data.publish_status,
-            "owner_id": str(deck_data.owner_id),
-            "rating": float(deck_data.rating),
-            "created_at": (deck_data.created_at.isoformat() if deck_data.created_at else None),
-            "updated_at": (deck_data.updated_at.isoformat() if deck_data.updated_at else None),
+            "owner_id": deck_data.owner_id,
+            "rating": deck_data.rating,
+            "created_at": deck_data.created_at,
+            "updated_at": deck_data.updated_at,
+            "card_count": deck_data.card_count,
         }
     elif isinstance(deck_data, (list, tuple)) and deck_data:
         if isinstance(deck_data[0], (list, tuple)):
@@ -1,9 +1,11 @@
 from dataclasses import dataclass
 from uuid import UUID
 
+from flashly.models.base import RowModel
 
-@dataclass
-class DeckCategoryModel:
+
+@dataclass(slots=True)
+class DeckCategoryModel(RowModel):
     __tablename__ = "deck_categories"
 
     deck_id: UUID
@@ -2,12 +2,62 @@ from dataclasses import dataclass
 from datetime import datetime
 from uuid import UUID
 
+import psycopg2
 
-@dataclass
-class FollowerModel:
+from flashly.models.base import RowModel
+
+
+@dataclass(slots=True)
+class FollowerModel(RowModel):
     __tablename__ = "followers"
 
     id: UUID
     follower_id: UUID
     following_id: UUID
     created_at: datetime
+
+    @classmethod
+    def follow(cls, db_conn, follower_id: str, following_id: str) -> bool:
+        """
+        Make follower_id follow following_id in one statement. The foreign keys check that both
+        users exist and the UNIQUE(follower_id, following_id) constraint absorbs concurrent
+        double follows.
+
+        :returns: False when the relationship already existed
+        :raises psycopg2.errors.ForeignKeyViolation: when either user does not exist,
+            diag.constraint_name tells which one
+        """
+        with db_conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO followers (follower_id, following_id)
+                VALUES (%s, %s)
+                ON CONFLICT (follower_id, following_id) DO NOTHING
+                RETURNING id
+                """,
+                (follower_id, following_id),
+            )
+            created = cur.fetchone() is not None
+            db_conn.commit()
+            return created
+
+    @classmethod
+    def unfollow(cls, db_conn, follower_id: str, following_id: str) -> bool:
+        """
+        Remove the follow relationship in one statement
+
+        :returns: False when follower_id was not following following_id
+        """
+        try:
+            with db_conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM followers WHERE follower_id = %s AND following_id = %s RETURNING id",
+                    (follower_id, following_id),
+                )
+                deleted = cur.fetchone() is not None
+                db_conn.commit()
+                return deleted
+        except psycopg2.DataError:
+            # Malformed ids match no relationship
+            db_conn.rollback()
+            return False
@@ -0,0 +1,206 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Any
+from typing import Deque
+from typing import Optional
+from typing import Tuple
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.pool import PoolError
+
+
+class PoolTimeout(PoolError):
+    """
+    Raised when no connection became available before the checkout timeout
+    """
+
+
+class PoolMetrics:
+    """
+    Live counters of a BlockingConnectionPool, safe to read from any thread
+    """
+
+    # Upper bounds, in milliseconds, of the checkout wait time histogram buckets
+    WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.idle = 0
+        self.waiters = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total_ms = 0.0
+        self.wait_buckets = [0] * (len(self.WAIT_BUCKETS_MS) + 1)
+
+    def record_wait(self, seconds: float):
+        wait_ms = seconds * 1000
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total_ms += wait_ms
+            self.wait_buckets[bisect_left(self.WAIT_BUCKETS_MS, wait_ms)] += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            labels = [f"le_{bound}ms" for bound in self.WAIT_BUCKETS_MS] + ["inf"]
+            return {
+                "in_use": self.in_use,
+                "idle": self.idle,
+                "waiters": self.waiters,
+                "timeouts": self.timeouts,
+                "wait_count": self.wait_count,
+                "wait_total_ms": round(self.wait_total_ms, 3),
+                "wait_histogram": dict(zip(labels, self.wait_buckets)),
+            }
+
+
+class BlockingConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool. When every connection is in use,
+    getconn blocks until one is returned instead of raising, up to a timeout.
+
+    Connections that were closed are replaced on checkout, and connections idle
+    for longer than validate_idle seconds are pinged with SELECT 1 first.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, timeout: float = 30.0, validate_idle: float = 30.0, **kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Invalid pool size: expected 0 <= minconn <= maxconn and maxconn >= 1")
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.validate_idle = validate_idle
+        self.metrics = PoolMetrics()
+
+        self._kwargs = kwargs
+        self._cond = threading.Condition()
+        self._idle: Deque[Tuple[Any, float]] = deque()  # (connection, returned_at) pairs, most recently returned last
+        self._size = 0
+        self._closed = False
+
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+        self.metrics.idle = len(self._idle)
+
+    def _connect(self):
+        return psycopg2.connect(**self._kwargs)
+
+    def _is_usable(self, conn, returned_at: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.validate_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _wait_for_idle_or_slot(self, deadline: float, timeout: float) -> Optional[Tuple[Any, float]]:
+        """
+        Wait, with the lock held, for an idle (connection, returned_at) pair, or for room to open
+        a new connection, in which case the slot is reserved and None is returned
+        """
+        self.metrics.waiters += 1
+        try:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.maxconn:
+                    # Reserve a slot, the connection is opened outside the lock
+                    self._size += 1
+                    return None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.metrics.record_timeout()
+                    raise PoolTimeout(f"no connection available within {timeout}s")
+                self._cond.wait(remaining)
+        finally:
+            self.metrics.waiters -= 1
+
+    def getconn(self, timeout: Optional[float] = None):
+        """
+        Check a connection out of the pool, waiting up to timeout seconds for one to be returned
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        start = time.monotonic()
+
+        with self._cond:
+            if self._closed:
+                raise PoolError("connection pool is closed")
+
+            idle = self._wait_for_idle_or_slot(start + timeout, timeout)
+
+            self.metrics.in_use += 1
+            self.metrics.idle = len(self._idle)
+
+        try:
+            conn = None
+            if idle is not None:
+                conn, returned_at = idle
+                if not self._is_usable(conn, returned_at):
+                    if not conn.closed:
+                        conn.close()
+                    conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            self._release_slot()
+            raise
+
+        self.metrics.record_wait(time.monotonic() - start)
+        return conn
+
+    def putconn(self, conn, close: bool = False):
+        """
+        Return a connection to the pool, rolling back any transaction left open
+        """
+        if not conn.closed and not close:
+            try:
+                if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                close = True
+
+        if conn.closed or close or self._closed:
+            if not conn.closed:
+                conn.close()
+            self._release_slot()
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self.metrics.in_use -= 1
+            self.metrics.idle = len(self._idle)
+            self._cond.notify()
+
+    def _release_slot(self):
+        with self._cond:
+            self._size -= 1
+            self.metrics.in_use -= 1
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                if not conn.closed:
+                    conn.close()
+                self._size -= 1
+            self.metrics.idle = 0
+            self._cond.notify_all()
@@ -0,0 +1,62 @@
+import re
+
+from psycopg2.extensions import connection
+
+# %s placeholders become $n parameters, %% is an escaped percent sign
+_PLACEHOLDER = re.compile(r"%([s%])")
+
+
+class PreparingConnection(connection):
+    """
+    psycopg2 connection that remembers which statements were prepared on its
+    server session, so hot queries are parsed and planned once per connection
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # statement name -> number of parameters
+        self.prepared_statements = {}
+
+
+def to_positional(sql: str):
+    """
+    Convert a psycopg2 query using %s placeholders to the $1, $2... form PREPARE expects
+
+    :returns: a (sql, parameter_count) tuple
+    """
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        if match.group(1) == "%":
+            return "%"
+        count += 1
+        return f"${count}"
+
+    return _PLACEHOLDER.sub(replace, sql), count
+
+
+def execute_prepared(cur, name: str, sql: str, params=()):
+    """
+    Run sql through a server-side prepared statement called name, preparing it the first
+    time the connection sees it. Each distinct sql text needs its own name.
+
+    Connections that are not PreparingConnection (prepared statements disabled, test
+    doubles) run the query as a plain execute.
+    """
+    conn = getattr(cur, "connection", None)
+    if not isinstance(conn, PreparingConnection):
+        cur.execute(sql, params)
+        return
+
+    count = conn.prepared_statements.get(name)
+    if count is None:
+        statement, count = to_positional(sql)
+        # PREPARE outlives the transaction, so a later rollback does not forget it
+        cur.execute(f"PREPARE {name} AS {statement}")
+        conn.prepared_statements[name] = count
+
+    if count:
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * count)})", params)
+    else:
+        cur.execute(f"EXECUTE {name}")
@@ -0,0 +1,39 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class RecentWriters:
+    """
+    Remembers which users wrote to the primary in the last few seconds so their
+    reads keep going to the primary until the replica has caught up
+    """
+
+    def __init__(self, stickiness: float = 5.0):
+        self.stickiness = stickiness
+        self._lock = threading.Lock()
+        # user id -> time the stickiness ends, soonest first since stickiness is fixed
+        self._writes: "OrderedDict[str, float]" = OrderedDict()
+
+    def mark(self, user_id):
+        if not user_id:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._writes[user_id] = now + self.stickiness
+            self._writes.move_to_end(user_id)
+            # Drop expired entries from the front so the map stays as small as the write rate
+            while self._writes and next(iter(self._writes.values())) <= now:
+                self._writes.popitem(last=False)
+
+    def wrote_recently(self, user_id) -> bool:
+        if not user_id:
+            return False
+        with self._lock:
+            until = self._writes.get(user_id)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._writes[user_id]
+                return False
+            return True
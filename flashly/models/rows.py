@@ -0,0 +1,68 @@
+from collections import namedtuple
+
+# One row type per query shape, fields named after the selected columns. Rows are still
+# tuples (no per-row __dict__, about the size of the plain ones psycopg2 returns and half
+# that of dicts, see benchmarks/row_memory.py) but read by name, so a query selects only
+# the columns it needs instead of a fixed-length set.
+
+# find_deck_by_id, DeckModel.update_for_owner
+DeckRow = namedtuple(
+    "DeckRow",
+    [
+        "id",
+        "name",
+        "description",
+        "publish_status",
+        "owner_id",
+        "rating",
+        "created_at",
+        "updated_at",
+        "owner",
+        "card_count",
+    ],
+)
+
+# find_explore_decks, find_feed_decks: public decks, no publish_status or owner_id
+DeckSummaryRow = namedtuple(
+    "DeckSummaryRow", ["id", "name", "description", "rating", "created_at", "updated_at", "owner", "card_count"]
+)
+
+# find_decks_by_user_id: the owner's own decks, with their publish_status
+OwnedDeckRow = namedtuple(
+    "OwnedDeckRow",
+    ["id", "name", "description", "publish_status", "rating", "created_at", "updated_at", "owner", "card_count"],
+)
+
+# find_deck_acl: what permission checks and validators need
+DeckAclRow = namedtuple("DeckAclRow", ["owner_id", "publish_status", "updated_at", "name"])
+
+# find_card_by_id, find_cards_by_deck_id and the card write paths
+CardRow = namedtuple(
+    "CardRow",
+    [
+        "id",
+        "front_text",
+        "back_text",
+        "difficulty",
+        "times_reviewed",
+        "success_rate",
+        "deck_id",
+        "created_at",
+        "updated_at",
+    ],
+)
+
+
+def fetchone(cur, row_type):
+    """
+    Fetch the next row of cur as a row_type, or None when there is none left
+    """
+    row = cur.fetchone()
+    return row_type._make(row) if row is not None else None
+
+
+def fetchall(cur, row_type) -> list:
+    """
+    Fetch the remaining rows of cur as row_type instances
+    """
+    return list(map(row_type._make, cur.fetchall()))
@@ -3,16 +3,25 @@ from datetime import datetime
 from typing import Any
 from typing import Dict
 from typing import Optional
-from uuid import UUID
+from typing import Set
 
-import bcrypt
+from flashly.hashing import HASHER
+from flashly.models.base import RowModel
+from flashly.models.prepared import execute_prepared
 
+# Columns of a UserModel, in field order
+USER_COLUMNS = "id, first_name, last_name, username, email, password_hash, created_at, updated_at"
 
-@dataclass
-class UserModel:
+# Parts of a profile that can be requested with get_profile_with_details
+PROFILE_INCLUDES = ("decks", "decks.cards", "decks.categories", "statistics")
+
+
+@dataclass(slots=True)
+class UserModel(RowModel):
     __tablename__ = "users"
 
-    id: UUID
+    # Kept as the str psycopg2 returns, like the ids of the other models
+    id: str
     first_name: str
     last_name: str
     username: str
@@ -21,19 +30,41 @@ class UserModel:
     created_at: datetime
     updated_at: datetime
 
-    def set_password(self, password: str):
-        password_bytes = password.encode("utf-8")
-        salt = bcrypt.gensalt()
-        hashed_password = bcrypt.hashpw(password_bytes, salt)
+    def to_json(self) -> dict:
+        """
+        The user as sent back to clients, without the password hash
+        """
+        return {
+            "id": str(self.id),
+            "firstName": self.first_name,
+            "lastName": self.last_name,
+            "username": self.username,
+            "email": self.email,
+        }
 
-        self.password_hash = hashed_password.decode("utf-8")
+    def set_password(self, password: str):
+        # Hashed in the HASHER worker processes, with the configured cost
+        self.password_hash = HASHER.hash(password)
 
     def check_password(self, password: str) -> bool:
         if self.password_hash is not None:
-            expected_hash = self.password_hash.encode("utf-8")
-            return bcrypt.checkpw(password.encode("utf-8"), expected_hash)
+            return HASHER.check(password, self.password_hash)
         return False
 
+    def needs_rehash(self) -> bool:
+        """
+        Whether the password hash was made with a lower cost than the configured one
+        """
+        return self.password_hash is not None and HASHER.needs_rehash(self.password_hash)
+
+    def update_password(self, db_conn):
+        with db_conn.cursor() as cur:
+            cur.execute(
+                "UPDATE users SET password_hash = %s, updated_at = %s WHERE id = %s",
+                (self.password_hash, datetime.now(), str(self.id)),
+            )
+        db_conn.commit()
+
     def save(self, db_conn):
         with db_conn.cursor() as cur:
             cur.execute(
@@ -52,157 +83,189 @@ class UserModel:
             )
             db_conn.commit()
 
+    @classmethod
+    def find_by_id(cls, db_conn, user_id: str) -> Optional["UserModel"]:
+        with db_conn.cursor() as cur:
+            execute_prepared(cur, "user_by_id", f"SELECT {USER_COLUMNS} FROM users WHERE id = %s", (user_id,))
+            return cls.from_row(cur.fetchone())
+
     @classmethod
     def find_by_email(cls, db_conn, email: str) -> Optional["UserModel"]:
         with db_conn.cursor() as cur:
-            cur.execute(
-                "SELECT id, first_name, last_name, username, email, password_hash, created_at, updated_at FROM users WHERE email = %s",
+            execute_prepared(
+                cur,
+                "user_by_email",
+                f"SELECT {USER_COLUMNS} FROM users WHERE email = %s",
                 (email,),
             )
-            record = cur.fetchone()
-            if record:
-                return cls(
-                    id=UUID(record[0]),
-                    first_name=record[1],
-                    last_name=record[2],
-                    username=record[3],
-                    email=record[4],
-                    password_hash=record[5],
-                    created_at=record[6],
-                    updated_at=record[7],
-                )
-        return None
+            return cls.from_row(cur.fetchone())
 
     @classmethod
     def find_by_username(cls, db_conn, username: str):
         with db_conn.cursor() as cur:
-            cur.execute(
-                "SELECT id, first_name, last_name, username, email, password_hash, created_at, updated_at FROM users WHERE username = %s",
+            execute_prepared(
+                cur,
+                "user_by_username",
+                f"SELECT {USER_COLUMNS} FROM users WHERE username = %s",
                 (username,),
             )
-            record = cur.fetchone()
-            if record:
-                return cls(
-                    id=UUID(record[0]),
-                    first_name=record[1],
-                    last_name=record[2],
-                    username=record[3],
-                    email=record[4],
-                    password_hash=record[5],
-                    created_at=record[6],
-                    updated_at=record[7],
-                )
-        return None
+            return cls.from_row(cur.fetchone())
 
     @classmethod
-    def get_profile_with_details(cls, db_conn, user_id: str) -> Optional[Dict[str, Any]]:
-        with db_conn.cursor() as cur:
-            # Single comprehensive query to get all user profile data
-            cur.execute(
-                """
-                SELECT
-                    u.id, u.first_name, u.last_name, u.username, u.email, u.created_at, u.updated_at,
-                    ud.about_me,
-                    COALESCE(following.following_count, 0) as following_count,
-                    COALESCE(followers.followers_count, 0) as followers_count,
-                    d.id as deck_id, d.name as deck_name, d.description as deck_description,
-                    d.publish_status, d.rating as deck_rating, d.created_at as deck_created_at,
-                    d.updated_at as deck_updated_at,
-                    c.id as card_id, c.front_text, c.back_text, c.difficulty, c.times_reviewed,
-                    c.success_rate as card_success_rate, c.created_at as card_created_at,
-                    c.updated_at as card_updated_at,
-                    cat.id as category_id, cat.name as category_name,
-                    cat.created_at as category_created_at, cat.updated_at as category_updated_at
-                FROM users u
-                LEFT JOIN user_details ud ON u.id = ud.user_id
-                LEFT JOIN (
-                    SELECT follower_id, COUNT(*) as following_count
-                    FROM followers
-                    GROUP BY follower_id
-                ) following ON u.id = following.follower_id
-                LEFT JOIN (
-                    SELECT following_id, COUNT(*) as followers_count
-                    FROM followers
-                    GROUP BY following_id
-                ) followers ON u.id = followers.following_id
-                LEFT JOIN decks d ON u.id = d.owner_id
-                LEFT JOIN cards c ON d.id = c.deck_id
-                LEFT JOIN deck_categories dc ON d.id = dc.deck_id
-                LEFT JOIN categories cat ON dc.category_id = cat.id
-                WHERE u.id = %s
-                ORDER BY d.id, c.id, cat.id
-                """,
-                (user_id,),
-            )
+    def get_profile_with_details(
+        cls, db_conn, user_id: str, include: Optional[Set[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        # Only the parts listed in include are queried, everything is loaded by default
+        if include is None:
+            include = set(PROFILE_INCLUDES)
 
-            results = cur.fetchall()
-
-            if not results or not results[0][0]:  # Check if user exists
-                return None
-
-            # Process the results to build the profile structure
-            user_data = results[0]
-            profile = {
-                "id": user_data[0],
-                "first_name": user_data[1],
-                "last_name": user_data[2],
-                "username": user_data[3],
-                "email": user_data[4],
-                "created_at": user_data[5].isoformat() if user_data[5] else None,
-                "updated_at": user_data[6].isoformat() if user_data[6] else None,
-                "about_me": user_data[7],
-                "following_count": user_data[8],
-                "followers_count": user_data[9],
-                "decks": [],
-            }
-
-            # Group results by deck
-            decks_dict = {}
-            for row in results:
-                deck_id = row[10]  # deck_id
-                if deck_id and deck_id not in decks_dict:
-                    decks_dict[deck_id] = {
-                        "id": deck_id,
-                        "name": row[11],  # deck_name
-                        "description": row[12],  # deck_description
-                        "publish_status": row[13],
-                        "rating": float(row[14]) if row[14] else 0.0,
-                        "created_at": row[15].isoformat() if row[15] else None,
-                        "updated_at": row[16].isoformat() if row[16] else None,
-                        "cards": {},
-                        "categories": {},
-                    }
-
-                if deck_id:
-                    # Add cards
-                    card_id = row[17]  # card_id
-                    if card_id and card_id not in decks_dict[deck_id]["cards"]:
-                        decks_dict[deck_id]["cards"][card_id] = {
-                            "id": card_id,
-                            "front_text": row[18],
-                            "back_text": row[19],
-                            "difficulty": row[20],
-                            "times_reviewed": row[21],
-                            "success_rate": float(row[22]) if row[22] else 0.0,
-                            "created_at": row[23].isoformat() if row[23] else None,
-                            "updated_at": row[24].isoformat() if row[24] else None,
-                        }
-
-                    # Add categories
-                    category_id = row[25]  # category_id
-                    if category_id and category_id not in decks_dict[deck_id]["categories"]:
-                        decks_dict[deck_id]["categories"][category_id] = {
-                            "id": category_id,
-                            "name": row[26],
-                            "created_at": row[27].isoformat() if row[27] else None,
-                            "updated_at": row[28].isoformat() if row[28] else None,
-                        }
-
-            # Convert dictionaries to lists
-            for deck in decks_dict.values():
-                deck["cards"] = list(deck["cards"].values())
-                deck["categories"] = list(deck["categories"].values())
+        with db_conn.cursor() as cur:
+            # Each level (user, decks, cards, categories) is fetched once so the number of rows
+            # grows with the data instead of multiplying decks x cards x categories
+            profile = _load_profile_user(cur, user_id, "statistics" in include)
+            if profile is None or "decks" not in include:
+                return profile
 
+            decks_dict = _load_profile_decks(cur, user_id)
             profile["decks"] = list(decks_dict.values())
+            if not decks_dict:
+                return profile
+
+            # Children are read for the decks fetched above, not by owner again: these are separate
+            # statements, so a deck created in between must not bring in rows without a parent.
+            # psycopg2 sends the ids as a text[], which a prepared uuid[] parameter would refuse
+            if "decks.cards" in include:
+                _load_profile_cards(cur, decks_dict)
+            if "decks.categories" in include:
+                _load_profile_categories(cur, decks_dict)
 
             return profile
+
+
+def _load_profile_user(cur, user_id: str, statistics: bool) -> Optional[Dict[str, Any]]:
+    statement = "profile_user"
+    statistics_columns = ""
+    if statistics:
+        statement = "profile_user_statistics"
+        statistics_columns = """,
+            (SELECT COUNT(*) FROM followers f WHERE f.follower_id = u.id) as following_count,
+            (SELECT COUNT(*) FROM followers f WHERE f.following_id = u.id) as followers_count,
+            (SELECT COUNT(*) FROM decks d WHERE d.owner_id = u.id) as decks_count"""
+
+    execute_prepared(
+        cur,
+        statement,
+        f"""
+        SELECT
+            u.id, u.first_name, u.last_name, u.username, u.email, u.created_at, u.updated_at,
+            ud.about_me{statistics_columns}
+        FROM users u
+        LEFT JOIN user_details ud ON u.id = ud.user_id
+        WHERE u.id = %s
+        """,
+        (user_id,),
+    )
+    user_data = cur.fetchone()
+
+    if not user_data or not user_data[0]:  # Check if user exists
+        return None
+
+    profile = {
+        "id": user_data[0],
+        "first_name": user_data[1],
+        "last_name": user_data[2],
+        "username": user_data[3],
+        "email": user_data[4],
+        "created_at": user_data[5],
+        "updated_at": user_data[6],
+        "about_me": user_data[7],
+    }
+
+    if statistics:
+        profile["following_count"] = user_data[8]
+        profile["followers_count"] = user_data[9]
+        profile["decks_count"] = user_data[10]
+
+    return profile
+
+
+def _load_profile_decks(cur, user_id: str) -> Dict[str, Dict[str, Any]]:
+    execute_prepared(
+        cur,
+        "profile_decks",
+        """
+        SELECT d.id, d.name, d.description, d.publish_status, d.rating, d.created_at, d.updated_at, d.card_count
+        FROM decks d
+        WHERE d.owner_id = %s
+        ORDER BY d.id
+        """,
+        (user_id,),
+    )
+    decks_dict = {}
+    for row in cur.fetchall():
+        decks_dict[row[0]] = {
+            "id": row[0],
+            "name": row[1],
+            "description": row[2],
+            "publish_status": row[3],
+            "rating": row[4] or 0.0,
+            "created_at": row[5],
+            "updated_at": row[6],
+            "card_count": row[7],
+            "cards": [],
+            "categories": [],
+        }
+    return decks_dict
+
+
+def _load_profile_cards(cur, decks_dict: Dict[str, Dict[str, Any]]):
+    execute_prepared(
+        cur,
+        "profile_cards",
+        """
+        SELECT
+            c.deck_id, c.id, c.front_text, c.back_text, c.difficulty, c.times_reviewed,
+            c.success_rate, c.created_at, c.updated_at
+        FROM cards c
+        WHERE c.deck_id = ANY(%s::text[]::uuid[])
+        ORDER BY c.deck_id, c.id
+        """,
+        (list(decks_dict),),
+    )
+    for row in cur.fetchall():
+        decks_dict[row[0]]["cards"].append(
+            {
+                "id": row[1],
+                "front_text": row[2],
+                "back_text": row[3],
+                "difficulty": row[4],
+                "times_reviewed": row[5],
+                "success_rate": row[6] or 0.0,
+                "created_at": row[7],
+                "updated_at": row[8],
+            }
+        )
+
+
+def _load_profile_categories(cur, decks_dict: Dict[str, Dict[str, Any]]):
+    execute_prepared(
+        cur,
+        "profile_categories",
+        """
+        SELECT dc.deck_id, cat.id, cat.name, cat.created_at, cat.updated_at
+        FROM deck_categories dc
+        JOIN categories cat ON dc.category_id = cat.id
+        WHERE dc.deck_id = ANY(%s::text[]::uuid[])
+        ORDER BY dc.deck_id, cat.id
+        """,
+        (list(decks_dict),),
+    )
+    for row in cur.fetchall():
+        decks_dict[row[0]]["categories"].append(
+            {
+                "id": row[1],
+                "name": row[2],
+                "created_at": row[3],
+                "updated_at": row[4],
+            }
+        )
@@ -1,14 +1,16 @@
 from dataclasses import dataclass
 from datetime import datetime
-from uuid import UUID
 
+from flashly.models.base import RowModel
 
-@dataclass
-class UserDetailsModel:
+
+@dataclass(slots=True)
+class UserDetailsModel(RowModel):
     __tablename__ = "user_details"
 
-    id: UUID
-    user_id: UUID
+    # Kept as the str psycopg2 returns, like UserModel.id
+    id: str
+    user_id: str
     about_me: str
     created_at: datetime
     updated_at: datetime
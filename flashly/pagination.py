@@ -0,0 +1,113 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+DEFAULT_PAGE_LIMIT = 20
+MAX_PAGE_LIMIT = 100
+
+
+class InvalidPageError(ValueError):
+    """
+    Raised when a client supplies a limit or cursor that cannot be used
+    """
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+def encode_cursor(values) -> str:
+    """
+    Encode the sort key of the last row of a page into an opaque cursor
+    """
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def parse_decimal(value) -> Decimal:
+    # Ratings are encoded as JSON numbers or, from Decimal, as strings
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"not a number: {value!r}")
+    number = Decimal(str(value))
+    if not number.is_finite():
+        raise ValueError(f"not a finite number: {value!r}")
+    return number
+
+
+def parse_timestamp(value) -> datetime:
+    if not isinstance(value, str):
+        raise ValueError(f"not a timestamp: {value!r}")
+    return datetime.fromisoformat(value)
+
+
+def parse_uuid(value) -> str:
+    # Normalized but kept a str, psycopg2 does not adapt UUID objects
+    if not isinstance(value, str):
+        raise ValueError(f"not a uuid: {value!r}")
+    return str(UUID(value))
+
+
+def decode_cursor(cursor, parsers):
+    """
+    Decode a cursor produced by encode_cursor back into its sort key values
+
+    :param cursor: the opaque cursor sent by the client, or None for the first page
+    :param parsers: one parser per sort key value (parse_decimal, parse_timestamp,
+        parse_uuid), so a tampered cursor is rejected here rather than by the database
+    :returns: a tuple of parsed sort key values, or None when no cursor was given
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise InvalidPageError("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != len(parsers):
+        raise InvalidPageError("Invalid cursor")
+
+    try:
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (ValueError, ArithmeticError):
+        raise InvalidPageError("Invalid cursor")
+
+
+def parse_limit(limit) -> int:
+    """
+    Parse the page size requested by the client, clamped to MAX_PAGE_LIMIT
+    """
+    if limit is None or limit == "":
+        return DEFAULT_PAGE_LIMIT
+
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise InvalidPageError("Invalid limit")
+
+    if limit < 1:
+        raise InvalidPageError("Invalid limit")
+
+    return min(limit, MAX_PAGE_LIMIT)
+
+
+def paginate(rows, limit: int, sort_key):
+    """
+    Split the rows of a keyset query into a page and the cursor of the next page.
+    The query is expected to fetch limit + 1 rows so that the extra row tells us
+    whether another page exists.
+
+    :returns: a (page, next_cursor) tuple, next_cursor is None on the last page
+    """
+    if len(rows) <= limit:
+        return rows, None
+
+    page = rows[:limit]
+    return page, encode_cursor(sort_key(page[-1]))
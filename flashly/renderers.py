@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+import orjson
+
+# Dict keys that are not strings are turned into strings, as json.dumps does
+DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    # NUMERIC columns (ratings, success rates) come back from psycopg2 as Decimal
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    """
+    Encode value as utf-8 JSON. UUIDs, datetimes and dates are encoded natively, in the
+    same form as str() and isoformat(), so the model serializers can hand rows over as
+    they come out of psycopg2.
+    """
+    return orjson.dumps(value, default=_default, option=DUMPS_OPTIONS)
+
+
+class JSONRenderer:
+    """
+    Drop-in replacement of Pyramid's json renderer encoding with orjson
+    """
+
+    def __call__(self, info):
+        def _render(value, system):
+            request = system.get("request")
+            if request is not None:
+                response = request.response
+                if response.content_type == response.default_content_type:
+                    response.content_type = "application/json"
+                    response.charset = "utf-8"
+            return dumps(value)
+
+        return _render
+
+
+def includeme(config):
+    """
+    Register the orjson renderer under the name json, in place of Pyramid's
+    """
+    config.add_renderer("json", JSONRenderer())
@@ -21,6 +21,7 @@ def includeme(config):
     config.add_route("feed", "/api/decks/feed", request_method="GET")
     config.add_route("get_decks", "/api/decks", request_method="GET")
     config.add_route("create_deck", "/api/decks", request_method="POST")
+    config.add_route("export_deck", "/api/decks/{deck_id}/export", request_method="GET")
     config.add_route("get_deck", "/api/decks/{deck_id}", request_method="GET")
     config.add_route("update_deck", "/api/decks/{deck_id}", request_method="PUT")
     config.add_route("delete_deck", "/api/decks/{deck_id}", request_method="DELETE")
@@ -28,10 +29,11 @@ def includeme(config):
     # Card Routes
     config.add_route("get_cards", "/api/decks/{deck_id}/cards", request_method="GET")
     config.add_route("create_card", "/api/decks/{deck_id}/cards", request_method="POST")
+    config.add_route("bulk_create_cards", "/api/decks/{deck_id}/cards/bulk", request_method="POST")
+    config.add_route("import_cards", "/api/decks/{deck_id}/cards/import", request_method="POST")
     config.add_route("get_card", "/api/decks/{deck_id}/cards/{card_id}", request_method="GET")
     config.add_route("update_card", "/api/decks/{deck_id}/cards/{card_id}", request_method="PUT")
     config.add_route("delete_card", "/api/decks/{deck_id}/cards/{card_id}", request_method="DELETE")
 
     # Catch-all route for React SPA (must be last)
     config.add_route("frontend", "/*path")
-
@@ -0,0 +1,221 @@
+from typing import Annotated
+
+import msgspec
+
+from flashly.models.card import VALID_DIFFICULTIES
+from flashly.models.deck import VALID_PUBLISH_STATUSES
+
+# Bodies larger than this many bytes are refused before they are read
+DEFAULT_MAX_BODY_SIZE = 64 * 1024
+
+MIN_PASSWORD_LENGTH = 6
+
+# Largest number of cards accepted by one bulk request
+MAX_BULK_CARDS = 5000
+
+# Bulk card bodies are refused over this many bytes instead of the usual limit, about 1 KiB per card
+MAX_BULK_BODY_SIZE = MAX_BULK_CARDS * 1024
+
+
+class InvalidBody(ValueError):
+    """
+    Raised when a request body is too large, is not JSON or does not match its schema
+    """
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RequestBody(msgspec.Struct, rename="camel"):
+    """
+    Base of the request body schemas, JSON keys are the camelCase field names.
+    Decoding checks the types, __post_init__ then normalizes and validates the values
+    and raises ValueError with the message sent back to the client.
+    """
+
+    def _require(self, *names: str, strip: bool = True):
+        # Absent and empty values are missing, and whitespace-only ones unless strip is False
+        missing = [
+            field.encode_name
+            for field in msgspec.structs.fields(self)
+            if field.name in names and not (getattr(self, field.name).strip() if strip else getattr(self, field.name))
+        ]
+        if missing:
+            raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+
+def _is_email(value: str) -> bool:
+    return "@" in value and "." in value
+
+
+def _strip(value):
+    return value.strip() if value is not None else None
+
+
+class RegisterBody(RequestBody):
+    first_name: str = ""
+    last_name: str = ""
+    username: str = ""
+    email: str = ""
+    password: str = ""
+
+    def __post_init__(self):
+        self._require("first_name", "last_name", "username", "email", "password")
+        self.email = self.email.strip().lower()
+        if not _is_email(self.email):
+            raise ValueError("Invalid email format")
+        if len(self.password) < MIN_PASSWORD_LENGTH:
+            raise ValueError(f"Password must be at least {MIN_PASSWORD_LENGTH} characters long")
+        self.first_name = self.first_name.strip().title()
+        self.last_name = self.last_name.strip().title()
+        self.username = self.username.strip().title()
+
+
+class LoginBody(RequestBody):
+    email: str = ""
+    password: str = ""
+
+    def __post_init__(self):
+        self._require("email", "password")
+        self.email = self.email.strip().lower()
+        # Malformed credentials cannot match a user, no need to hit the database
+        if not _is_email(self.email) or len(self.password) < MIN_PASSWORD_LENGTH:
+            raise ValueError("Invalid credentials")
+
+
+class ChangePasswordBody(RequestBody):
+    current_password: str = ""
+    new_password: str = ""
+
+    def __post_init__(self):
+        self._require("current_password", "new_password", strip=False)
+        if len(self.new_password) < MIN_PASSWORD_LENGTH:
+            raise ValueError(f"New password must be at least {MIN_PASSWORD_LENGTH} characters long")
+
+
+class UpdateUserBody(RequestBody):
+    """
+    Partial profile update, empty values keep the stored ones (except aboutMe)
+    """
+
+    first_name: str | None = None
+    last_name: str | None = None
+    username: str | None = None
+    email: str | None = None
+    about_me: str | None = None
+
+    def __post_init__(self):
+        self.first_name = self.first_name.strip().title() if self.first_name else None
+        self.last_name = self.last_name.strip().title() if self.last_name else None
+        self.username = self.username.strip() if self.username else None
+        self.email = self.email.strip().lower() if self.email else None
+        self.about_me = _strip(self.about_me)
+        if self.email is not None and not _is_email(self.email):
+            raise ValueError("Invalid email format")
+
+
+def _check_publish_status(publish_status):
+    if publish_status is not None and publish_status not in VALID_PUBLISH_STATUSES:
+        raise ValueError(f"Invalid publish status. Must be one of: {', '.join(VALID_PUBLISH_STATUSES)}")
+
+
+class CreateDeckBody(RequestBody):
+    name: str = ""
+    description: str = ""
+    publish_status: str = "private"
+
+    def __post_init__(self):
+        self._require("name", "description")
+        self.name = self.name.strip()
+        self.description = self.description.strip()
+        self.publish_status = self.publish_status.strip()
+        _check_publish_status(self.publish_status)
+
+
+class UpdateDeckBody(RequestBody):
+    """
+    Partial deck update, absent fields (None) keep the stored values
+    """
+
+    name: str | None = None
+    description: str | None = None
+    publish_status: str | None = None
+
+    def __post_init__(self):
+        self.name = _strip(self.name)
+        self.description = _strip(self.description)
+        self.publish_status = _strip(self.publish_status)
+        if self.name == "":
+            raise ValueError("Name cannot be empty")
+        _check_publish_status(self.publish_status)
+
+
+def _check_difficulty(difficulty):
+    if difficulty is not None and difficulty not in VALID_DIFFICULTIES:
+        raise ValueError(f"Invalid difficulty. Must be one of: {', '.join(VALID_DIFFICULTIES)}")
+
+
+class CreateCardBody(RequestBody):
+    front_text: str = ""
+    back_text: str = ""
+    difficulty: str = "easy"
+
+    def __post_init__(self):
+        self._require("front_text", "back_text")
+        self.front_text = self.front_text.strip()
+        self.back_text = self.back_text.strip()
+        self.difficulty = self.difficulty.strip()
+        _check_difficulty(self.difficulty)
+
+
+class UpdateCardBody(RequestBody):
+    """
+    Partial card update, absent or empty fields (None) keep the stored values
+    """
+
+    front_text: str | None = None
+    back_text: str | None = None
+    difficulty: str | None = None
+
+    def __post_init__(self):
+        self.front_text = self.front_text.strip() if self.front_text else None
+        self.back_text = self.back_text.strip() if self.back_text else None
+        self.difficulty = self.difficulty.strip() if self.difficulty else None
+        if self.front_text == "" or self.back_text == "":
+            raise ValueError("Front text and back text cannot be empty")
+        _check_difficulty(self.difficulty)
+
+
+# Cards created by one bulk request, each one decoded and validated like CreateCardBody
+BulkCardsBody = Annotated[list[CreateCardBody], msgspec.Meta(min_length=1, max_length=MAX_BULK_CARDS)]
+
+
+def max_body_size(request) -> int:
+    settings = getattr(request.registry, "settings", None) or {}
+    return int(settings.get("request.max_body_size") or DEFAULT_MAX_BODY_SIZE)
+
+
+def decode_body(request, schema, max_size: int | None = None):
+    """
+    Decode the JSON body of request straight into an instance of schema, checking the
+    types while parsing. Bodies over max_size bytes (request.max_body_size by default)
+    are refused with a 413 before they are read.
+
+    :raises InvalidBody: with the message and status code to send back
+    """
+    limit = max_size or max_body_size(request)
+    too_large = InvalidBody(f"Request body too large. At most {limit} bytes are accepted", status_code=413)
+    if request.content_length is not None and request.content_length > limit:
+        raise too_large
+    body = request.body
+    # Chunked bodies carry no Content-Length
+    if len(body) > limit:
+        raise too_large
+
+    try:
+        return msgspec.json.decode(body, type=schema)
+    except msgspec.ValidationError as e:
+        raise InvalidBody(str(e))
+    except msgspec.DecodeError:
+        raise InvalidBody("Invalid JSON")
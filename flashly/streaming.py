@@ -0,0 +1,196 @@
+import uuid
+from collections.abc import Iterator
+from itertools import islice
+
+from flashly.renderers import dumps
+
+# Rows fetched from a server-side cursor per round trip
+STREAM_BATCH_SIZE = 1000
+
+# Encoded bytes gathered before a chunk is handed to the WSGI server
+STREAM_FLUSH_SIZE = 64 * 1024
+
+# Items of a streamed array encoded together by a single dumps call
+STREAM_ENCODE_BATCH = 256
+
+# Where close_with_body keeps the sources of a request's streamed body, in its WSGI environ
+STREAM_SOURCES_KEY = "flashly.stream_sources"
+
+_END = object()
+
+
+class ServerSideRows:
+    """
+    Iterate over the rows of a query through a named (server-side) cursor, so only
+    batch_size rows are held in memory at a time. Rows are row_type instances (see
+    flashly.models.rows) when one is given, plain tuples otherwise.
+
+    The connection is checked out of pool right away, so a busy pool fails before
+    the response starts, and it goes back to the pool on close(). It cannot come
+    from request.db_conn: that one is returned to the pool when the view returns,
+    long before the WSGI server has finished iterating over the response body.
+    Queries the view needs before streaming run on connection instead, so a
+    request never holds two connections of the same pool at once.
+    """
+
+    def __init__(self, pool, sql: str, params=(), batch_size: int = STREAM_BATCH_SIZE, row_type=None):
+        self._pool = pool
+        self._sql = sql
+        self._params = params
+        self._batch_size = batch_size
+        self._row_type = row_type
+        self._conn = pool.getconn()
+
+    @property
+    def connection(self):
+        return self._conn
+
+    def __iter__(self):
+        if self._conn is None:
+            return
+        with self._conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cur:
+            cur.itersize = self._batch_size
+            cur.execute(self._sql, self._params)
+            if self._row_type is None:
+                yield from cur
+            else:
+                yield from map(self._row_type._make, cur)
+
+    def close(self):
+        if self._conn is not None:
+            # putconn rolls back the transaction the named cursor was opened in
+            self._pool.putconn(self._conn)
+            self._conn = None
+
+
+def encode_chunks(parts, flush_size: int = STREAM_FLUSH_SIZE):
+    """
+    Join the encoded parts into chunks of roughly flush_size bytes, str parts are
+    encoded to utf-8 first
+    """
+    buffer = []
+    size = 0
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        buffer.append(part)
+        size += len(part)
+        if size >= flush_size:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+class StreamingBody:
+    """
+    WSGI app_iter over chunks that closes its sources when the server is done with
+    it, including when the client went away before the body was ever iterated
+    """
+
+    def __init__(self, chunks, *sources):
+        self._chunks = chunks
+        self._sources = sources
+
+    def __iter__(self):
+        return iter(self._chunks)
+
+    def close(self):
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+        for source in self._sources:
+            source.close()
+
+
+def close_with_body(request, source):
+    """
+    Have the json_stream renderer close source (ServerSideRows...) once the WSGI server is
+    done with the body it renders for request. Views returning a response of their own
+    instead close source themselves.
+    """
+    request.environ.setdefault(STREAM_SOURCES_KEY, []).append(source)
+
+
+def _is_stream(value) -> bool:
+    return isinstance(value, Iterator)
+
+
+def _has_stream(value) -> bool:
+    return _is_stream(value) or (isinstance(value, dict) and any(_is_stream(item) for item in value.values()))
+
+
+def iter_json(value):
+    """
+    Encode value as utf-8 JSON in parts. Iterators (generators, map objects...) are
+    encoded as arrays a batch of items at a time, dicts holding an iterator are walked
+    key by key, and everything else is encoded in one go with dumps. The items of an
+    iterator are expected to share a shape: they are only walked when the first one
+    holds an iterator itself.
+    """
+    if _is_stream(value):
+        first = next(value, _END)
+        if first is _END:
+            yield b"[]"
+        elif _has_stream(first):
+            # The items hold iterators of their own, walk each of them
+            yield b"["
+            yield from iter_json(first)
+            for item in value:
+                yield b","
+                yield from iter_json(item)
+            yield b"]"
+        else:
+            # Plain items, one dumps call per batch is much cheaper than one per item
+            yield b"[" + dumps(first)
+            while True:
+                batch = list(islice(value, STREAM_ENCODE_BATCH))
+                if not batch:
+                    break
+                # Strip the brackets of the batch so its items join the surrounding array
+                yield b"," + dumps(batch)[1:-1]
+            yield b"]"
+    elif isinstance(value, dict) and _has_stream(value):
+        separator = b"{"
+        for key, item in value.items():
+            yield separator + dumps(str(key)) + b":"
+            yield from iter_json(item)
+            separator = b","
+        yield b"}"
+    else:
+        yield dumps(value)
+
+
+class JSONStreamRenderer:
+    """
+    Renderer producing the same JSON as the json renderer, but encoded incrementally into
+    a streamed app_iter so large lists start flowing before they are fully encoded.
+    Views return their usual envelope with iterators in place of the large lists.
+    """
+
+    def __init__(self, flush_size: int = STREAM_FLUSH_SIZE):
+        self.flush_size = flush_size
+
+    def __call__(self, info):
+        def _render(value, system):
+            request = system.get("request")
+            sources = ()
+            if request is not None:
+                response = request.response
+                if response.content_type == response.default_content_type:
+                    response.content_type = "application/json"
+                    response.charset = "utf-8"
+                sources = request.environ.get(STREAM_SOURCES_KEY, ())
+            return StreamingBody(encode_chunks(iter_json(value), self.flush_size), *sources)
+
+        return _render
+
+
+def includeme(config):
+    """
+    Register the json_stream renderer, flushing every json_stream.flush_size bytes
+    """
+    settings = config.get_settings()
+    flush_size = int(settings.get("json_stream.flush_size") or STREAM_FLUSH_SIZE)
+    config.add_renderer("json_stream", JSONStreamRenderer(flush_size))
@@ -4,8 +4,26 @@ from datetime import datetime
 from pyramid.request import Request
 from pyramid.view import view_config
 
+from flashly.hashing import HASHER, HashingBusy
 from flashly.models.user import UserModel
 from flashly.models.user_details import UserDetailsModel
+from flashly.schemas import InvalidBody, LoginBody, RegisterBody, decode_body
+
+
+def hashing_busy(request: Request):
+    request.response.status = 503
+    request.response.headers["Retry-After"] = "1"
+    return {"error": "Too many sign-in attempts, please try again"}
+
+
+def rehash_password(db_conn, user: UserModel, password: str):
+    # The login succeeds even if the new hash cannot be stored, it is retried next time
+    try:
+        user.set_password(password)
+        user.update_password(db_conn)
+    except Exception as e:
+        db_conn.rollback()
+        print(f"Error rehashing password: {e}")
 
 
 @view_config(
@@ -14,45 +32,18 @@ from flashly.models.user_details import UserDetailsModel
     renderer="json",
 )
 def register(request: Request):
-    # Get JSON request
+    # Decode and validate the JSON request
     try:
-        data = request.json_body
-    except (ValueError, UnicodeDecodeError):
-        request.response.status = 400
-        return {"error": "Invalid JSON"}
-
-    # Validate that all required fields are present
-    required_fields = ["firstName", "lastName", "username", "email", "password"]
-    missing_fields = [field for field in required_fields if field not in data or not data[field].strip()]
-    if missing_fields:
-        request.response.status = 400
-        return {"error": f"Missing required fields: {', '.join(missing_fields)}"}
-
-    # Validate the email has the correct format
-    email = data["email"].strip().lower()
-    if "@" not in email or "." not in email:
-        request.response.status = 400
-        return {"error": "Invalid email format"}
-
-    # Validate the password has the correct format
-    password = data["password"]
-    if len(password) < 6:
-        request.response.status = 400
-        return {"error": "Password must be at least 6 characters long"}
-
-    first_name = data["firstName"].strip().title()
-    last_name = data["lastName"].strip().title()
-    username = data["username"].strip().title()
-
-    # Fetch database connector
-    db_conn = request.db_conn
-
-    # Check if email or username already exists
-    existing_user_email = UserModel.find_by_email(db_conn, email)
-    existing_user_username = UserModel.find_by_username(db_conn, username)
-    if existing_user_email or existing_user_username:
-        request.response.status = 400
-        return {"error": "Email or username already taken"}
+        data = decode_body(request, RegisterBody)
+    except InvalidBody as e:
+        request.response.status = e.status_code
+        return {"error": str(e)}
+
+    email = data.email
+    password = data.password
+    first_name = data.first_name
+    last_name = data.last_name
+    username = data.username
 
     # Create new user
     user = UserModel(
@@ -65,7 +56,24 @@ def register(request: Request):
         created_at=datetime.now(),
         updated_at=datetime.now(),
     )
-    user.set_password(password)  # Set password (this will hash it)
+
+    try:
+        # Take a hashing slot before checking out a database connection, like login, so a burst
+        # waits here instead of holding pooled connections
+        with HASHER.slot():
+            # Fetch database connector
+            db_conn = request.db_conn
+
+            # Check if email or username already exists, before paying for a hash
+            existing_user_email = UserModel.find_by_email(db_conn, email)
+            existing_user_username = UserModel.find_by_username(db_conn, username)
+            if existing_user_email or existing_user_username:
+                request.response.status = 400
+                return {"error": "Email or username already taken"}
+
+            user.set_password(password)
+    except HashingBusy:
+        return hashing_busy(request)
 
     # Create new user details
     user_details = UserDetailsModel(
@@ -82,68 +90,50 @@ def register(request: Request):
 
     return {
         "message": "User registered successfully",
-        "user": {
-            "id": str(user.id),
-            "firstName": user.first_name,
-            "lastName": user.last_name,
-            "username": user.username,
-            "email": user.email,
-        },
+        "user": user.to_json(),
         "token": str(user.id),
     }
 
 
 @view_config(route_name="login", request_method="POST", renderer="json")
 def login(request: Request):
-    # Get JSON request
+    # Decode and validate the JSON request, malformed credentials never hit the DB
+    try:
+        data = decode_body(request, LoginBody)
+    except InvalidBody as e:
+        request.response.status = e.status_code
+        return {"error": str(e)}
+
+    email = data.email
+    password = data.password
+
     try:
-        data = request.json_body
-    except (ValueError, UnicodeDecodeError):
-        request.response.status = 400
-        return {"error": "Invalid JSON"}
-
-    # Validate that all required fields are present
-    required_fields = ["email", "password"]
-    missing_fields = [field for field in required_fields if field not in data or not data[field].strip()]
-    if missing_fields:
-        request.response.status = 400
-        return {"error": f"Missing required fields: {', '.join(missing_fields)}"}
-
-    # Fetch email and validate that is looks correct, if it has wrong format no need to hit DB
-    email = data["email"].strip().lower()
-    if "@" not in email or "." not in email:
-        request.response.status = 400
-        return {"error": "Invalid credentials"}
-
-    # Fetch password and validate that is looks correct, if it has wrong format no need to hit DB
-    password = data["password"]
-    if len(password) < 6:
-        request.response.status = 400
-        return {"error": "Invalid credentials"}
-
-    # Fetch database connector
-    db_conn = request.db_conn
-
-    # Find user by email using the model
-    user = UserModel.find_by_email(db_conn, email)
-    if user is None:
-        request.response.status = 400
-        return {"error": "Invalid credentials"}
-
-    # Check password using the model method
-    if not user.check_password(password):
-        request.response.status = 400
-        return {"error": "Invalid credentials"}
+        # Take a hashing slot before checking out a database connection, so a login burst
+        # waits here instead of holding pooled connections
+        with HASHER.slot():
+            # Fetch database connector
+            db_conn = request.db_conn
+
+            # Find user by email using the model
+            user = UserModel.find_by_email(db_conn, email)
+            if user is None:
+                request.response.status = 400
+                return {"error": "Invalid credentials"}
+
+            # Check password using the model method
+            if not user.check_password(password):
+                request.response.status = 400
+                return {"error": "Invalid credentials"}
+
+            # Bring hashes made with an older cost up to the configured one
+            if user.needs_rehash():
+                rehash_password(db_conn, user, password)
+    except HashingBusy:
+        return hashing_busy(request)
 
     return {
         "message": "Login successful",
-        "user": {
-            "id": str(user.id),
-            "firstName": user.first_name,
-            "lastName": user.last_name,
-            "username": user.username,
-            "email": user.email,
-        },
+        "user": user.to_json(),
         "token": str(user.id),
     }
 
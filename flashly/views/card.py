@@ -1,54 +1,98 @@
 import uuid
-from datetime import datetime
+from typing import Any
+from typing import Dict
 
 from pyramid.request import Request
 from pyramid.view import view_config
 
+from flashly.conditional import is_conditional, not_modified, set_validators
 from flashly.models.deck import DeckModel
-from flashly.models.card import CardModel, serialize_card_data
-
-
-@view_config(route_name="get_cards", request_method="GET", renderer="json")
-def get_cards(request: Request):
-    deck_id = request.matchdict["deck_id"]
-
-    # Fetch database connector
-    db_conn = request.db_conn
-
-    # Verify that the deck exists
-    deck = DeckModel.find_deck_by_id(db_conn, deck_id)
+from flashly.models.card import CardModel, serialize_card_data, serialize_single_card_tuple
+from flashly.models.card_import import CardImportError, import_cards
+from flashly.schemas import (
+    MAX_BULK_BODY_SIZE,
+    BulkCardsBody,
+    CreateCardBody,
+    InvalidBody,
+    UpdateCardBody,
+    decode_body,
+)
+from flashly.streaming import close_with_body
+
+
+def check_deck_read(request: Request, db_conn, deck_id: str):
+    """
+    Check a read of deck_id or its cards. Returns the deck's DeckAclRow, its current version
+    (find_deck_version) to build the validators from, and the error or 304 response to send
+    instead, if any.
+    """
+    # The current version decides 304s and makes the validators, a cached ACL with another one is read again
+    updated_at = DeckModel.find_deck_version(db_conn, deck_id)
+
+    # Verify that the deck exists, reading only what the permission check needs
+    deck = DeckModel.find_deck_acl(db_conn, deck_id, fill_cache=request.db_read_primary, version=updated_at)
     if deck is None:
         request.response.status_code = 404
-        return {
-            "error": "Deck not found",
-        }
+        return deck, updated_at, {"error": "Deck not found"}
 
     # Get token from request (optional for public decks)
     token = request.params.get("token")
 
     # Check if deck is private and user has access
-    deck_publish_status = deck[3]  # publish_status is at index 3
-    deck_owner_id = deck[4]  # owner_id is at index 4
+    deck_owner_id = deck.owner_id
+    deck_publish_status = deck.publish_status
 
     if deck_publish_status == "private":
         if not token or str(deck_owner_id) != token:
             request.response.status_code = 403
-            return {
-                "error": "Access denied. This is a private deck.",
-            }
+            return deck, updated_at, {"error": "Access denied. This is a private deck."}
 
-    # Fetch cards for this deck
-    cards = CardModel.find_cards_by_deck_id(db_conn, deck_id)
-    if cards is None:
-        request.response.status_code = 500
-        return {
-            "error": "Unable to load cards",
-        }
+    # Answer revalidations from the deck's version alone, before reading or serializing anything else
+    if updated_at is not None and is_conditional(request):
+        response = not_modified(request, deck_id, updated_at)
+        if response is not None:
+            return deck, updated_at, response
+
+    return deck, updated_at, None
+
+
+def serialize_counted_cards(rows, deck_info: dict):
+    """
+    Serialize the rows one by one, counting them into deck_info["card_count"]
+    """
+    for row in rows:
+        deck_info["card_count"] += 1
+        yield serialize_single_card_tuple(row)
 
+
+@view_config(route_name="get_cards", request_method="GET", renderer="json_stream")
+def get_cards(request: Request):
+    deck_id = request.matchdict["deck_id"]
+
+    # Cards are read in batches through a server-side cursor while the response is sent. The stream checks
+    # out the only read connection of the request (replica when configured), the deck is checked on it too.
+    rows = CardModel.stream_cards_by_deck_id(request.db_read_pool, deck_id)
+    try:
+        deck, updated_at, response = check_deck_read(request, rows.connection, deck_id)
+    except Exception:
+        rows.close()
+        raise
+    if response is not None:
+        rows.close()
+        return response
+
+    if updated_at is not None:
+        set_validators(request, deck_id, updated_at, public=deck.publish_status == "public")
+
+    # The json_stream renderer gives the connection back once the body is sent
+    close_with_body(request, rows)
+
+    # deck_info is encoded after the cards, by then every card has been counted
+    deck_info = {"id": deck_id, "name": deck.name, "card_count": 0}
     return {
         "message": f"Cards for deck {deck_id} loaded successfully",
-        "cards": serialize_card_data(cards),
-        "deck_info": {"id": str(deck[0]), "name": deck[1], "card_count": len(cards)},
+        "cards": serialize_counted_cards(rows, deck_info),
+        "deck_info": deck_info,
     }
 
 
@@ -56,12 +100,60 @@ def get_cards(request: Request):
 def create_card(request: Request):
     deck_id = request.matchdict["deck_id"]
 
-    # Get JSON request
+    # Decode and validate the JSON request
     try:
-        data = request.json_body
-    except (ValueError, UnicodeDecodeError):
+        data = decode_body(request, CreateCardBody)
+    except InvalidBody as e:
+        request.response.status_code = e.status_code
+        return {"error": str(e)}
+
+    # Get token from request
+    token = request.params.get("token")
+    if not token:
         request.response.status_code = 400
-        return {"error": "Invalid JSON"}
+        return {"error": "Token is required"}
+
+    # Extract data
+    front_text = data.front_text
+    back_text = data.back_text
+    difficulty = data.difficulty
+
+    # Fetch database connector
+    db_conn = request.db_conn
+
+    try:
+        # Ownership check, insert and deck update run as one statement
+        card = CardModel.create_for_owner(db_conn, deck_id, token, str(uuid.uuid4()), front_text, back_text, difficulty)
+    except Exception as e:
+        print(f"Error creating card: {e}")
+        db_conn.rollback()
+        request.response.status_code = 500
+        return {"error": "Failed to create card"}
+
+    if card is None:
+        # Nothing was written, find out why
+        if DeckModel.find_owner_id(db_conn, deck_id) is None:
+            request.response.status_code = 404
+            return {"error": "Deck not found"}
+        request.response.status_code = 403
+        return {"error": "You can only add cards to your own decks"}
+
+    return {
+        "message": "Card successfully created",
+        "card": serialize_card_data(card),
+    }
+
+
+@view_config(route_name="bulk_create_cards", request_method="POST", renderer="json")
+def bulk_create_cards(request: Request):
+    deck_id = request.matchdict["deck_id"]
+
+    # Decode and validate the whole array before touching the database
+    try:
+        data = decode_body(request, BulkCardsBody, max_size=MAX_BULK_BODY_SIZE)
+    except InvalidBody as e:
+        request.response.status_code = e.status_code
+        return {"error": str(e)}
 
     # Get token from request
     token = request.params.get("token")
@@ -69,104 +161,109 @@ def create_card(request: Request):
         request.response.status_code = 400
         return {"error": "Token is required"}
 
+    cards = [(str(uuid.uuid4()), card.front_text, card.back_text, card.difficulty) for card in data]
+
     # Fetch database connector
     db_conn = request.db_conn
 
     # Verify that the deck exists
-    deck = DeckModel.find_deck_by_id(db_conn, deck_id)
+    deck = DeckModel.find_deck_acl(db_conn, deck_id)
     if deck is None:
         request.response.status_code = 404
         return {"error": "Deck not found"}
 
     # Check if the user owns this deck
-    deck_owner_id = deck[4]  # owner_id is at index 4
+    deck_owner_id = deck.owner_id
     if str(deck_owner_id) != token:
         request.response.status_code = 403
         return {"error": "You can only add cards to your own decks"}
 
-    # Validate that all required fields are present
-    required_fields = ["frontText", "backText"]
-    missing_fields = [field for field in required_fields if field not in data or not data[field].strip()]
-    if missing_fields:
-        request.response.status_code = 400
-        return {"error": f"Missing required fields: {', '.join(missing_fields)}"}
-
-    # Extract data
-    front_text = data["frontText"].strip()
-    back_text = data["backText"].strip()
-    difficulty = data.get("difficulty", "easy").strip()
-
-    # Validate difficulty
-    valid_difficulties = ["easy", "medium", "hard"]
-    if difficulty not in valid_difficulties:
-        request.response.status_code = 400
-        return {"error": f"Invalid difficulty. Must be one of: {', '.join(valid_difficulties)}"}
-
     try:
-        # Create new card
-        new_card = CardModel(
-            id=str(uuid.uuid4()),
-            front_text=front_text,
-            back_text=back_text,
-            difficulty=difficulty,
-            times_reviewed=0,
-            success_rate=0.0,
-            deck_id=deck_id,
-            created_at=datetime.now(),
-            updated_at=datetime.now(),
-        )
-        new_card.save(db_conn)
-
-        # Update the deck's updated_at timestamp
-        # First get the deck as a DeckModel instance
-        updated_deck = DeckModel(
-            id=deck[0],
-            name=deck[1],
-            description=deck[2],
-            publish_status=deck[3],
-            owner_id=deck[4],
-            rating=deck[5],
-            created_at=deck[6],
-            updated_at=datetime.now(),
-        )
-        updated_deck.update(db_conn)
+        # Insert every card and update the deck in one statement and one transaction
+        created = CardModel.bulk_create(db_conn, deck_id, cards)
 
         return {
-            "message": "Card successfully created",
-            "card": serialize_card_data(new_card),
+            "message": f"{len(created)} cards successfully created",
+            "cards": serialize_card_data(created),
         }
 
     except Exception as e:
-        print(f"Error creating card: {e}")
+        print(f"Error creating cards: {e}")
+        db_conn.rollback()
         request.response.status_code = 500
-        return {"error": "Failed to create card"}
+        return {"error": "Failed to create cards"}
 
 
-@view_config(route_name="get_card", request_method="GET", renderer="json")
-def get_card(request: Request):
+@view_config(route_name="import_cards", request_method="POST", renderer="json")
+def import_deck_cards(request: Request):
     deck_id = request.matchdict["deck_id"]
-    card_id = request.matchdict["card_id"]
+
+    # Get token from request
+    token = request.params.get("token")
+    if not token:
+        request.response.status_code = 400
+        return {"error": "Token is required"}
 
     # Fetch database connector
     db_conn = request.db_conn
 
     # Verify that the deck exists
-    deck = DeckModel.find_deck_by_id(db_conn, deck_id)
+    deck = DeckModel.find_deck_acl(db_conn, deck_id)
     if deck is None:
         request.response.status_code = 404
         return {"error": "Deck not found"}
 
-    # Get token from request (optional for public decks)
-    token = request.params.get("token")
+    # Check if the user owns this deck
+    deck_owner_id = deck.owner_id
+    if str(deck_owner_id) != token:
+        request.response.status_code = 403
+        return {"error": "You can only add cards to your own decks"}
 
-    # Check if deck is private and user has access
-    deck_publish_status = deck[3]  # publish_status is at index 3
-    deck_owner_id = deck[4]  # owner_id is at index 4
+    # The file is either the raw request body or the "file" field of a multipart form,
+    # either way it is streamed to the database instead of being read into memory
+    upload = request.POST.get("file") if request.content_type == "multipart/form-data" else None
+    if request.content_type == "multipart/form-data" and not hasattr(upload, "file"):
+        request.response.status_code = 400
+        return {"error": "Missing file"}
+    stream = upload.file if upload is not None else request.body_file
+    filename = upload.filename if upload is not None else ""
 
-    if deck_publish_status == "private":
-        if not token or str(deck_owner_id) != token:
-            request.response.status_code = 403
-            return {"error": "Access denied. This is a private deck."}
+    file_format = request.params.get("format")
+    if not file_format:
+        is_tsv = request.content_type == "text/tab-separated-values" or filename.lower().endswith(".tsv")
+        file_format = "tsv" if is_tsv else "csv"
+
+    try:
+        imported = import_cards(db_conn, deck_id, stream, file_format)
+    except CardImportError as e:
+        request.response.status_code = 400
+        error: Dict[str, Any] = {"error": str(e)}
+        if e.rows:
+            error["rows"] = e.rows
+        return error
+    except Exception as e:
+        print(f"Error importing cards: {e}")
+        db_conn.rollback()
+        request.response.status_code = 500
+        return {"error": "Failed to import cards"}
+
+    return {
+        "message": f"{imported} cards successfully imported",
+        "imported": imported,
+    }
+
+
+@view_config(route_name="get_card", request_method="GET", renderer="json")
+def get_card(request: Request):
+    deck_id = request.matchdict["deck_id"]
+    card_id = request.matchdict["card_id"]
+
+    # Fetch read database connector (replica when configured)
+    db_conn = request.db_read
+
+    deck, updated_at, response = check_deck_read(request, db_conn, deck_id)
+    if response is not None:
+        return response
 
     # Find the specific card
     card = CardModel.find_card_by_id(db_conn, card_id)
@@ -175,29 +272,55 @@ def get_card(request: Request):
         return {"error": "Card not found"}
 
     # Verify that the card belongs to the specified deck
-    card_deck_id = str(card[6])  # deck_id is at index 6
+    card_deck_id = str(card.deck_id)
     if card_deck_id != deck_id:
         request.response.status_code = 400
         return {"error": "Card does not belong to the specified deck"}
 
+    if updated_at is not None:
+        set_validators(request, deck_id, updated_at, public=deck.publish_status == "public")
+
     return {
         "message": "Card loaded successfully",
         "card": serialize_card_data(card),
-        "deck_info": {"id": str(deck[0]), "name": deck[1]},
+        "deck_info": {"id": deck_id, "name": deck.name},
     }
 
 
+def card_write_error(request: Request, db_conn, deck_id: str, card_id: str, forbidden: str):
+    """
+    Explain why a card write matched no row. Only runs on the error path, the
+    successful writes never look the deck or the card up beforehand.
+    """
+    owner_id = DeckModel.find_owner_id(db_conn, deck_id)
+    if owner_id is None:
+        request.response.status_code = 404
+        return {"error": "Deck not found"}
+
+    if str(owner_id) != request.params.get("token"):
+        request.response.status_code = 403
+        return {"error": forbidden}
+
+    card_deck_id = CardModel.find_deck_id(db_conn, card_id)
+    if card_deck_id is None:
+        request.response.status_code = 404
+        return {"error": "Card not found"}
+
+    request.response.status_code = 400
+    return {"error": "Card does not belong to the specified deck"}
+
+
 @view_config(route_name="update_card", request_method="PUT", renderer="json")
 def update_card(request: Request):
     deck_id = request.matchdict["deck_id"]
     card_id = request.matchdict["card_id"]
 
-    # Get JSON request
+    # Decode and validate the JSON request (partial updates, None keeps the stored value)
     try:
-        data = request.json_body
-    except (ValueError, UnicodeDecodeError):
-        request.response.status_code = 400
-        return {"error": "Invalid JSON"}
+        data = decode_body(request, UpdateCardBody)
+    except InvalidBody as e:
+        request.response.status_code = e.status_code
+        return {"error": str(e)}
 
     # Get token from request
     token = request.params.get("token")
@@ -205,92 +328,40 @@ def update_card(request: Request):
         request.response.status_code = 400
         return {"error": "Token is required"}
 
+    front_text = data.front_text
+    back_text = data.back_text
+    difficulty = data.difficulty
+
     # Fetch database connector
     db_conn = request.db_conn
 
-    # Verify that the deck exists
-    deck = DeckModel.find_deck_by_id(db_conn, deck_id)
-    if deck is None:
-        request.response.status_code = 404
-        return {"error": "Deck not found"}
-
-    # Check if the user owns this deck
-    deck_owner_id = deck[4]  # owner_id is at index 4
-    if str(deck_owner_id) != token:
-        request.response.status_code = 403
-        return {"error": "You can only modify cards in your own decks"}
-
-    # Find the existing card
-    existing_card = CardModel.find_card_by_id(db_conn, card_id)
-    if existing_card is None:
-        request.response.status_code = 404
-        return {"error": "Card not found"}
-
-    # Verify that the card belongs to the specified deck
-    card_deck_id = str(existing_card[6])  # deck_id is at index 6
-    if card_deck_id != deck_id:
-        request.response.status_code = 400
-        return {"error": "Card does not belong to the specified deck"}
-
-    # Extract and validate data (allow partial updates)
-    front_text = data.get("frontText", existing_card[1]).strip() if data.get("frontText") else existing_card[1]
-    back_text = data.get("backText", existing_card[2]).strip() if data.get("backText") else existing_card[2]
-    difficulty = data.get("difficulty", existing_card[3]).strip() if data.get("difficulty") else existing_card[3]
-
-    # Validate required fields are not empty
-    if not front_text or not back_text:
-        request.response.status_code = 400
-        return {"error": "Front text and back text cannot be empty"}
-
-    # Validate difficulty
-    valid_difficulties = ["easy", "medium", "hard"]
-    if difficulty not in valid_difficulties:
-        request.response.status_code = 400
-        return {"error": f"Invalid difficulty. Must be one of: {', '.join(valid_difficulties)}"}
-
     try:
-        # Create updated card model
-        updated_card = CardModel(
-            id=existing_card[0],  # id
+        # Ownership check, card update and deck update run as one statement
+        card = CardModel.update_for_owner(
+            db_conn,
+            deck_id,
+            card_id,
+            token,
             front_text=front_text,
             back_text=back_text,
             difficulty=difficulty,
-            times_reviewed=existing_card[4],  # keep existing times_reviewed
-            success_rate=existing_card[5],  # keep existing success_rate
-            deck_id=existing_card[6],  # deck_id
-            created_at=existing_card[7],  # keep existing created_at
-            updated_at=datetime.now(),
-        )
-
-        # Save the updated card
-        updated_card.update(db_conn)
-
-        # Update the deck's updated_at timestamp
-        updated_deck = DeckModel(
-            id=deck[0],
-            name=deck[1],
-            description=deck[2],
-            publish_status=deck[3],
-            owner_id=deck[4],
-            rating=deck[5],
-            created_at=deck[6],
-            updated_at=datetime.now(),
         )
-        updated_deck.update(db_conn)
-
-        # Fetch the updated card to return complete data
-        updated_card_data = CardModel.find_card_by_id(db_conn, card_id)
-
-        return {
-            "message": "Card updated successfully",
-            "card": serialize_card_data(updated_card_data),
-        }
     except Exception as e:
         print(f"Error updating card: {e}")
+        db_conn.rollback()
         request.response.status_code = 500
         return {"error": "Failed to update card"}
 
+    if card is None:
+        return card_write_error(request, db_conn, deck_id, card_id, "You can only modify cards in your own decks")
 
+    return {
+        "message": "Card updated successfully",
+        "card": serialize_card_data(card),
+    }
+
+
+@view_config(route_name="delete_card", request_method="DELETE", renderer="json")
 def delete_card(request: Request):
     deck_id = request.matchdict["deck_id"]
     card_id = request.matchdict["card_id"]
@@ -304,63 +375,16 @@ def delete_card(request: Request):
     # Fetch database connector
     db_conn = request.db_conn
 
-    # Verify that the deck exists
-    deck = DeckModel.find_deck_by_id(db_conn, deck_id)
-    if deck is None:
-        request.response.status_code = 404
-        return {"error": "Deck not found"}
-
-    # Check if the user owns this deck
-    deck_owner_id = deck[4]  # owner_id is at index 4
-    if str(deck_owner_id) != token:
-        request.response.status_code = 403
-        return {"error": "You can only delete cards from your own decks"}
-
-    # Find the existing card
-    existing_card = CardModel.find_card_by_id(db_conn, card_id)
-    if existing_card is None:
-        request.response.status_code = 404
-        return {"error": "Card not found"}
-
-    # Verify that the card belongs to the specified deck
-    card_deck_id = str(existing_card[6])  # deck_id is at index 6
-    if card_deck_id != deck_id:
-        request.response.status_code = 400
-        return {"error": "Card does not belong to the specified deck"}
-
     try:
-        # Create CardModel instance for deletion
-        card_to_delete = CardModel(
-            id=existing_card[0],  # id
-            front_text=existing_card[1],  # front_text
-            back_text=existing_card[2],  # back_text
-            difficulty=existing_card[3],  # difficulty
-            times_reviewed=existing_card[4],  # times_reviewed
-            success_rate=existing_card[5],  # success_rate
-            deck_id=existing_card[6],  # deck_id
-            created_at=existing_card[7],  # created_at
-            updated_at=existing_card[8],  # updated_at
-        )
-
-        # Delete the card
-        card_to_delete.delete(db_conn)
-
-        # Update the deck's updated_at timestamp
-        updated_deck = DeckModel(
-            id=deck[0],
-            name=deck[1],
-            description=deck[2],
-            publish_status=deck[3],
-            owner_id=deck[4],
-            rating=deck[5],
-            created_at=deck[6],
-            updated_at=datetime.now(),
-        )
-        updated_deck.update(db_conn)
-
-        return {"message": "Card successfully deleted"}
-
+        # Ownership check, delete and deck update run as one statement
+        deleted = CardModel.delete_for_owner(db_conn, deck_id, card_id, token)
     except Exception as e:
         print(f"Error deleting card: {e}")
+        db_conn.rollback()
         request.response.status_code = 500
         return {"error": "Failed to delete card"}
+
+    if not deleted:
+        return card_write_error(request, db_conn, deck_id, card_id, "You can only delete cards from your own decks")
+
+    return {"message": "Card successfully deleted"}
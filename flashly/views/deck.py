@@ -1,57 +1,117 @@
+import csv
+import io
 import uuid
 from datetime import datetime
+from decimal import Decimal
 
 from pyramid.request import Request
+from pyramid.response import Response
 from pyramid.view import view_config
 
-from flashly.models.deck import DeckModel, serialize_deck_data
-
-
-@view_config(route_name="explore_decks", request_method="GET", renderer="json")
+from flashly.conditional import is_conditional, not_modified, set_validators
+from flashly.models.card import CardModel, serialize_single_card_tuple
+from flashly.models.deck import DeckModel, serialize_deck_data, serialize_single_deck_tuple
+from flashly.renderers import dumps
+from flashly.schemas import CreateDeckBody, InvalidBody, UpdateDeckBody, decode_body
+from flashly.streaming import StreamingBody, encode_chunks
+from flashly.pagination import (
+    InvalidPageError,
+    decode_cursor,
+    paginate,
+    parse_decimal,
+    parse_limit,
+    parse_timestamp,
+    parse_uuid,
+)
+
+# Columns of a CSV export, the header doubles as a valid import header
+EXPORT_CSV_COLUMNS = [
+    "id",
+    "front_text",
+    "back_text",
+    "difficulty",
+    "times_reviewed",
+    "success_rate",
+    "created_at",
+    "updated_at",
+]
+
+EXPORT_CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Parsers of the sort keys the explore (rating, created_at, id) and feed (created_at, id) cursors carry
+EXPLORE_CURSOR = (parse_decimal, parse_timestamp, parse_uuid)
+FEED_CURSOR = (parse_timestamp, parse_uuid)
+
+
+@view_config(route_name="explore_decks", request_method="GET", renderer="json_stream")
 def explore_decks(request: Request):
-    # Fetch database connector
-    db_conn = request.db_conn
+    # Get pagination parameters from request
+    try:
+        limit = parse_limit(request.params.get("limit"))
+        cursor = decode_cursor(request.params.get("cursor"), EXPLORE_CURSOR)
+    except InvalidPageError as e:
+        request.response.status_code = 400
+        return {"error": str(e)}
+
+    # Fetch read database connector (replica when configured)
+    db_conn = request.db_read
 
-    # Fetch explore feed
-    decks = DeckModel.find_explore_decks(db_conn)
+    # Fetch one extra deck to know if there is a next page
+    decks = DeckModel.find_explore_decks(db_conn, limit=limit + 1, cursor=cursor)
     if decks is None:
         request.response.status_code = 500
         return {
             "error": "Unable to load explore feed",
         }
 
+    # Cursor is built from (rating, created_at, id) of the last deck
+    decks, next_cursor = paginate(decks, limit, lambda deck: (deck.rating, deck.created_at, deck.id))
+
     return {
         "message": "Explore feed loaded successfully",
-        "decks": serialize_deck_data(decks),
+        "decks": (serialize_single_deck_tuple(deck) for deck in decks),
+        "next_cursor": next_cursor,
     }
 
 
-@view_config(route_name="feed", request_method="GET", renderer="json")
+@view_config(route_name="feed", request_method="GET", renderer="json_stream")
 def feed(request: Request):
-    # Fetch database connector
-    db_conn = request.db_conn
+    # Get pagination parameters from request
+    try:
+        limit = parse_limit(request.params.get("limit"))
+        cursor = decode_cursor(request.params.get("cursor"), FEED_CURSOR)
+    except InvalidPageError as e:
+        request.response.status_code = 400
+        return {"error": str(e)}
+
+    # Fetch read database connector (replica when configured)
+    db_conn = request.db_read
 
     # Get token from request
     token = request.params.get("token")
 
-    # Fetch feed of user
-    decks = DeckModel.find_feed_decks(db_conn, token)
+    # Fetch one extra deck of the user's feed to know if there is a next page
+    decks = DeckModel.find_feed_decks(db_conn, token, limit=limit + 1, cursor=cursor)
     if decks is None:
         request.response.status_code = 500
         return {
             "error": "Unable to load user feed",
         }
 
+    # Cursor is built from (created_at, id) of the last deck
+    decks, next_cursor = paginate(decks, limit, lambda deck: (deck.created_at, deck.id))
+
     return {
         "message": "User feed loaded successfully",
-        "decks": serialize_deck_data(decks),
+        "decks": (serialize_single_deck_tuple(deck) for deck in decks),
+        "next_cursor": next_cursor,
     }
 
 
-@view_config(route_name="get_decks", request_method="GET", renderer="json")
+@view_config(route_name="get_decks", request_method="GET", renderer="json_stream")
 def get_decks(request: Request):
-    # Fetch database connector
-    db_conn = request.db_conn
+    # Fetch read database connector (replica when configured)
+    db_conn = request.db_read
 
     # Get token from request
     token = request.params.get("token")
@@ -66,30 +126,23 @@ def get_decks(request: Request):
 
     return {
         "message": "User feed loaded successfully",
-        "decks": serialize_deck_data(decks),
+        "decks": (serialize_single_deck_tuple(deck) for deck in decks),
     }
 
 
 @view_config(route_name="create_deck", request_method="POST", renderer="json")
 def create_deck(request: Request):
-    # Get JSON request
+    # Decode and validate the JSON request
     try:
-        data = request.json_body
-    except (ValueError, UnicodeDecodeError):
-        request.response.status = 400
-        return {"error": "Invalid JSON"}
-
-    # Validate that all required fields are present
-    required_fields = ["name", "description"]
-    missing_fields = [field for field in required_fields if field not in data or not data[field].strip()]
-    if missing_fields:
-        request.response.status = 400
-        return {"error": f"Missing required fields: {', '.join(missing_fields)}"}
+        data = decode_body(request, CreateDeckBody)
+    except InvalidBody as e:
+        request.response.status = e.status_code
+        return {"error": str(e)}
 
     # Extract data
-    name = data["name"].strip()
-    description = data.get("description", "").strip()
-    publish_status = data.get("publishStatus", "private").strip()
+    name = data.name
+    description = data.description
+    publish_status = data.publish_status
 
     # Get token from request
     token = request.params.get("token")
@@ -120,33 +173,125 @@ def create_deck(request: Request):
 def get_deck(request: Request):
     deck_id = request.matchdict["deck_id"]
 
-    # Fetch database connector
-    db_conn = request.db_conn
+    # Fetch read database connector (replica when configured)
+    db_conn = request.db_read
+
+    # The current version decides 304s and makes the validators, a cached deck with another one is read again
+    updated_at = DeckModel.find_deck_version(db_conn, deck_id)
 
-    # Find deck
-    deck = DeckModel.find_deck_by_id(db_conn, deck_id)
+    # Answer revalidations from the deck's version alone, before loading or serializing it
+    if updated_at is not None and is_conditional(request):
+        response = not_modified(request, deck_id, updated_at)
+        if response is not None:
+            return response
+
+    # Find deck, serialized once and then served from the deck cache
+    deck = DeckModel.find_serialized_deck(db_conn, deck_id, fill_cache=request.db_read_primary, version=updated_at)
     if deck is None:
         request.response.status_code = 500
         return {
             "error": "Unable to load deck",
         }
 
+    if updated_at is not None:
+        set_validators(request, deck_id, updated_at, public=deck["publish_status"] == "public")
+
     return {
         "message": "Deck loaded successfully",
-        "deck": serialize_deck_data(deck),
+        "deck": deck,
     }
 
 
+def export_ndjson_lines(rows):
+    for row in rows:
+        yield dumps(serialize_single_card_tuple(row)) + b"\n"
+
+
+def export_csv_value(value):
+    # Cells read the same as the values of the NDJSON export
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def export_csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_CSV_COLUMNS)
+    for row in rows:
+        card = serialize_single_card_tuple(row)
+        writer.writerow([export_csv_value(card[column]) for column in EXPORT_CSV_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_access_error(request: Request, deck):
+    """
+    Error response for an export of deck, None when the requester may export it
+    """
+    if deck is None:
+        request.response.status_code = 404
+        return {"error": "Deck not found"}
+
+    # Get token from request (optional for public decks)
+    token = request.params.get("token")
+
+    # Check if deck is private and user has access
+    if deck.publish_status == "private":
+        if not token or str(deck.owner_id) != token:
+            request.response.status_code = 403
+            return {"error": "Access denied. This is a private deck."}
+    return None
+
+
+@view_config(route_name="export_deck", request_method="GET", renderer="json")
+def export_deck(request: Request):
+    deck_id = request.matchdict["deck_id"]
+
+    export_format = request.params.get("format", "ndjson")
+    if export_format not in EXPORT_CONTENT_TYPES:
+        request.response.status_code = 400
+        return {"error": f"Invalid format. Must be one of: {', '.join(EXPORT_CONTENT_TYPES)}"}
+
+    # Cards are read in batches and sent as they are encoded, so memory does not grow with the deck. The
+    # stream checks out the only read connection of the request (replica when configured) and keeps it
+    # until the response is closed, the deck is checked on it too.
+    rows = CardModel.stream_cards_by_deck_id(request.db_read_pool, deck_id)
+    try:
+        deck = DeckModel.find_deck_acl(rows.connection, deck_id, fill_cache=request.db_read_primary)
+        error = export_access_error(request, deck)
+    except Exception:
+        rows.close()
+        raise
+    if error is not None:
+        rows.close()
+        return error
+
+    lines = export_ndjson_lines(rows) if export_format == "ndjson" else export_csv_lines(rows)
+
+    response = Response(
+        app_iter=StreamingBody(encode_chunks(lines), rows),
+        content_type=EXPORT_CONTENT_TYPES[export_format],
+        charset="utf-8",
+    )
+    response.content_disposition = f'attachment; filename="deck-{deck_id}.{export_format}"'
+    return response
+
+
 @view_config(route_name="update_deck", request_method="PUT", renderer="json")
 def update_deck(request: Request):
     deck_id = request.matchdict["deck_id"]
 
-    # Get JSON request
+    # Decode and validate the JSON request (partial updates, None keeps the stored value)
     try:
-        data = request.json_body
-    except (ValueError, UnicodeDecodeError):
-        request.response.status_code = 400
-        return {"error": "Invalid JSON"}
+        data = decode_body(request, UpdateDeckBody)
+    except InvalidBody as e:
+        request.response.status_code = e.status_code
+        return {"error": str(e)}
 
     # Get token from request
     token = request.params.get("token")
@@ -154,54 +299,25 @@ def update_deck(request: Request):
         request.response.status_code = 400
         return {"error": "Token is required"}
 
+    name = data.name
+    description = data.description
+    publish_status = data.publish_status
+
     # Fetch database connector
     db_conn = request.db_conn
 
-    # Find the existing deck
-    existing_deck_data = DeckModel.find_deck_by_id(db_conn, deck_id)
-    if existing_deck_data is None:
-        request.response.status_code = 404
-        return {"error": "Deck not found"}
-
-    # Check if the user owns this deck
-    if str(existing_deck_data[4]) != token:  # owner_id is at index 4
+    # Ownership check and update run as one statement returning the updated deck
+    updated_deck_data = DeckModel.update_for_owner(
+        db_conn, deck_id, token, name=name, description=description, publish_status=publish_status
+    )
+    if updated_deck_data is None:
+        # Nothing was written, find out why
+        if DeckModel.find_owner_id(db_conn, deck_id) is None:
+            request.response.status_code = 404
+            return {"error": "Deck not found"}
         request.response.status_code = 403
         return {"error": "You can only update your own decks"}
 
-    # Extract and validate data
-    name = data.get("name", existing_deck_data[1]).strip()  # name is at index 1
-    description = data.get("description", existing_deck_data[2]).strip()  # description is at index 2
-    publish_status = data.get("publishStatus", existing_deck_data[3]).strip()  # publish_status is at index 3
-
-    # Validate required fields
-    if not name:
-        request.response.status_code = 400
-        return {"error": "Name cannot be empty"}
-
-    # Validate publish_status
-    valid_statuses = ["private", "public"]
-    if publish_status not in valid_statuses:
-        request.response.status_code = 400
-        return {"error": f"Invalid publish status. Must be one of: {', '.join(valid_statuses)}"}
-
-    # Create updated deck model
-    updated_deck = DeckModel(
-        id=existing_deck_data[0],  # id
-        name=name,
-        description=description,
-        publish_status=publish_status,
-        owner_id=existing_deck_data[4],  # owner_id
-        rating=existing_deck_data[5],  # rating
-        created_at=existing_deck_data[6],  # created_at
-        updated_at=datetime.now(),
-    )
-
-    # Save the updated deck
-    updated_deck.update(db_conn)
-
-    # Fetch the updated deck to return complete data
-    updated_deck_data = DeckModel.find_deck_by_id(db_conn, deck_id)
-
     return {
         "message": "Deck updated successfully",
         "deck": serialize_deck_data(updated_deck_data),
@@ -221,36 +337,22 @@ def delete_deck(request: Request):
     # Fetch database connector
     db_conn = request.db_conn
 
-    # Find the existing deck
-    existing_deck_data = DeckModel.find_deck_by_id(db_conn, deck_id)
-    if existing_deck_data is None:
-        request.response.status_code = 404
-        return {"error": "Deck not found"}
-
-    # Check if the user owns this deck
-    if str(existing_deck_data[4]) != token:  # owner_id is at index 4
-        request.response.status_code = 403
-        return {"error": "You can only delete your own decks"}
-
     try:
-        # Create DeckModel instance for deletion
-        deck_to_delete = DeckModel(
-            id=existing_deck_data[0],  # id
-            name=existing_deck_data[1],  # name
-            description=existing_deck_data[2],  # description
-            publish_status=existing_deck_data[3],  # publish_status
-            owner_id=existing_deck_data[4],  # owner_id
-            rating=existing_deck_data[5],  # rating
-            created_at=existing_deck_data[6],  # created_at
-            updated_at=existing_deck_data[7],  # updated_at
-        )
-
-        # Delete the deck (cards and categories will be deleted automatically due to CASCADE)
-        deck_to_delete.delete(db_conn)
-
-        return {"message": "Deck successfully deleted"}
-
+        # Ownership check and delete run as one statement (cards and categories will be
+        # deleted automatically due to CASCADE)
+        deleted = DeckModel.delete_for_owner(db_conn, deck_id, token)
     except Exception as e:
         print(f"Error deleting deck: {e}")
+        db_conn.rollback()
         request.response.status_code = 500
         return {"error": "Failed to delete deck"}
+
+    if not deleted:
+        # Nothing was deleted, find out why
+        if DeckModel.find_owner_id(db_conn, deck_id) is None:
+            request.response.status_code = 404
+            return {"error": "Deck not found"}
+        request.response.status_code = 403
+        return {"error": "You can only delete your own decks"}
+
+    return {"message": "Deck successfully deleted"}
@@ -1,6 +1,11 @@
 from pyramid.request import Request
 from pyramid.view import view_config
 import datetime
+from typing import Any
+from typing import Dict
+
+from flashly import cache
+from flashly.models.pool import PoolTimeout
 
 
 @view_config(
@@ -9,8 +14,25 @@ import datetime
     renderer="json",
 )
 def status_check(request: Request):
-    return {
+    status: Dict[str, Any] = {
         "status": "running",
         "message": "Backend is healthy",
         "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
     }
+
+    # Live connection pool metrics (in use, idle, waiters, checkout wait histogram)
+    db_pool = (request.registry.settings or {}).get("db_pool")
+    if db_pool is not None:
+        status["db_pool"] = db_pool.metrics.snapshot()
+
+    # Hit/miss/eviction counters of the in-process caches, to size them
+    status["caches"] = cache.snapshot()
+
+    return status
+
+
+@view_config(context=PoolTimeout, renderer="json")
+def pool_timeout(exc: PoolTimeout, request: Request):
+    print(f"Database pool exhausted: {exc}")
+    request.response.status_code = 503
+    return {"error": "Service temporarily unavailable, please try again"}
@@ -1,21 +1,116 @@
 import uuid
 from datetime import datetime
+from typing import Any
+from typing import Dict
+from typing import Optional
 
+import psycopg2.errors
 from pyramid.request import Request
 from pyramid.view import view_config
 
-from flashly.models.user import UserModel
+from flashly.cache import invalidate
+from flashly.hashing import HASHER, HashingBusy
+from flashly.models.deck import DeckModel
+from flashly.models.follower import FollowerModel
+from flashly.models.user import PROFILE_INCLUDES, UserModel
+from flashly.schemas import ChangePasswordBody, InvalidBody, UpdateUserBody, decode_body
 
+# Error reported for each foreign key of followers a follow can violate
+FOLLOW_NOT_FOUND_ERRORS = {
+    "followers_follower_id_fkey": "Current user not found",
+    "followers_following_id_fkey": "User to follow not found",
+}
 
-@view_config(route_name="get_profile", request_method="GET", renderer="json")
+
+def is_uuid(value: str) -> bool:
+    """
+    Tell whether value is a well-formed UUID, the type of every id column
+    """
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_profile_include(request: Request):
+    """
+    Read the parts of the profile requested with ?include= (or ?fields=), for example
+    include=decks,statistics. Nested parts such as decks.cards imply their parent.
+    Returns None when nothing was requested so the whole profile is loaded.
+    """
+    value = request.params.get("include", request.params.get("fields"))
+    if value is None:
+        return None
+
+    include = {part.strip() for part in value.split(",") if part.strip()}
+    invalid = sorted(include - set(PROFILE_INCLUDES))
+    if invalid:
+        raise ValueError(f"Invalid include: {', '.join(invalid)}. Must be any of: {', '.join(PROFILE_INCLUDES)}")
+
+    if include & {"decks.cards", "decks.categories"}:
+        include.add("decks")
+
+    return include
+
+
+def serialize_profile_deck(deck, include):
+    """
+    Build the profile representation of one deck of get_profile_with_details
+    """
+    deck_data = {
+        "id": deck["id"],
+        "name": deck["name"],
+        "description": deck["description"],
+        "publishStatus": deck["publish_status"],
+        "rating": deck["rating"],
+        "createdAt": deck["created_at"],
+        "updatedAt": deck["updated_at"],
+        "cardsCount": deck["card_count"],
+    }
+    if include is None or "decks.cards" in include:
+        deck_data["cards"] = [
+            {
+                "id": card["id"],
+                "frontText": card["front_text"],
+                "backText": card["back_text"],
+                "difficulty": card["difficulty"],
+                "timesReviewed": card["times_reviewed"],
+                "successRate": card["success_rate"],
+                "createdAt": card["created_at"],
+                "updatedAt": card["updated_at"],
+            }
+            for card in deck["cards"]
+        ]
+    if include is None or "decks.categories" in include:
+        deck_data["categories"] = [
+            {
+                "id": category["id"],
+                "name": category["name"],
+                "createdAt": category["created_at"],
+                "updatedAt": category["updated_at"],
+            }
+            for category in deck["categories"]
+        ]
+    return deck_data
+
+
+@view_config(route_name="get_profile", request_method="GET", renderer="json_stream")
 def get_profile(request: Request):
     user_id = request.matchdict["user_id"]
 
-    # Fetch database connector
-    db_conn = request.db_conn
+    # Get the requested parts of the profile
+    try:
+        include = parse_profile_include(request)
+    except ValueError as e:
+        request.response.status_code = 400
+        return {"error": str(e)}
+
+    # Fetch read database connector (replica when configured)
+    db_conn = request.db_read
 
     # Use the model method to get the profile data
-    profile = UserModel.get_profile_with_details(db_conn, user_id)
+    profile = UserModel.get_profile_with_details(db_conn, user_id, include=include)
 
     if profile is None:
         request.response.status_code = 404
@@ -23,7 +118,7 @@ def get_profile(request: Request):
             "error": "User not found",
         }
 
-    return {
+    response: Dict[str, Any] = {
         "message": "Profile loaded successfully",
         "user": {
             "id": profile["id"],
@@ -35,59 +130,54 @@ def get_profile(request: Request):
             "updatedAt": profile["updated_at"],
         },
         "userDetails": {"aboutMe": profile["about_me"]},
-        "decks": [
-            {
-                "id": deck["id"],
-                "name": deck["name"],
-                "description": deck["description"],
-                "publishStatus": deck["publish_status"],
-                "rating": deck["rating"],
-                "createdAt": deck["created_at"],
-                "updatedAt": deck["updated_at"],
-                "cardsCount": len(deck["cards"]),
-                "cards": [
-                    {
-                        "id": card["id"],
-                        "frontText": card["front_text"],
-                        "backText": card["back_text"],
-                        "difficulty": card["difficulty"],
-                        "timesReviewed": card["times_reviewed"],
-                        "successRate": card["success_rate"],
-                        "createdAt": card["created_at"],
-                        "updatedAt": card["updated_at"],
-                    }
-                    for card in deck["cards"]
-                ],
-                "categories": [
-                    {
-                        "id": category["id"],
-                        "name": category["name"],
-                        "createdAt": category["created_at"],
-                        "updatedAt": category["updated_at"],
-                    }
-                    for category in deck["categories"]
-                ],
-            }
-            for deck in profile["decks"]
-        ],
-        "statistics": {
+    }
+
+    if "decks" in profile:
+        # Decks are serialized and encoded one by one while the response is sent
+        response["decks"] = (serialize_profile_deck(deck, include) for deck in profile["decks"])
+
+    if "following_count" in profile:
+        response["statistics"] = {
             "followingCount": profile["following_count"],
             "followersCount": profile["followers_count"],
-            "decksCount": len(profile["decks"]),
-        },
-    }
+            "decksCount": profile["decks_count"],
+        }
+
+    return response
+
+
+def find_user_to_update(db_conn, user_id: str, email: Optional[str]) -> Optional[UserModel]:
+    user = UserModel.find_by_email(db_conn, email) if email else None
+    # Try to find by current user_id for validation
+    return user or UserModel.find_by_id(db_conn, user_id)
+
+
+def taken_by_another_user(db_conn, user: UserModel, user_id: str, data: UpdateUserBody) -> Optional[str]:
+    """
+    Error to report when the new email or username already belongs to another user, else None
+    """
+    if data.email and data.email != user.email:
+        existing_user = UserModel.find_by_email(db_conn, data.email)
+        if existing_user and str(existing_user.id) != user_id:
+            return "Email already taken"
+
+    if data.username and data.username != user.username:
+        existing_user = UserModel.find_by_username(db_conn, data.username)
+        if existing_user and str(existing_user.id) != user_id:
+            return "Username already taken"
+    return None
 
 
 @view_config(route_name="update_user", request_method="PUT", renderer="json")
 def update_user(request: Request):
     user_id = request.matchdict["user_id"]
 
-    # Get JSON request
+    # Decode and validate the JSON request (partial updates, None keeps the stored value)
     try:
-        data = request.json_body
-    except (ValueError, UnicodeDecodeError):
-        request.response.status_code = 400
-        return {"error": "Invalid JSON"}
+        data = decode_body(request, UpdateUserBody)
+    except InvalidBody as e:
+        request.response.status_code = e.status_code
+        return {"error": str(e)}
 
     # Get token from request
     token = request.params.get("token")
@@ -99,54 +189,22 @@ def update_user(request: Request):
     db_conn = request.db_conn
 
     # Find the existing user
-    user = UserModel.find_by_email(db_conn, data.get("email", "")) if data.get("email") else None
+    user = find_user_to_update(db_conn, user_id, data.email)
     if not user:
-        # Try to find by current user_id for validation
-        with db_conn.cursor() as cur:
-            cur.execute(
-                "SELECT id, first_name, last_name, username, email, password_hash, created_at, updated_at FROM users WHERE id = %s",
-                (user_id,),
-            )
-            record = cur.fetchone()
-            if not record:
-                request.response.status_code = 404
-                return {"error": "User not found"}
-
-            user = UserModel(
-                id=uuid.UUID(record[0]),
-                first_name=record[1],
-                last_name=record[2],
-                username=record[3],
-                email=record[4],
-                password_hash=record[5],
-                created_at=record[6],
-                updated_at=record[7],
-            )
+        request.response.status_code = 404
+        return {"error": "User not found"}
 
-    # Extract and validate data (allow partial updates)
-    first_name = data.get("firstName", user.first_name).strip().title() if data.get("firstName") else user.first_name
-    last_name = data.get("lastName", user.last_name).strip().title() if data.get("lastName") else user.last_name
-    username = data.get("username", user.username).strip() if data.get("username") else user.username
-    email = data.get("email", user.email).strip().lower() if data.get("email") else user.email
-    about_me = data.get("aboutMe", "").strip() if "aboutMe" in data else None
+    # Fill in the fields left out of the partial update
+    first_name = data.first_name or user.first_name
+    last_name = data.last_name or user.last_name
+    username = data.username or user.username
+    email = data.email or user.email
+    about_me = data.about_me
 
-    # Validate email format if provided
-    if data.get("email") and ("@" not in email or "." not in email):
+    taken = taken_by_another_user(db_conn, user, user_id, data)
+    if taken:
         request.response.status_code = 400
-        return {"error": "Invalid email format"}
-
-    # Check if email or username already exists (but not for current user)
-    if data.get("email") and data["email"] != user.email:
-        existing_user = UserModel.find_by_email(db_conn, email)
-        if existing_user and str(existing_user.id) != user_id:
-            request.response.status_code = 400
-            return {"error": "Email already taken"}
-
-    if data.get("username") and data["username"] != user.username:
-        existing_user = UserModel.find_by_username(db_conn, username)
-        if existing_user and str(existing_user.id) != user_id:
-            request.response.status_code = 400
-            return {"error": "Username already taken"}
+        return {"error": taken}
 
     try:
         # Update user information
@@ -160,6 +218,9 @@ def update_user(request: Request):
                 (first_name, last_name, username, email, datetime.now(), user_id),
             )
 
+        # Decks are served with their owner's username, their validators must change with it
+        touched_decks = DeckModel.touch_for_owner(db_conn, user_id) if username != user.username else []
+
         # Update user details if aboutMe is provided
         if about_me is not None:
             with db_conn.cursor() as cur:
@@ -171,6 +232,9 @@ def update_user(request: Request):
                     """,
                     (about_me, datetime.now(), user_id),
                 )
+        db_conn.commit()
+        for deck_id in touched_decks:
+            invalidate("deck", deck_id)
 
         return {
             "message": "Profile updated successfully",
@@ -183,9 +247,20 @@ def update_user(request: Request):
             },
         }
 
-    except (ValueError, UnicodeDecodeError):
-        request.response.status_code = 400
-        return {"error": "Invalid JSON"}
+    except Exception as e:
+        print(f"Error updating profile: {e}")
+        request.response.status_code = 500
+        return {"error": "Failed to update profile"}
+
+
+@view_config(route_name="change_password", request_method="PUT", renderer="json")
+def change_password(request: Request):
+    # Decode and validate the JSON request
+    try:
+        data = decode_body(request, ChangePasswordBody)
+    except InvalidBody as e:
+        request.response.status_code = e.status_code
+        return {"error": str(e)}
 
     # Get token from request
     token = request.params.get("token")
@@ -193,67 +268,36 @@ def update_user(request: Request):
         request.response.status_code = 400
         return {"error": "Token is required"}
 
-    # Validate required fields
-    required_fields = ["currentPassword", "newPassword"]
-    missing_fields = [field for field in required_fields if field not in data or not data[field]]
-    if missing_fields:
-        request.response.status_code = 400
-        return {"error": f"Missing required fields: {', '.join(missing_fields)}"}
-
-    current_password = data["currentPassword"]
-    new_password = data["newPassword"]
-
-    # Validate new password
-    if len(new_password) < 6:
-        request.response.status_code = 400
-        return {"error": "New password must be at least 6 characters long"}
-
-    # Fetch database connector
-    db_conn = request.db_conn
-
-    # Find user by ID
-    with db_conn.cursor() as cur:
-        cur.execute(
-            "SELECT id, first_name, last_name, username, email, password_hash, created_at, updated_at FROM users WHERE id = %s",
-            (token,),
-        )
-        record = cur.fetchone()
+    current_password = data.current_password
+    new_password = data.new_password
 
-        if not record:
-            request.response.status_code = 404
-            return {"error": "User not found"}
+    try:
+        # Take a hashing slot before checking out a database connection
+        with HASHER.slot():
+            # Fetch database connector
+            db_conn = request.db_conn
+
+            # Find user by ID
+            user = UserModel.find_by_id(db_conn, token)
+            if not user:
+                request.response.status_code = 404
+                return {"error": "User not found"}
 
-        user = UserModel(
-            id=uuid.UUID(record[0]),
-            first_name=record[1],
-            last_name=record[2],
-            username=record[3],
-            email=record[4],
-            password_hash=record[5],
-            created_at=record[6],
-            updated_at=record[7],
-        )
-
-    # Verify current password
-    if not user.check_password(current_password):
-        request.response.status_code = 400
-        return {"error": "Current password is incorrect"}
+            # Verify current password
+            if not user.check_password(current_password):
+                request.response.status_code = 400
+                return {"error": "Current password is incorrect"}
 
-    # Set new password
-    user.set_password(new_password)
+            # Set new password
+            user.set_password(new_password)
+    except HashingBusy:
+        request.response.status_code = 503
+        request.response.headers["Retry-After"] = "1"
+        return {"error": "Too many password changes in progress, please try again"}
 
     try:
         # Update password in database
-        with db_conn.cursor() as cur:
-            cur.execute(
-                """
-                UPDATE users
-                SET password_hash = %s, updated_at = %s
-                WHERE id = %s
-                """,
-                (user.password_hash, datetime.now(), token),
-            )
-        db_conn.commit()
+        user.update_password(db_conn)
 
         return {"message": "Password changed successfully"}
 
@@ -278,50 +322,36 @@ def follow(request: Request):
         request.response.status_code = 400
         return {"error": "You cannot follow yourself"}
 
+    # Malformed ids cannot match a user
+    if not is_uuid(token):
+        request.response.status_code = 404
+        return {"error": "Current user not found"}
+    if not is_uuid(user_to_follow_id):
+        request.response.status_code = 404
+        return {"error": "User to follow not found"}
+
     # Fetch database connector
     db_conn = request.db_conn
 
-    # Verify both users exist
-    with db_conn.cursor() as cur:
-        cur.execute("SELECT id FROM users WHERE id = %s", (token,))
-        if not cur.fetchone():
-            request.response.status_code = 404
-            return {"error": "Current user not found"}
-
-        cur.execute("SELECT id FROM users WHERE id = %s", (user_to_follow_id,))
-        if not cur.fetchone():
-            request.response.status_code = 404
-            return {"error": "User to follow not found"}
-
-    # Check if already following
-    with db_conn.cursor() as cur:
-        cur.execute(
-            "SELECT id FROM followers WHERE follower_id = %s AND following_id = %s",
-            (token, user_to_follow_id),
-        )
-        if cur.fetchone():
-            request.response.status_code = 400
-            return {"error": "Already following this user"}
-
     try:
-        # Create follow relationship
-        with db_conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO followers (id, follower_id, following_id, created_at)
-                VALUES (%s, %s, %s, %s)
-                """,
-                (str(uuid.uuid4()), token, user_to_follow_id, datetime.now()),
-            )
-        db_conn.commit()
-
-        return {"message": "Successfully followed user"}
-
+        # Both users are checked by the foreign keys and duplicates by the unique constraint
+        created = FollowerModel.follow(db_conn, token, user_to_follow_id)
+    except psycopg2.errors.ForeignKeyViolation as e:
+        db_conn.rollback()
+        request.response.status_code = 404
+        return {"error": FOLLOW_NOT_FOUND_ERRORS.get(e.diag.constraint_name, "User not found")}
     except Exception as e:
         print(f"Error following user: {e}")
+        db_conn.rollback()
         request.response.status_code = 500
         return {"error": "Failed to follow user"}
 
+    if not created:
+        request.response.status_code = 400
+        return {"error": "Already following this user"}
+
+    return {"message": "Successfully followed user"}
+
 
 @view_config(route_name="unfollow", request_method="DELETE", renderer="json")
 def unfollow(request: Request):
@@ -336,41 +366,28 @@ def unfollow(request: Request):
     # Fetch database connector
     db_conn = request.db_conn
 
-    # Check if following relationship exists
-    with db_conn.cursor() as cur:
-        cur.execute(
-            "SELECT id FROM followers WHERE follower_id = %s AND following_id = %s",
-            (token, user_to_unfollow_id),
-        )
-        follow_record = cur.fetchone()
-
-        if not follow_record:
-            request.response.status_code = 404
-            return {"error": "Not following this user"}
-
     try:
-        # Remove follow relationship
-        with db_conn.cursor() as cur:
-            cur.execute(
-                "DELETE FROM followers WHERE follower_id = %s AND following_id = %s",
-                (token, user_to_unfollow_id),
-            )
-        db_conn.commit()
-
-        return {"message": "Successfully unfollowed user"}
-
+        # Delete and existence check in one statement
+        deleted = FollowerModel.unfollow(db_conn, token, user_to_unfollow_id)
     except Exception as e:
         print(f"Error unfollowing user: {e}")
+        db_conn.rollback()
         request.response.status_code = 500
         return {"error": "Failed to unfollow user"}
 
+    if not deleted:
+        request.response.status_code = 404
+        return {"error": "Not following this user"}
+
+    return {"message": "Successfully unfollowed user"}
+
 
 @view_config(route_name="get_followers", request_method="GET", renderer="json")
 def get_followers(request: Request):
     user_id = request.matchdict["user_id"]
 
-    # Fetch database connector
-    db_conn = request.db_conn
+    # Fetch read database connector (replica when configured)
+    db_conn = request.db_read
 
     # Verify user exists
     with db_conn.cursor() as cur:
@@ -422,8 +439,8 @@ def get_followers(request: Request):
 def get_following(request: Request):
     user_id = request.matchdict["user_id"]
 
-    # Fetch database connector
-    db_conn = request.db_conn
+    # Fetch read database connector (replica when configured)
+    db_conn = request.db_read
 
     # Verify user exists
     with db_conn.cursor() as cur:
@@ -0,0 +1,3 @@
+CREATE INDEX idx_decks_public_explore
+    ON decks (rating DESC, created_at DESC, id DESC)
+    WHERE publish_status = 'public';
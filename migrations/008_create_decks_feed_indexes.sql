@@ -0,0 +1,9 @@
+-- followers(follower_id, following_id) is already covered by the index behind
+-- the UNIQUE(follower_id, following_id) constraint of 002_create_user_followers.
+CREATE INDEX idx_decks_public_owner_created
+    ON decks (owner_id, created_at DESC, id DESC)
+    WHERE publish_status = 'public';
+
+CREATE INDEX idx_decks_public_created
+    ON decks (created_at DESC, id DESC)
+    WHERE publish_status = 'public';
@@ -0,0 +1,12 @@
+ALTER TABLE decks ADD COLUMN card_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE decks d
+SET card_count = c.total
+FROM (
+    SELECT deck_id, COUNT(*) AS total
+    FROM cards
+    GROUP BY deck_id
+) c
+WHERE d.id = c.deck_id;
+
+ALTER TABLE decks ADD CONSTRAINT decks_card_count_check CHECK (card_count >= 0);
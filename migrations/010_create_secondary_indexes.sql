@@ -0,0 +1,16 @@
+-- decks.owner_id, in the order of find_decks_by_user_id
+CREATE INDEX CONCURRENTLY idx_decks_owner_created ON decks (owner_id, created_at DESC);
+
+-- cards.deck_id, in the order of find_cards_by_deck_id
+CREATE INDEX CONCURRENTLY idx_cards_deck_created ON cards (deck_id, created_at);
+
+-- followers.following_id for the followers list, follower_id for the following list
+CREATE INDEX CONCURRENTLY idx_followers_following_created ON followers (following_id, created_at DESC);
+CREATE INDEX CONCURRENTLY idx_followers_follower_created ON followers (follower_id, created_at DESC);
+
+-- deck_categories.category_id (deck_id is the leading column of the primary key)
+CREATE INDEX CONCURRENTLY idx_deck_categories_category ON deck_categories (category_id);
+
+-- decks.publish_status only has two values, lookups on it go through the partial
+-- indexes on public decks (idx_decks_public_explore, idx_decks_public_owner_created,
+-- idx_decks_public_created) rather than a standalone index.
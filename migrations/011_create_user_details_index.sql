@@ -0,0 +1,2 @@
+-- user_details is looked up by user_id when loading a profile
+CREATE INDEX CONCURRENTLY idx_user_details_user ON user_details (user_id);
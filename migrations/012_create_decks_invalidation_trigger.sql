@@ -0,0 +1,15 @@
+-- Publish deck:<id> on the flashly_invalidate channel whenever a deck row changes.
+-- Every write path that touches a deck (including card writes, which keep card_count
+-- and updated_at in step) goes through here, and the notification is only delivered
+-- once the transaction commits. Each worker's listener then evicts the deck from its
+-- in-process caches.
+CREATE FUNCTION notify_deck_invalidation() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('flashly_invalidate', 'deck:' || COALESCE(NEW.id, OLD.id));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER decks_notify_invalidation
+AFTER UPDATE OR DELETE ON decks
+FOR EACH ROW EXECUTE FUNCTION notify_deck_invalidation();
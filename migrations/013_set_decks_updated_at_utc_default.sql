@@ -0,0 +1,3 @@
+-- decks.updated_at is a timestamp without time zone that Last-Modified reads as UTC. The write paths
+-- set it to timezone('UTC', now()), so it must not depend on the TimeZone of the session inserting a deck.
+ALTER TABLE decks ALTER COLUMN updated_at SET DEFAULT timezone('UTC', now());
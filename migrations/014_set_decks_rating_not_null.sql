@@ -0,0 +1,5 @@
+-- The explore keyset compares (rating, created_at, id) tuples, which a NULL rating breaks: such decks
+-- sort first and no cursor can page past them. Decks without a rating count as rated 0.
+UPDATE decks SET rating = 0.0 WHERE rating IS NULL;
+
+ALTER TABLE decks ALTER COLUMN rating SET NOT NULL;
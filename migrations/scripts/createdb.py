@@ -12,11 +12,28 @@ def execute_sql_file(filepath, conn):
         sql_content = file.read()
 
     cur = conn.cursor()
-    cur.execute(sql_content)
-    conn.commit()
+    if 'CONCURRENTLY' in sql_content:
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block,
+        # so these migrations are executed statement by statement in autocommit
+        conn.commit()
+        conn.autocommit = True
+        try:
+            for statement in split_sql_statements(sql_content):
+                cur.execute(statement)
+        finally:
+            conn.autocommit = False
+    else:
+        cur.execute(sql_content)
+        conn.commit()
     print(f"Executed: {filepath}")
 
 
+def split_sql_statements(sql_content):
+    lines = [line for line in sql_content.splitlines() if not line.strip().startswith('--')]
+    statements = '\n'.join(lines).split(';')
+    return [statement.strip() for statement in statements if statement.strip()]
+
+
 def execute_all_migrations():
     # Get all SQL files in the migrations folder
     sql_files = glob.glob('./migrations/*.sql')
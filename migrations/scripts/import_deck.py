@@ -0,0 +1,62 @@
+"""
+Import a CSV/TSV file of cards into an existing deck.
+
+The file needs a header row with front/back columns (frontText, backText or
+front_text, back_text) and an optional difficulty column. It is streamed to
+Postgres with COPY, so files with millions of rows import with flat memory.
+
+    python migrations/scripts/import_deck.py {deck_id} cards.csv
+    python migrations/scripts/import_deck.py {deck_id} cards.tsv --format tsv
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+from psycopg2 import connect
+
+from flashly.models.card_import import CardImportError, import_cards
+
+load_dotenv()
+
+
+def run_import():
+    parser = argparse.ArgumentParser(description="Import cards into a deck from a CSV/TSV file")
+    parser.add_argument("deck_id")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "tsv"], help="defaults to the file extension")
+    args = parser.parse_args()
+
+    file_format = args.format or ("tsv" if args.path.lower().endswith(".tsv") else "csv")
+
+    conn = connect(
+        f"dbname={os.getenv('DB_NAME')} "
+        f"user={os.getenv('DB_USER')} "
+        f"password={os.getenv('DB_PASSWORD')} "
+        f"host={os.getenv('DB_HOST')}"
+    )
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM decks WHERE id = %s", (args.deck_id,))
+            if cur.fetchone() is None:
+                print(f"Deck {args.deck_id} not found")
+                return 1
+
+        start = time.perf_counter()
+        with open(args.path, "rb") as stream:
+            imported = import_cards(conn, args.deck_id, stream, file_format)
+        print(f"Imported {imported} cards in {time.perf_counter() - start:.2f}s")
+        return 0
+    except CardImportError as e:
+        print(f"Import failed: {e}")
+        for row in e.rows:
+            print(f"  row {row['row']}: {row['error']}")
+        return 1
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(run_import())
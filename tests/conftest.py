@@ -1,9 +1,17 @@
+import glob
+import importlib.util
+import json
+import os
 import pytest
 import uuid
 from datetime import datetime
-from unittest.mock import Mock
+
+import psycopg2
+from psycopg2.extensions import connection as PgConnection, cursor as PgCursor
+from unittest.mock import MagicMock, Mock
 from pyramid.config import Configurator
 from pyramid.testing import DummyRequest
+from webob.etag import NoETag
 
 from flashly.models.user import UserModel
 from flashly.models.card import CardModel
@@ -12,6 +20,104 @@ from flashly.models.user_details import UserDetailsModel
 from flashly.models.category import CategoryModel
 from flashly.models.follower import FollowerModel
 from flashly.models.deck_category import DeckCategoryModel
+from flashly.streaming import iter_json
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RecordingCursor(PgCursor):
+    """Cursor that records every statement it sends on its connection."""
+
+    def execute(self, query, vars=None):
+        self.connection.statements.append(query)
+        return super().execute(query, vars)
+
+
+class RecordingConnection(PgConnection):
+    """
+    Connection that records the statements it runs and counts commits without
+    committing, so write paths can be exercised and then rolled back.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursor_factory = RecordingCursor
+        self.statements = []
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+def _load_createdb():
+    """Load the migration runner from migrations/scripts, which is not a package."""
+    path = os.path.join(ROOT_DIR, "migrations", "scripts", "createdb.py")
+    spec = importlib.util.spec_from_file_location("createdb", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _migrate_database(dsn):
+    """Drop everything in the database behind dsn and run all migrations from scratch."""
+    createdb = _load_createdb()
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DROP SCHEMA public CASCADE")
+            cur.execute("CREATE SCHEMA public")
+        conn.commit()
+
+        for sql_file in sorted(glob.glob(os.path.join(ROOT_DIR, "migrations", "*.sql"))):
+            createdb.execute_sql_file(sql_file, conn)
+    finally:
+        conn.close()
+
+
+@pytest.fixture(scope="session")
+def pg_dsn():
+    """
+    Connection string of a disposable local Postgres database, migrated from scratch.
+    Tests depending on it are skipped unless TEST_DATABASE_URL is set.
+    """
+    dsn = os.getenv("TEST_DATABASE_URL")
+    if not dsn:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    _migrate_database(dsn)
+    return dsn
+
+
+@pytest.fixture(scope="session")
+def pg_replica_dsn(pg_dsn):
+    """
+    Connection string of a second local Postgres database standing in for the read replica.
+    Tests depending on it are skipped unless TEST_REPLICA_DATABASE_URL is set.
+    """
+    dsn = os.getenv("TEST_REPLICA_DATABASE_URL")
+    if not dsn:
+        pytest.skip("TEST_REPLICA_DATABASE_URL is not set")
+
+    _migrate_database(dsn)
+    return dsn
+
+
+@pytest.fixture
+def pg_conn(pg_dsn):
+    """Connection to the local Postgres test database, rolled back after the test."""
+    conn = psycopg2.connect(pg_dsn)
+    yield conn
+    conn.rollback()
+    conn.close()
+
+
+@pytest.fixture
+def recording_conn(pg_dsn):
+    """Recording connection to the local Postgres test database, rolled back after the test."""
+    conn = psycopg2.connect(pg_dsn, connection_factory=RecordingConnection)
+    yield conn
+    conn.rollback()
+    conn.close()
 
 
 @pytest.fixture
@@ -108,14 +214,33 @@ def sample_deck_category():
     return DeckCategoryModel(deck_id=uuid.uuid4(), category_id=uuid.uuid4())
 
 
+class JSONDummyRequest(DummyRequest):
+    """DummyRequest whose json_body is sent as the raw body, which is what the views decode."""
+
+    @property
+    def json_body(self):
+        return json.loads(self.body)
+
+    @json_body.setter
+    def json_body(self, value):
+        self.body = json.dumps(value).encode("utf-8")
+
+
 @pytest.fixture
 def mock_request():
     """Create a mock Pyramid request for testing views."""
-    request = DummyRequest()
+    request = JSONDummyRequest()
     request.db_conn = Mock()
+    request.db_read = request.db_conn
+    # Streams check their connection out of it, the cursors of that connection yield no rows by default
+    request.db_read_pool = MagicMock()
+    request.db_read_primary = True
     request.json_body = {}
     request.params = {}
     request.matchdict = {}
+    # No conditional request headers
+    request.if_none_match = NoETag
+    request.if_modified_since = None
 
     # Set up response mock with status attributes
     mock_response = Mock()
@@ -126,6 +251,16 @@ def mock_request():
     return request
 
 
+@pytest.fixture
+def render_json():
+    """Render a view result the way the json_stream renderer sends it, and parse it back."""
+
+    def render(result):
+        return json.loads(b"".join(iter_json(result)))
+
+    return render
+
+
 @pytest.fixture
 def pyramid_config():
     """Create a Pyramid configuration for testing."""
@@ -1,8 +1,9 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock, patch
 
-from flashly.models.card import CardModel
+from flashly.models.card import CardModel, serialize_single_card_tuple
+from flashly.models.rows import CardRow
 
 
 class TestCardModel:
@@ -20,52 +21,6 @@ class TestCardModel:
         assert isinstance(sample_card.created_at, datetime)
         assert isinstance(sample_card.updated_at, datetime)
 
-    def test_save_card(self, sample_card, mock_db_conn):
-        """Test saving a card to database."""
-        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
-
-        sample_card.save(mock_db_conn)
-
-        # Verify that execute was called with correct SQL
-        mock_cursor.execute.assert_called_once()
-        args = mock_cursor.execute.call_args[0]
-        assert "INSERT INTO cards" in args[0]
-        assert sample_card.id in args[1]
-        assert sample_card.front_text in args[1]
-        assert sample_card.back_text in args[1]
-        assert sample_card.difficulty in args[1]
-        assert sample_card.times_reviewed in args[1]
-        assert sample_card.success_rate in args[1]
-        assert sample_card.deck_id in args[1]
-
-        # Verify commit was called
-        mock_db_conn.commit.assert_called_once()
-
-    def test_update_card(self, sample_card, mock_db_conn):
-        """Test updating a card in database."""
-        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
-
-        sample_card.update(mock_db_conn)
-
-        # Verify that execute was called with UPDATE SQL
-        mock_cursor.execute.assert_called_once()
-        args = mock_cursor.execute.call_args[0]
-        assert "UPDATE cards" in args[0]
-        mock_db_conn.commit.assert_called_once()
-
-    def test_delete_card(self, sample_card, mock_db_conn):
-        """Test deleting a card from database."""
-        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
-
-        sample_card.delete(mock_db_conn)
-
-        # Verify that execute was called with DELETE SQL
-        mock_cursor.execute.assert_called_once()
-        args = mock_cursor.execute.call_args[0]
-        assert "DELETE FROM cards" in args[0]
-        assert sample_card.id in args[1]
-        mock_db_conn.commit.assert_called_once()
-
     @patch("flashly.models.card.CardModel.find_cards_by_deck_id")
     def test_find_cards_by_deck_id(self, mock_find):
         """Test finding cards by deck ID."""
@@ -128,3 +83,151 @@ class TestCardModel:
     def test_tablename_attribute(self):
         """Test that __tablename__ is set correctly."""
         assert CardModel.__tablename__ == "cards"
+
+    def test_from_rows_and_to_json(self):
+        """Test card rows map onto slotted models and back to the serialized card."""
+        now = datetime.now()
+        rows = [
+            CardRow(uuid.uuid4(), "Q1", "A1", "easy", 0, 0.0, uuid.uuid4(), now, now),
+            CardRow(uuid.uuid4(), "Q2", "A2", "hard", 3, 0.5, uuid.uuid4(), now, now),
+        ]
+
+        cards = CardModel.from_rows(rows)
+
+        assert [card.front_text for card in cards] == ["Q1", "Q2"]
+        assert [card.to_json() for card in cards] == [serialize_single_card_tuple(row) for row in rows]
+        assert CardModel.from_row(None) is None
+        assert not hasattr(cards[0], "__dict__")
+
+
+class TestCardBulkCreate:
+    """Test cases for CardModel.bulk_create against the local Postgres test database."""
+
+    def seed_deck(self, conn):
+        owner_id, deck_id = str(uuid.uuid4()), str(uuid.uuid4())
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+                VALUES (%s, 'Bulk', 'Owner', %s, %s, 'x')
+                """,
+                (owner_id, f"bulk_{owner_id}", f"bulk_{owner_id}@example.com"),
+            )
+            cur.execute(
+                """
+                INSERT INTO decks (id, name, description, publish_status, owner_id, rating, updated_at)
+                VALUES (%s, 'Bulk deck', '', 'public', %s, 0.0, now() - interval '1 day')
+                """,
+                (deck_id, owner_id),
+            )
+        return deck_id
+
+    def test_bulk_create_inserts_cards_and_touches_deck_once(self, recording_conn):
+        """Test every card is inserted and the deck's card_count and updated_at move in one statement and commit."""
+        deck_id = self.seed_deck(recording_conn)
+        recording_conn.statements.clear()
+        cards = [(str(uuid.uuid4()), f"Front {i}", f"Back {i}", "medium") for i in range(250)]
+
+        created = CardModel.bulk_create(recording_conn, deck_id, cards)
+
+        assert [str(row[0]) for row in created] == [card[0] for card in cards]
+        assert all(str(row[6]) == deck_id and row[3] == "medium" for row in created)
+        assert len(recording_conn.statements) == 1
+        assert recording_conn.commits == 1
+
+        with recording_conn.cursor() as cur:
+            cur.execute(
+                "SELECT card_count, updated_at > timezone('UTC', now()) - interval '1 minute' FROM decks WHERE id = %s",
+                (deck_id,),
+            )
+            assert cur.fetchone() == (250, True)
+            cur.execute("SELECT COUNT(*) FROM cards WHERE deck_id = %s", (deck_id,))
+            assert cur.fetchone() == (250,)
+
+
+class TestCardOwnerWrites:
+    """Test cases for the single statement card write paths against the local Postgres test database."""
+
+    def seed_deck(self, conn):
+        owner_id, deck_id = str(uuid.uuid4()), str(uuid.uuid4())
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+                VALUES (%s, 'Write', 'Owner', %s, %s, 'x')
+                """,
+                (owner_id, f"write_{owner_id}", f"write_{owner_id}@example.com"),
+            )
+            cur.execute(
+                """
+                INSERT INTO decks (id, name, description, publish_status, owner_id, rating, updated_at)
+                VALUES (%s, 'Write deck', '', 'public', %s, 0.0, now() - interval '1 day')
+                """,
+                (deck_id, owner_id),
+            )
+        conn.statements.clear()
+        return owner_id, deck_id
+
+    def deck_state(self, conn, deck_id):
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT card_count, updated_at > timezone('UTC', now()) - interval '1 minute' FROM decks WHERE id = %s",
+                (deck_id,),
+            )
+            return cur.fetchone()
+
+    def test_create_takes_one_statement(self, recording_conn):
+        """Test creating a card checks the owner, inserts it and bumps the deck in one statement and one commit."""
+        owner_id, deck_id = self.seed_deck(recording_conn)
+
+        card_id = str(uuid.uuid4())
+        card = CardModel.create_for_owner(recording_conn, deck_id, owner_id, card_id, "Front", "Back", "hard")
+
+        assert (len(recording_conn.statements), recording_conn.commits) == (1, 1)
+        assert (str(card[0]), card[1], card[2], card[3], str(card[6])) == (card_id, "Front", "Back", "hard", deck_id)
+        assert self.deck_state(recording_conn, deck_id) == (1, True)
+
+    def test_create_for_other_owner_writes_nothing(self, recording_conn):
+        """Test the ownership check in the statement rejects other users and unknown decks."""
+        _, deck_id = self.seed_deck(recording_conn)
+
+        stranger = str(uuid.uuid4())
+        card_id = str(uuid.uuid4())
+        assert CardModel.create_for_owner(recording_conn, deck_id, stranger, card_id, "F", "B", "easy") is None
+        assert self.deck_state(recording_conn, deck_id) == (0, False)
+        # Rolls back the seeded rows as well, keep it last
+        assert CardModel.create_for_owner(recording_conn, "bad", stranger, str(uuid.uuid4()), "F", "B", "easy") is None
+
+    def test_update_and_delete_take_one_statement(self, recording_conn):
+        """Test updating and deleting a card each run one statement and one commit."""
+        owner_id, deck_id = self.seed_deck(recording_conn)
+        card_id = str(uuid.uuid4())
+        CardModel.create_for_owner(recording_conn, deck_id, owner_id, card_id, "Front", "Back", "easy")
+        recording_conn.statements.clear()
+        recording_conn.commits = 0
+
+        card = CardModel.update_for_owner(recording_conn, deck_id, card_id, owner_id, back_text="New back")
+
+        assert (len(recording_conn.statements), recording_conn.commits) == (1, 1)
+        assert (card[1], card[2], card[3]) == ("Front", "New back", "easy")
+
+        recording_conn.statements.clear()
+        recording_conn.commits = 0
+        assert CardModel.delete_for_owner(recording_conn, deck_id, card_id, str(uuid.uuid4())) is False
+        assert CardModel.delete_for_owner(recording_conn, deck_id, card_id, owner_id) is True
+
+        assert (len(recording_conn.statements), recording_conn.commits) == (2, 2)
+        assert self.deck_state(recording_conn, deck_id) == (0, True)
+        assert CardModel.find_deck_id(recording_conn, card_id) is None
+
+    def test_update_stamps_the_card_in_utc(self, recording_conn):
+        """Test a card update stamps updated_at in UTC like its deck, whatever the session time zone."""
+        owner_id, deck_id = self.seed_deck(recording_conn)
+        card_id = str(uuid.uuid4())
+        CardModel.create_for_owner(recording_conn, deck_id, owner_id, card_id, "Front", "Back", "easy")
+        with recording_conn.cursor() as cur:
+            cur.execute("SET TIME ZONE 'Pacific/Kiritimati'")
+
+        card = CardModel.update_for_owner(recording_conn, deck_id, card_id, owner_id, back_text="New back")
+
+        assert abs(card[8] - datetime.now(timezone.utc).replace(tzinfo=None)) < timedelta(minutes=1)
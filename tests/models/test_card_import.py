@@ -0,0 +1,118 @@
+import io
+import uuid
+
+import pytest
+
+from flashly.models.card_import import CardImportError, import_cards, parse_header
+
+
+@pytest.fixture
+def deck_id(recording_conn):
+    """A deck with one existing card in the local Postgres test database."""
+    owner_id, deck_id = str(uuid.uuid4()), str(uuid.uuid4())
+    with recording_conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+            VALUES (%s, 'Import', 'Owner', %s, %s, 'x')
+            """,
+            (owner_id, f"import_{owner_id}", f"import_{owner_id}@example.com"),
+        )
+        cur.execute(
+            """
+            INSERT INTO decks (id, name, description, publish_status, owner_id, rating, card_count, updated_at)
+            VALUES (%s, 'Import deck', '', 'public', %s, 0.0, 1, now() - interval '1 day')
+            """,
+            (deck_id, owner_id),
+        )
+    return deck_id
+
+
+def deck_state(conn, deck_id):
+    with conn.cursor() as cur:
+        cur.execute("SELECT card_count, updated_at > now() - interval '1 minute' FROM decks WHERE id = %s", (deck_id,))
+        card_count, touched = cur.fetchone()
+        cur.execute(
+            "SELECT front_text, back_text, difficulty FROM cards WHERE deck_id = %s ORDER BY created_at", (deck_id,)
+        )
+        return card_count, touched, cur.fetchall()
+
+
+class TestParseHeader:
+    """Test cases for mapping upload headers to staging columns."""
+
+    def test_accepts_aliases_in_any_order(self):
+        """Test camelCase, snake_case and short header names are recognized."""
+        assert parse_header("Difficulty,backText,Front Text", ",") == ["difficulty", "back_text", "front_text"]
+        assert parse_header("question\tanswer", "\t") == ["front_text", "back_text"]
+
+    def test_ignores_unknown_columns(self):
+        """Test extra columns are kept apart so they can be loaded and dropped."""
+        assert parse_header("front,notes,back", ",") == ["front_text", "ignored_1", "back_text"]
+
+    def test_requires_front_and_back(self):
+        """Test a header without a back column is rejected."""
+        with pytest.raises(CardImportError, match="Missing required columns: back_text"):
+            parse_header("front,difficulty", ",")
+
+
+class TestImportCards:
+    """Test cases for importing CSV/TSV files through COPY into the local Postgres test database."""
+
+    def test_imports_csv_in_file_order(self, recording_conn, deck_id):
+        """Test valid rows are inserted in order and the deck is updated once."""
+        upload = io.BytesIO(
+            b"front,back,difficulty\n"
+            b'"Capital of France","Paris",Medium\n'
+            b'" Quoted, comma ","Two\nlines",\n'
+            b"Third,3,hard\n"
+        )
+        recording_conn.statements.clear()
+
+        imported = import_cards(recording_conn, deck_id, upload)
+
+        assert imported == 3
+        assert recording_conn.commits == 1
+        assert sum("UPDATE decks" in sql for sql in recording_conn.statements) == 1
+        card_count, touched, cards = deck_state(recording_conn, deck_id)
+        assert (card_count, touched) == (4, True)
+        assert cards == [
+            ("Capital of France", "Paris", "medium"),
+            ("Quoted, comma", "Two\nlines", "easy"),
+            ("Third", "3", "hard"),
+        ]
+
+    def test_imports_tsv(self, recording_conn, deck_id):
+        """Test tab separated files with a byte order mark and no difficulty column."""
+        upload = io.BytesIO("\ufefffrontText\tbackText\nHola\tHello\n".encode("utf-8"))
+
+        assert import_cards(recording_conn, deck_id, upload, "tsv") == 1
+        assert deck_state(recording_conn, deck_id)[2] == [("Hola", "Hello", "easy")]
+
+    def test_rejects_invalid_rows_set_wise(self, recording_conn, deck_id):
+        """Test every invalid row is counted and nothing is imported."""
+        upload = io.BytesIO(b"front,back,difficulty\nOk,Fine,easy\n ,Back,easy\nFront,,\nFront,Back,extreme\n")
+
+        with pytest.raises(CardImportError) as error:
+            import_cards(recording_conn, deck_id, upload)
+
+        assert str(error.value) == "3 invalid rows, nothing was imported"
+        assert error.value.rejected == 3
+        assert error.value.rows == [
+            {"row": 3, "error": "Missing required fields: frontText"},
+            {"row": 4, "error": "Missing required fields: backText"},
+            {"row": 5, "error": "Invalid difficulty. Must be one of: easy, medium, hard"},
+        ]
+        assert not any("INSERT INTO cards" in sql for sql in recording_conn.statements)
+
+    def test_rejects_malformed_file(self, recording_conn, deck_id):
+        """Test a row with too few columns is reported instead of raising a database error."""
+        upload = io.BytesIO(b"front,back\nOnly one column\n")
+
+        with pytest.raises(CardImportError, match="Malformed file"):
+            import_cards(recording_conn, deck_id, upload)
+
+    def test_rejects_unknown_format(self, recording_conn, deck_id):
+        """Test only csv and tsv are accepted."""
+        with pytest.raises(CardImportError, match="Invalid format"):
+            import_cards(recording_conn, deck_id, io.BytesIO(b"front,back\n"), "xlsx")
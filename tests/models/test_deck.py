@@ -1,7 +1,11 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock, patch
 
+import psycopg2.errors
+import pytest
+
+from flashly.models.card import CardModel
 from flashly.models.deck import DeckModel
 
 
@@ -39,31 +43,6 @@ class TestDeckModel:
         # Verify commit was called
         mock_db_conn.commit.assert_called_once()
 
-    def test_update_deck(self, sample_deck, mock_db_conn):
-        """Test updating a deck in database."""
-        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
-
-        sample_deck.update(mock_db_conn)
-
-        # Verify that execute was called with UPDATE SQL
-        mock_cursor.execute.assert_called_once()
-        args = mock_cursor.execute.call_args[0]
-        assert "UPDATE decks" in args[0]
-        mock_db_conn.commit.assert_called_once()
-
-    def test_delete_deck(self, sample_deck, mock_db_conn):
-        """Test deleting a deck from database."""
-        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
-
-        sample_deck.delete(mock_db_conn)
-
-        # Verify that execute was called with DELETE SQL
-        mock_cursor.execute.assert_called_once()
-        args = mock_cursor.execute.call_args[0]
-        assert "DELETE FROM decks" in args[0]
-        assert sample_deck.id in args[1]
-        mock_db_conn.commit.assert_called_once()
-
     @patch("flashly.models.deck.DeckModel.find_deck_by_id")
     def test_find_deck_by_id(self, mock_find):
         """Test finding deck by ID."""
@@ -99,6 +78,64 @@ class TestDeckModel:
         mock_find.assert_called_once_with(mock_db_conn)
         assert result == [("deck_data",)]
 
+    def test_find_explore_decks_first_page(self, mock_db_conn):
+        """Test explore query without a cursor only limits the page."""
+        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall.return_value = []
+
+        result = DeckModel.find_explore_decks(mock_db_conn, limit=11)
+
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "ORDER BY d.rating DESC, d.created_at DESC, d.id DESC" in sql
+        assert "(d.rating, d.created_at, d.id) <" not in sql
+        assert params == [11]
+        assert result == []
+
+    def test_deck_queries_read_card_count_column(self, mock_db_conn):
+        """Test deck queries read the denormalized card_count instead of aggregating cards."""
+        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall.return_value = []
+        mock_cursor.fetchone.return_value = None
+        user_id = str(uuid.uuid4())
+
+        DeckModel.find_explore_decks(mock_db_conn)
+        DeckModel.find_feed_decks(mock_db_conn, user_id)
+        DeckModel.find_decks_by_user_id(mock_db_conn, user_id)
+        DeckModel.find_deck_by_id(mock_db_conn, str(uuid.uuid4()))
+
+        for call in mock_cursor.execute.call_args_list:
+            sql = call[0][0]
+            assert "d.card_count" in sql
+            assert "JOIN cards" not in sql
+            assert "GROUP BY" not in sql
+
+    def test_find_explore_decks_with_cursor(self, mock_db_conn):
+        """Test explore query seeks past the cursor."""
+        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall.return_value = []
+        cursor = ("4.5", "2024-01-01T00:00:00", str(uuid.uuid4()))
+
+        DeckModel.find_explore_decks(mock_db_conn, limit=21, cursor=cursor)
+
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "(d.rating, d.created_at, d.id) <" in sql
+        assert params == [*cursor, 21]
+
+    def test_find_feed_decks_with_cursor(self, mock_db_conn):
+        """Test feed query filters on followees and seeks past the cursor."""
+        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchall.return_value = []
+        user_id = str(uuid.uuid4())
+        cursor = ("2024-01-01T00:00:00", str(uuid.uuid4()))
+
+        DeckModel.find_feed_decks(mock_db_conn, user_id, limit=21, cursor=cursor)
+
+        sql, params = mock_cursor.execute.call_args[0]
+        assert "GROUP BY" not in sql
+        assert "(d.created_at, d.id) <" in sql
+        assert "ORDER BY d.created_at DESC, d.id DESC" in sql
+        assert params == [user_id, *cursor, 21]
+
     @patch("flashly.models.deck.DeckModel.find_feed_decks")
     def test_find_feed_decks(self, mock_find):
         """Test finding feed decks."""
@@ -145,3 +182,144 @@ class TestDeckModel:
     def test_tablename_attribute(self):
         """Test that __tablename__ is set correctly."""
         assert DeckModel.__tablename__ == "decks"
+
+
+class TestDeckOwnerWrites:
+    """Test cases for the single statement deck write paths against the local Postgres test database."""
+
+    def seed_deck(self, conn):
+        owner_id, deck_id = str(uuid.uuid4()), str(uuid.uuid4())
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+                VALUES (%s, 'Write', 'Owner', %s, %s, 'x')
+                """,
+                (owner_id, f"write_{owner_id}", f"write_{owner_id}@example.com"),
+            )
+            cur.execute(
+                """
+                INSERT INTO decks (id, name, description, publish_status, owner_id, rating, updated_at)
+                VALUES (%s, 'Write deck', 'Before', 'public', %s, 0.0, now() - interval '1 day')
+                """,
+                (deck_id, owner_id),
+            )
+        conn.statements.clear()
+        return owner_id, deck_id
+
+    def test_update_takes_one_statement(self, recording_conn):
+        """Test updating a deck checks the owner and returns the updated row in one statement."""
+        owner_id, deck_id = self.seed_deck(recording_conn)
+
+        updated = DeckModel.update_for_owner(recording_conn, deck_id, owner_id, name="After", publish_status="private")
+
+        assert (len(recording_conn.statements), recording_conn.commits) == (1, 1)
+        assert updated[1:4] == ("After", "Before", "private")
+        assert updated[8] == f"write_{owner_id}"
+        assert updated[:8] == DeckModel.find_deck_by_id(recording_conn, deck_id)[:8]
+
+    def test_update_for_other_owner_writes_nothing(self, recording_conn):
+        """Test the ownership check in the statement rejects other users and malformed ids."""
+        owner_id, deck_id = self.seed_deck(recording_conn)
+
+        assert DeckModel.update_for_owner(recording_conn, deck_id, str(uuid.uuid4()), name="Stolen") is None
+        assert DeckModel.find_deck_by_id(recording_conn, deck_id)[1] == "Write deck"
+        # Rolls back the seeded rows as well, keep it last
+        assert DeckModel.update_for_owner(recording_conn, "not-a-uuid", owner_id, name="Stolen") is None
+
+    def test_delete_takes_one_statement(self, recording_conn):
+        """Test deleting a deck checks the owner and deletes it in one statement and one commit."""
+        owner_id, deck_id = self.seed_deck(recording_conn)
+
+        assert DeckModel.delete_for_owner(recording_conn, deck_id, str(uuid.uuid4())) is False
+        assert DeckModel.find_owner_id(recording_conn, deck_id) is not None
+        recording_conn.statements.clear()
+        recording_conn.commits = 0
+
+        assert DeckModel.delete_for_owner(recording_conn, deck_id, owner_id) is True
+        assert (len(recording_conn.statements), recording_conn.commits) == (1, 1)
+        assert DeckModel.find_owner_id(recording_conn, deck_id) is None
+
+    def test_updated_at_is_utc_whatever_the_session_time_zone(self, recording_conn):
+        """Test writes stamp updated_at in UTC, which Last-Modified relies on."""
+        owner_id, deck_id = self.seed_deck(recording_conn)
+        with recording_conn.cursor() as cur:
+            cur.execute("SET TIME ZONE 'Pacific/Kiritimati'")
+
+        updated = DeckModel.update_for_owner(recording_conn, deck_id, owner_id, name="After")
+
+        assert abs(updated.updated_at - datetime.now(timezone.utc).replace(tzinfo=None)) < timedelta(minutes=1)
+
+    def test_rating_is_never_null(self, recording_conn):
+        """Test a deck cannot be stored without a rating, which the explore keyset compares."""
+        owner_id, _ = self.seed_deck(recording_conn)
+
+        with pytest.raises(psycopg2.errors.NotNullViolation):
+            with recording_conn.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO decks (id, name, owner_id, rating) VALUES (%s, 'Unrated', %s, NULL)",
+                    (str(uuid.uuid4()), owner_id),
+                )
+
+
+class TestDeckAcl:
+    """Test cases for the cached deck permission lookup against the local Postgres test database."""
+
+    def test_lookup_is_cached_until_a_write(self, recording_conn):
+        """Test a second lookup runs no query and a deck update invalidates the entry."""
+        owner_id, deck_id = TestDeckOwnerWrites().seed_deck(recording_conn)
+
+        acl = DeckModel.find_deck_acl(recording_conn, deck_id)
+        assert (str(acl[0]), acl[1], acl[3]) == (owner_id, "public", "Write deck")
+        assert DeckModel.find_deck_acl(recording_conn, deck_id) == acl
+        assert len(recording_conn.statements) == 1
+
+        DeckModel.update_for_owner(recording_conn, deck_id, owner_id, publish_status="private")
+        recording_conn.statements.clear()
+
+        assert DeckModel.find_deck_acl(recording_conn, deck_id)[1] == "private"
+        assert len(recording_conn.statements) == 1
+
+    def test_entry_of_another_version_is_read_again(self, recording_conn):
+        """Test a cached entry is only used when its updated_at is the version the caller saw."""
+        owner_id, deck_id = TestDeckOwnerWrites().seed_deck(recording_conn)
+        acl = DeckModel.find_deck_acl(recording_conn, deck_id)
+
+        # A write the cache has not heard of yet
+        with recording_conn.cursor() as cur:
+            cur.execute("UPDATE decks SET publish_status = 'private', updated_at = now() WHERE id = %s", (deck_id,))
+        version = DeckModel.find_deck_version(recording_conn, deck_id)
+        recording_conn.statements.clear()
+
+        assert DeckModel.find_deck_acl(recording_conn, deck_id, version=acl.updated_at) == acl
+        assert recording_conn.statements == []
+        assert DeckModel.find_deck_acl(recording_conn, deck_id, version=version).publish_status == "private"
+        assert len(recording_conn.statements) == 1
+
+    def test_missing_decks_are_not_cached(self, recording_conn):
+        """Test unknown and malformed ids return None."""
+        assert DeckModel.find_deck_acl(recording_conn, str(uuid.uuid4())) is None
+        assert DeckModel.find_deck_acl(recording_conn, "not-a-uuid") is None
+
+
+class TestDeckMetadataCache:
+    """Test cases for the cached serialized deck against the local Postgres test database."""
+
+    def test_serialized_deck_is_cached_until_a_write(self, recording_conn):
+        """Test reads are served from the cache, card writes invalidate it and deck updates refresh it."""
+        owner_id, deck_id = TestDeckOwnerWrites().seed_deck(recording_conn)
+
+        deck = DeckModel.find_serialized_deck(recording_conn, deck_id)
+        assert (deck["id"], deck["name"], deck["card_count"]) == (deck_id, "Write deck", 0)
+        assert DeckModel.find_serialized_deck(recording_conn, deck_id) is deck
+        assert len(recording_conn.statements) == 1
+
+        CardModel.create_for_owner(recording_conn, deck_id, owner_id, str(uuid.uuid4()), "Front", "Back", "easy")
+        recording_conn.statements.clear()
+        assert DeckModel.find_serialized_deck(recording_conn, deck_id)["card_count"] == 1
+        assert len(recording_conn.statements) == 1
+
+        DeckModel.update_for_owner(recording_conn, deck_id, owner_id, name="Renamed")
+        recording_conn.statements.clear()
+        assert DeckModel.find_serialized_deck(recording_conn, deck_id)["name"] == "Renamed"
+        assert recording_conn.statements == []
@@ -65,3 +65,44 @@ class TestFollowerModel:
     def test_tablename_attribute(self):
         """Test that __tablename__ is set correctly."""
         assert FollowerModel.__tablename__ == "followers"
+
+
+class TestFollowerWrites:
+    """Test cases for following and unfollowing against the local Postgres test database."""
+
+    def seed_users(self, conn):
+        ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+        with conn.cursor() as cur:
+            for user_id in ids:
+                cur.execute(
+                    """
+                    INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+                    VALUES (%s, 'Follow', 'User', %s, %s, 'x')
+                    """,
+                    (user_id, f"follow_{user_id}", f"follow_{user_id}@example.com"),
+                )
+        conn.statements.clear()
+        return ids
+
+    def test_follow_is_one_statement_and_idempotent(self, recording_conn):
+        """Test following runs one statement where the previous path ran four, and a second follow is a no-op."""
+        follower_id, following_id = self.seed_users(recording_conn)
+
+        assert FollowerModel.follow(recording_conn, follower_id, following_id) is True
+        assert (len(recording_conn.statements), recording_conn.commits) == (1, 1)
+        assert FollowerModel.follow(recording_conn, follower_id, following_id) is False
+
+        with recording_conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM followers WHERE follower_id = %s", (follower_id,))
+            assert cur.fetchone() == (1,)
+
+    def test_unfollow_is_one_statement(self, recording_conn):
+        """Test unfollowing runs one statement where the previous path ran two."""
+        follower_id, following_id = self.seed_users(recording_conn)
+        FollowerModel.follow(recording_conn, follower_id, following_id)
+        recording_conn.statements.clear()
+
+        assert FollowerModel.unfollow(recording_conn, follower_id, following_id) is True
+        assert len(recording_conn.statements) == 1
+        assert FollowerModel.unfollow(recording_conn, follower_id, following_id) is False
+        assert FollowerModel.unfollow(recording_conn, follower_id, "not-a-uuid") is False
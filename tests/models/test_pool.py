@@ -0,0 +1,156 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+from flashly.models.pool import BlockingConnectionPool, PoolMetrics, PoolTimeout
+
+
+def make_connection():
+    conn = MagicMock()
+    conn.closed = 0
+    conn.info.transaction_status = TRANSACTION_STATUS_IDLE
+    return conn
+
+
+@pytest.fixture
+def mock_connect():
+    with patch("flashly.models.pool.psycopg2.connect", side_effect=lambda **kwargs: make_connection()) as connect:
+        yield connect
+
+
+class TestBlockingConnectionPool:
+    """Test cases for BlockingConnectionPool."""
+
+    def test_opens_minconn_connections(self, mock_connect):
+        """Test the pool opens minconn connections up front with the given parameters."""
+        pool = BlockingConnectionPool(2, 5, host="db", database="flashly")
+
+        assert mock_connect.call_count == 2
+        mock_connect.assert_called_with(host="db", database="flashly")
+        assert pool.metrics.snapshot()["idle"] == 2
+
+    def test_reuses_returned_connection(self, mock_connect):
+        """Test a returned connection is handed out again."""
+        pool = BlockingConnectionPool(1, 2)
+
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+        assert pool.getconn() is conn
+        assert mock_connect.call_count == 1
+
+    def test_grows_up_to_maxconn(self, mock_connect):
+        """Test connections are opened lazily up to maxconn."""
+        pool = BlockingConnectionPool(0, 2)
+
+        first, second = pool.getconn(), pool.getconn()
+
+        assert first is not second
+        assert mock_connect.call_count == 2
+        assert pool.metrics.snapshot()["in_use"] == 2
+
+    def test_exhausted_pool_times_out(self, mock_connect):
+        """Test checkout raises PoolTimeout once the timeout elapses."""
+        pool = BlockingConnectionPool(1, 1)
+        pool.getconn()
+
+        with pytest.raises(PoolTimeout):
+            pool.getconn(timeout=0.05)
+
+        assert pool.metrics.snapshot()["timeouts"] == 1
+
+    def test_exhausted_pool_blocks_until_release(self, mock_connect):
+        """Test a waiting thread gets the connection released by another thread."""
+        pool = BlockingConnectionPool(1, 1)
+        conn = pool.getconn()
+        acquired = []
+
+        waiter = threading.Thread(target=lambda: acquired.append(pool.getconn(timeout=5)))
+        waiter.start()
+        deadline = time.monotonic() + 5
+        while pool.metrics.snapshot()["waiters"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pool.metrics.snapshot()["waiters"] == 1
+
+        pool.putconn(conn)
+        waiter.join(timeout=5)
+
+        assert acquired == [conn]
+        assert pool.metrics.snapshot()["waiters"] == 0
+
+    def test_closed_connection_is_replaced(self, mock_connect):
+        """Test a connection closed while idle is replaced on checkout."""
+        pool = BlockingConnectionPool(1, 1)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.closed = 1
+
+        replacement = pool.getconn()
+
+        assert replacement is not conn
+        assert mock_connect.call_count == 2
+
+    def test_stale_connection_is_validated(self, mock_connect):
+        """Test a connection idle past validate_idle is pinged and replaced if the ping fails."""
+        pool = BlockingConnectionPool(0, 1, validate_idle=0)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.execute.side_effect = psycopg2.OperationalError("server closed the connection")
+
+        replacement = pool.getconn()
+
+        cursor.execute.assert_called_once_with("SELECT 1")
+        assert replacement is not conn
+        conn.close.assert_called_once()
+
+    def test_putconn_rolls_back_open_transaction(self, mock_connect):
+        """Test a connection returned mid-transaction is rolled back."""
+        pool = BlockingConnectionPool(1, 1)
+        conn = pool.getconn()
+        conn.info.transaction_status = TRANSACTION_STATUS_INTRANS
+
+        pool.putconn(conn)
+
+        conn.rollback.assert_called_once()
+        snapshot = pool.metrics.snapshot()
+        assert snapshot["in_use"] == 0
+        assert snapshot["idle"] == 1
+
+    def test_putconn_close_frees_slot(self, mock_connect):
+        """Test closing a connection on return lets a new one be opened."""
+        pool = BlockingConnectionPool(1, 1)
+        conn = pool.getconn()
+
+        pool.putconn(conn, close=True)
+        replacement = pool.getconn(timeout=0.05)
+
+        conn.close.assert_called_once()
+        assert replacement is not conn
+
+    def test_invalid_sizes(self, mock_connect):
+        """Test inconsistent pool sizes are rejected."""
+        with pytest.raises(ValueError):
+            BlockingConnectionPool(3, 2)
+
+
+class TestPoolMetrics:
+    """Test cases for PoolMetrics."""
+
+    def test_wait_histogram(self):
+        """Test checkout waits land in the right histogram bucket."""
+        metrics = PoolMetrics()
+
+        metrics.record_wait(0.0005)
+        metrics.record_wait(0.007)
+        metrics.record_wait(10)
+
+        snapshot = metrics.snapshot()
+        assert snapshot["wait_count"] == 3
+        assert snapshot["wait_histogram"]["le_1ms"] == 1
+        assert snapshot["wait_histogram"]["le_10ms"] == 1
+        assert snapshot["wait_histogram"]["inf"] == 1
@@ -0,0 +1,120 @@
+import uuid
+
+import psycopg2
+import pytest
+
+from flashly.models.card import CardModel
+from flashly.models.prepared import PreparingConnection, execute_prepared, to_positional
+from flashly.models.user import UserModel
+
+
+@pytest.fixture
+def preparing_conn(pg_dsn):
+    """Connection to the local Postgres test database that prepares hot queries."""
+    conn = psycopg2.connect(pg_dsn, connection_factory=PreparingConnection)
+    yield conn
+    conn.rollback()
+    conn.close()
+
+
+def server_prepared(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT name FROM pg_prepared_statements")
+        return {row[0] for row in cur.fetchall()}
+
+
+class TestToPositional:
+    """Test cases for converting psycopg2 placeholders for PREPARE."""
+
+    def test_numbers_placeholders(self):
+        """Test each %s becomes the next $n parameter."""
+        sql, count = to_positional("SELECT * FROM decks WHERE id = %s AND owner_id = %s LIMIT %s")
+
+        assert sql == "SELECT * FROM decks WHERE id = $1 AND owner_id = $2 LIMIT $3"
+        assert count == 3
+
+    def test_unescapes_percent_signs(self):
+        """Test %% is turned back into a literal percent sign."""
+        sql, count = to_positional("SELECT * FROM users WHERE username LIKE 'a%%' AND id = %s")
+
+        assert sql == "SELECT * FROM users WHERE username LIKE 'a%' AND id = $1"
+        assert count == 1
+
+
+class TestExecutePrepared:
+    """Test cases for running queries through server-side prepared statements."""
+
+    def test_plain_connection_falls_back_to_execute(self, mock_db_conn):
+        """Test a connection that does not prepare statements runs the query as is."""
+        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
+
+        with mock_db_conn.cursor() as cur:
+            execute_prepared(cur, "card_by_id", "SELECT * FROM cards WHERE id = %s", ("card-id",))
+
+        mock_cursor.execute.assert_called_once_with("SELECT * FROM cards WHERE id = %s", ("card-id",))
+
+    def test_prepares_once_per_connection(self, preparing_conn):
+        """Test the statement is prepared on first use and then only executed."""
+        with preparing_conn.cursor() as cur:
+            for value in (1, 2):
+                execute_prepared(cur, "test_add_one", "SELECT %s::int + 1", (value,))
+                assert cur.fetchone() == (value + 1,)
+
+        assert preparing_conn.prepared_statements == {"test_add_one": 1}
+        assert "test_add_one" in server_prepared(preparing_conn)
+
+    def test_prepared_statement_survives_rollback(self, preparing_conn):
+        """Test a statement prepared inside a rolled back transaction can still be executed."""
+        with preparing_conn.cursor() as cur:
+            execute_prepared(cur, "test_rollback", "SELECT %s::text", ("before",))
+        preparing_conn.rollback()
+
+        with preparing_conn.cursor() as cur:
+            execute_prepared(cur, "test_rollback", "SELECT %s::text", ("after",))
+            assert cur.fetchone() == ("after",)
+
+    def test_models_run_prepared(self, preparing_conn):
+        """Test hot model queries return the same rows when prepared."""
+        user_id = uuid.uuid4()
+        with preparing_conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+                VALUES (%s, 'Prepared', 'User', 'prepared_user', 'prepared@example.com', 'x')
+                """,
+                (str(user_id),),
+            )
+
+        for _ in range(2):
+            user = UserModel.find_by_email(preparing_conn, "prepared@example.com")
+            assert user.id == str(user_id)
+        assert CardModel.find_cards_by_deck_id(preparing_conn, str(uuid.uuid4())) == []
+
+        assert {"user_by_email", "card_by_deck"} <= server_prepared(preparing_conn)
+
+    def test_profile_children_run_prepared(self, preparing_conn):
+        """Test a profile loads its cards and categories when the deck ids go through PREPARE."""
+        user_id, deck_id, category_id = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+        with preparing_conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+                VALUES (%s, 'Profile', 'User', 'profile_user', 'profile@example.com', 'x')
+                """,
+                (user_id,),
+            )
+            cur.execute("INSERT INTO decks (id, name, owner_id) VALUES (%s, 'Deck', %s)", (deck_id, user_id))
+            cur.execute(
+                "INSERT INTO cards (id, front_text, back_text, deck_id) VALUES (%s, 'Front', 'Back', %s)",
+                (str(uuid.uuid4()), deck_id),
+            )
+            cur.execute("INSERT INTO categories (id, name) VALUES (%s, 'Science')", (category_id,))
+            cur.execute("INSERT INTO deck_categories (deck_id, category_id) VALUES (%s, %s)", (deck_id, category_id))
+
+        for _ in range(2):
+            profile = UserModel.get_profile_with_details(preparing_conn, user_id)
+            [deck] = profile["decks"]
+            assert [card["front_text"] for card in deck["cards"]] == ["Front"]
+            assert [category["name"] for category in deck["categories"]] == ["Science"]
+
+        assert {"profile_cards", "profile_categories"} <= server_prepared(preparing_conn)
@@ -0,0 +1,212 @@
+import uuid
+from datetime import datetime
+
+import psycopg2
+import pytest
+
+from flashly import cache
+from flashly.models.card import CardModel
+from flashly.models.deck import DeckModel
+from flashly.models.follower import FollowerModel
+from flashly.models.user import UserModel
+
+# Tables that grow with usage, a sequential scan on any of them is a regression
+LARGE_TABLES = {"users", "user_details", "decks", "cards", "followers", "deck_categories"}
+
+
+class ExplainCursor:
+    """Cursor stand-in that plans every statement with EXPLAIN before running it."""
+
+    def __init__(self, cursor, plans):
+        self._cursor = cursor
+        self._plans = plans
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params=None):
+        self._cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        self._plans.append((sql, self._cursor.fetchone()[0][0]["Plan"]))
+        self._cursor.execute(sql, params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+
+class ExplainConnection:
+    """Connection stand-in handed to the models so their queries are captured with their plans."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.plans = []
+
+    def cursor(self, *args, **kwargs):
+        return ExplainCursor(self._conn.cursor(), self.plans)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._conn.rollback()
+
+
+def seq_scanned_tables(plan):
+    """Return the large tables a plan reads with a sequential scan."""
+    tables = set()
+    if plan["Node Type"] == "Seq Scan" and plan.get("Relation Name") in LARGE_TABLES:
+        tables.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        tables |= seq_scanned_tables(child)
+    return tables
+
+
+@pytest.fixture(scope="module")
+def seeded_db(pg_dsn):
+    """Seed enough rows that the planner prefers indexes the way it would in production."""
+    conn = psycopg2.connect(pg_dsn)
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+            SELECT gen_random_uuid(), 'Plan', 'User', 'plan_user_' || i, 'plan_user_' || i || '@example.com', 'x'
+            FROM generate_series(1, 20000) i
+            """)
+        cur.execute("""
+            INSERT INTO user_details (id, user_id, about_me)
+            SELECT gen_random_uuid(), id, 'About me' FROM users
+            """)
+        cur.execute("""
+            INSERT INTO decks (id, name, description, publish_status, owner_id, rating, created_at)
+            SELECT
+                gen_random_uuid(),
+                'Deck ' || n,
+                'Plan deck',
+                CASE WHEN n % 5 = 0 THEN 'private' ELSE 'public' END,
+                u.id,
+                (random() * 50)::int / 10.0,
+                now() - (random() * interval '365 days')
+            FROM (SELECT id FROM users WHERE username LIKE 'plan_user_%' ORDER BY username LIMIT 5000) u
+            CROSS JOIN generate_series(1, 8) n
+            """)
+        cur.execute("""
+            INSERT INTO cards (id, front_text, back_text, deck_id)
+            SELECT gen_random_uuid(), 'Front ' || n, 'Back ' || n, d.id
+            FROM decks d
+            CROSS JOIN generate_series(1, 5) n
+            """)
+        cur.execute("UPDATE decks SET card_count = 5")
+        cur.execute("""
+            WITH numbered AS (SELECT id, row_number() OVER (ORDER BY id) rn FROM users)
+            INSERT INTO followers (follower_id, following_id)
+            SELECT DISTINCT a.id, b.id
+            FROM numbered a
+            CROSS JOIN (VALUES (1), (7), (13)) m(k)
+            JOIN numbered b ON b.rn = (a.rn * m.k) % 20000 + 1
+            WHERE a.id <> b.id
+            """)
+        cur.execute("""
+            INSERT INTO categories (id, name)
+            SELECT gen_random_uuid(), 'Category ' || i FROM generate_series(1, 50) i
+            """)
+        cur.execute("""
+            INSERT INTO deck_categories (deck_id, category_id)
+            SELECT d.id, c.ids[1 + abs(hashtext(d.id::text)) % 50]
+            FROM decks d, (SELECT array_agg(id) AS ids FROM categories) c
+            """)
+        cur.execute("ANALYZE")
+
+        cur.execute("""
+            SELECT d.id, d.owner_id, c.id, u.email, u.username, f.follower_id
+            FROM decks d
+            JOIN cards c ON c.deck_id = d.id
+            JOIN users u ON u.id = d.owner_id
+            JOIN followers f ON f.following_id = d.owner_id
+            LIMIT 1
+            """)
+        deck_id, owner_id, card_id, email, username, follower_id = cur.fetchone()
+    conn.commit()
+
+    yield {
+        "deck_id": str(deck_id),
+        "owner_id": str(owner_id),
+        "card_id": str(card_id),
+        "email": email,
+        "username": username,
+        "follower_id": str(follower_id),
+        "conn": conn,
+    }
+
+    conn.close()
+
+
+def uncached(query):
+    # Cached finders only reach the database on a miss
+    def run(conn, ids):
+        cache.clear()
+        return query(conn, ids)
+
+    return run
+
+
+HOT_QUERIES = {
+    "deck.find_explore_decks": lambda conn, ids: DeckModel.find_explore_decks(conn, limit=21),
+    "deck.find_explore_decks_cursor": lambda conn, ids: DeckModel.find_explore_decks(
+        conn, limit=21, cursor=("3.0", datetime.now().isoformat(), str(uuid.uuid4()))
+    ),
+    "deck.find_feed_decks": lambda conn, ids: DeckModel.find_feed_decks(conn, ids["follower_id"], limit=21),
+    "deck.find_feed_decks_cursor": lambda conn, ids: DeckModel.find_feed_decks(
+        conn, ids["follower_id"], limit=21, cursor=(datetime.now().isoformat(), str(uuid.uuid4()))
+    ),
+    "deck.find_decks_by_user_id": lambda conn, ids: DeckModel.find_decks_by_user_id(conn, ids["owner_id"]),
+    "deck.find_deck_by_id": lambda conn, ids: DeckModel.find_deck_by_id(conn, ids["deck_id"]),
+    "deck.find_deck_acl": uncached(lambda conn, ids: DeckModel.find_deck_acl(conn, ids["deck_id"])),
+    "deck.find_serialized_deck": uncached(lambda conn, ids: DeckModel.find_serialized_deck(conn, ids["deck_id"])),
+    "deck.find_deck_version": lambda conn, ids: DeckModel.find_deck_version(conn, ids["deck_id"]),
+    "deck.find_owner_id": lambda conn, ids: DeckModel.find_owner_id(conn, ids["deck_id"]),
+    "deck.update_for_owner": lambda conn, ids: DeckModel.update_for_owner(
+        conn, ids["deck_id"], ids["owner_id"], name="Renamed"
+    ),
+    "deck.delete_for_owner": lambda conn, ids: DeckModel.delete_for_owner(conn, ids["deck_id"], ids["owner_id"]),
+    "deck.touch_for_owner": lambda conn, ids: DeckModel.touch_for_owner(conn, ids["owner_id"]),
+    "card.find_cards_by_deck_id": lambda conn, ids: CardModel.find_cards_by_deck_id(conn, ids["deck_id"]),
+    "card.find_card_by_id": lambda conn, ids: CardModel.find_card_by_id(conn, ids["card_id"]),
+    "card.find_deck_id": lambda conn, ids: CardModel.find_deck_id(conn, ids["card_id"]),
+    "card.create_for_owner": lambda conn, ids: CardModel.create_for_owner(
+        conn, ids["deck_id"], ids["owner_id"], str(uuid.uuid4()), "Front", "Back", "easy"
+    ),
+    "card.update_for_owner": lambda conn, ids: CardModel.update_for_owner(
+        conn, ids["deck_id"], ids["card_id"], ids["owner_id"], front_text="Front"
+    ),
+    "card.delete_for_owner": lambda conn, ids: CardModel.delete_for_owner(
+        conn, ids["deck_id"], ids["card_id"], ids["owner_id"]
+    ),
+    "user.find_by_id": lambda conn, ids: UserModel.find_by_id(conn, ids["owner_id"]),
+    "user.find_by_email": lambda conn, ids: UserModel.find_by_email(conn, ids["email"]),
+    "user.find_by_username": lambda conn, ids: UserModel.find_by_username(conn, ids["username"]),
+    "user.get_profile_with_details": lambda conn, ids: UserModel.get_profile_with_details(conn, ids["owner_id"]),
+    "follower.follow": lambda conn, ids: FollowerModel.follow(conn, ids["owner_id"], ids["follower_id"]),
+    "follower.unfollow": lambda conn, ids: FollowerModel.unfollow(conn, ids["follower_id"], ids["owner_id"]),
+}
+
+
+class TestQueryPlans:
+    """Plan every hot model query against a seeded database and reject sequential scans."""
+
+    @pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+    def test_hot_query_avoids_seq_scan(self, seeded_db, name):
+        conn = ExplainConnection(seeded_db["conn"])
+
+        try:
+            HOT_QUERIES[name](conn, seeded_db)
+        finally:
+            conn.rollback()
+
+        assert conn.plans, f"{name} did not run any query"
+        for sql, plan in conn.plans:
+            scanned = seq_scanned_tables(plan)
+            assert not scanned, f"{name} plans a sequential scan on {sorted(scanned)}:\n{sql}"
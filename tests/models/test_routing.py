@@ -0,0 +1,44 @@
+import time
+
+from flashly.models.routing import RecentWriters
+
+
+class TestRecentWriters:
+    """Test cases for RecentWriters."""
+
+    def test_marked_user_wrote_recently(self):
+        """Test a user is sticky to the primary right after a write."""
+        writers = RecentWriters(stickiness=60)
+
+        writers.mark("user-1")
+
+        assert writers.wrote_recently("user-1") is True
+        assert writers.wrote_recently("user-2") is False
+
+    def test_stickiness_expires(self):
+        """Test a user goes back to the replica once the stickiness window passed."""
+        writers = RecentWriters(stickiness=0.01)
+
+        writers.mark("user-1")
+        time.sleep(0.02)
+
+        assert writers.wrote_recently("user-1") is False
+
+    def test_anonymous_requests_are_ignored(self):
+        """Test requests without a token are never sticky."""
+        writers = RecentWriters()
+
+        writers.mark(None)
+
+        assert writers.wrote_recently(None) is False
+
+    def test_expired_users_are_dropped_on_mark(self):
+        """Test marking a user forgets the users whose stickiness already ended."""
+        writers = RecentWriters(stickiness=0.01)
+        writers.mark("user-1")
+        time.sleep(0.02)
+
+        writers.stickiness = 60
+        writers.mark("user-2")
+
+        assert list(writers._writes) == ["user-2"]
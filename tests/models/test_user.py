@@ -91,6 +91,136 @@ class TestUserModel:
         mock_find.assert_called_once_with(mock_db_conn, username)
         assert result == ("user_data",)
 
+    def test_get_profile_with_details(self, mock_db_conn):
+        """Test profile loading fetches each level once and groups children under their deck."""
+        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
+        now = datetime.now()
+        user_id, deck_a, deck_b = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+        mock_cursor.fetchone.return_value = (
+            user_id,
+            "John",
+            "Doe",
+            "johndoe",
+            "john@example.com",
+            now,
+            now,
+            "Hi",
+            2,
+            3,
+            2,
+        )
+        mock_cursor.fetchall.side_effect = [
+            [
+                (deck_a, "Deck A", "A", "public", 4.5, now, now, 2),
+                (deck_b, "Deck B", "B", "private", None, now, now, 0),
+            ],
+            [
+                (deck_a, "card-1", "Front 1", "Back 1", "easy", 1, 50.0, now, now),
+                (deck_a, "card-2", "Front 2", "Back 2", "hard", 0, None, now, now),
+            ],
+            [(deck_b, "cat-1", "Science", now, now)],
+        ]
+
+        profile = UserModel.get_profile_with_details(mock_db_conn, user_id)
+
+        assert mock_cursor.execute.call_count == 4
+        # Cards and categories are read for the fetched decks only
+        assert mock_cursor.execute.call_args_list[2][0][1] == ([deck_a, deck_b],)
+        assert mock_cursor.execute.call_args_list[3][0][1] == ([deck_a, deck_b],)
+        assert profile["id"] == user_id
+        assert profile["following_count"] == 2
+        assert profile["followers_count"] == 3
+        assert profile["decks_count"] == 2
+        deck_by_id = {deck["id"]: deck for deck in profile["decks"]}
+        assert [card["id"] for card in deck_by_id[deck_a]["cards"]] == ["card-1", "card-2"]
+        assert deck_by_id[deck_a]["categories"] == []
+        assert deck_by_id[deck_b]["rating"] == 0.0
+        assert deck_by_id[deck_b]["cards"] == []
+        assert [category["name"] for category in deck_by_id[deck_b]["categories"]] == ["Science"]
+
+    def test_get_profile_with_details_no_decks(self, mock_db_conn):
+        """Test profile loading skips card and category queries for a user without decks."""
+        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
+        now = datetime.now()
+        mock_cursor.fetchone.return_value = (
+            "user-id",
+            "John",
+            "Doe",
+            "johndoe",
+            "john@example.com",
+            now,
+            now,
+            "",
+            0,
+            0,
+            0,
+        )
+        mock_cursor.fetchall.return_value = []
+
+        profile = UserModel.get_profile_with_details(mock_db_conn, "user-id")
+
+        assert mock_cursor.execute.call_count == 2
+        assert profile["decks"] == []
+
+    def test_get_profile_with_details_header_only(self, mock_db_conn):
+        """Test a profile without decks or statistics only runs the user query."""
+        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
+        now = datetime.now()
+        mock_cursor.fetchone.return_value = ("user-id", "John", "Doe", "johndoe", "john@example.com", now, now, "")
+
+        profile = UserModel.get_profile_with_details(mock_db_conn, "user-id", include=set())
+
+        assert mock_cursor.execute.call_count == 1
+        assert "followers" not in mock_cursor.execute.call_args[0][0]
+        assert "decks" not in profile
+        assert "following_count" not in profile
+
+    def test_get_profile_with_details_decks_without_cards(self, mock_db_conn):
+        """Test deck tiles are loaded without querying cards or categories."""
+        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
+        now = datetime.now()
+        mock_cursor.fetchone.return_value = ("user-id", "John", "Doe", "johndoe", "john@example.com", now, now, "")
+        mock_cursor.fetchall.return_value = [("deck-id", "Deck", "", "public", 4.0, now, now, 500)]
+
+        profile = UserModel.get_profile_with_details(mock_db_conn, "user-id", include={"decks"})
+
+        assert mock_cursor.execute.call_count == 2
+        assert profile["decks"][0]["card_count"] == 500
+        assert profile["decks"][0]["cards"] == []
+
+    def test_get_profile_with_details_not_found(self, mock_db_conn):
+        """Test profile loading returns None for an unknown user."""
+        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
+        mock_cursor.fetchone.return_value = None
+
+        assert UserModel.get_profile_with_details(mock_db_conn, "missing") is None
+        assert mock_cursor.execute.call_count == 1
+
     def test_tablename_attribute(self):
         """Test that __tablename__ is set correctly."""
         assert UserModel.__tablename__ == "users"
+
+    def test_from_row(self, mock_db_conn):
+        """Test finders build a slotted model from the row, keeping psycopg2's str id."""
+        user_id = str(uuid.uuid4())
+        now = datetime.now()
+        mock_cursor = mock_db_conn.cursor.return_value.__enter__.return_value
+        row = (user_id, "John", "Doe", "johndoe", "john@example.com", "hash", now, now)
+        mock_cursor.fetchone.return_value = row
+
+        user = UserModel.find_by_id(mock_db_conn, user_id)
+
+        assert user == UserModel(user_id, "John", "Doe", "johndoe", "john@example.com", "hash", now, now)
+        assert not hasattr(user, "__dict__")
+        mock_cursor.fetchone.return_value = None
+        assert UserModel.find_by_id(mock_db_conn, user_id) is None
+
+    def test_to_json_hides_password_hash(self, sample_user):
+        """Test the client representation leaves the password hash out."""
+        assert sample_user.to_json() == {
+            "id": str(sample_user.id),
+            "firstName": "John",
+            "lastName": "Doe",
+            "username": "johndoe",
+            "email": "john@example.com",
+        }
@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+from flashly import cache
+from flashly.cache import TTLCache, invalidate
+
+
+class TestTTLCache:
+    """Test cases for the in-process LRU cache with expiry."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the entry read least recently goes first once maxsize is reached."""
+        lru = TTLCache(maxsize=2, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        assert lru.get("a") == 1
+
+        lru.set("c", 3)
+
+        assert (lru.get("a"), lru.get("b"), lru.get("c")) == (1, None, 3)
+        assert len(lru) == 2
+
+    def test_entries_expire(self):
+        """Test entries are dropped ttl seconds after they were stored."""
+        lru = TTLCache(maxsize=2, ttl=30)
+        with patch("flashly.cache.time.monotonic", return_value=100.0):
+            lru.set("a", 1)
+        with patch("flashly.cache.time.monotonic", return_value=129.0):
+            assert lru.get("a") == 1
+        with patch("flashly.cache.time.monotonic", return_value=130.0):
+            assert lru.get("a", "expired") == "expired"
+        assert len(lru) == 0
+
+    def test_zero_size_disables_cache(self):
+        """Test nothing is stored when maxsize is 0."""
+        lru = TTLCache(maxsize=0, ttl=30)
+        lru.set("a", 1)
+        assert lru.get("a") is None
+
+    def test_invalidate_drops_entries_of_the_kind(self):
+        """Test invalidate reaches every cache registered for the kind, by the string form of the id."""
+        lru = TTLCache()
+        lru.set("42", "deck")
+        with patch.dict(cache._BY_KIND, {"deck": [lru]}):
+            invalidate("card", 42)
+            assert lru.get("42") == "deck"
+            invalidate("deck", 42)
+            assert lru.get("42") is None
+
+    def test_counters(self):
+        """Test hits, misses, evictions, expirations and invalidations are counted for /api/status."""
+        lru = TTLCache(maxsize=1, ttl=30)
+        with patch("flashly.cache.time.monotonic", return_value=100.0):
+            lru.get("a")
+            lru.set("a", 1)
+            lru.get("a")
+            lru.set("b", 2)
+        with patch("flashly.cache.time.monotonic", return_value=200.0):
+            lru.get("b")
+        lru.set("c", 3)
+        lru.pop("c")
+        lru.pop("c")
+
+        snapshot = lru.snapshot()
+
+        assert snapshot["size"] == 0
+        assert (snapshot["hits"], snapshot["misses"], snapshot["hit_ratio"]) == (1, 2, 0.333)
+        assert (snapshot["evictions"], snapshot["expirations"], snapshot["invalidations"]) == (1, 1, 1)
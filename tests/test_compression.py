@@ -0,0 +1,139 @@
+import gzip
+from types import SimpleNamespace
+
+import pytest
+from webob import Request, Response
+
+from flashly import compression
+from flashly.cache import COMPRESSED
+from flashly.streaming import StreamingBody
+
+BODY = b'{"cards": [' + b", ".join(b'{"front": "Question", "back": "Answer"}' for _ in range(100)) + b"]}"
+
+
+class Source:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+
+def make_tween(response_factory, min_size=1024):
+    registry = SimpleNamespace(settings={"compression.min_size": str(min_size)})
+    return compression.compression_tween_factory(lambda request: response_factory(), registry)
+
+
+def json_response(body=BODY, **kwargs):
+    if "app_iter" in kwargs:
+        body = None
+    return Response(body=body, content_type="application/json", charset="utf-8", **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def clear_compressed():
+    COMPRESSED.configure(maxsize=256, ttl=300)
+    yield
+    COMPRESSED.clear()
+
+
+class TestCompressionTween:
+    """Test cases for compressing responses according to Accept-Encoding."""
+
+    def test_gzips_large_json(self):
+        """Test a JSON body over the threshold is gzipped and varies on Accept-Encoding."""
+        tween = make_tween(json_response)
+
+        response = tween(Request.blank("/api/explore", headers={"Accept-Encoding": "gzip, deflate"}))
+
+        assert response.content_encoding == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert response.content_length == len(response.body) < len(BODY)
+        assert gzip.decompress(response.body) == BODY
+
+    def test_leaves_small_or_unrequested_bodies(self):
+        """Test bodies under the threshold, clients without Accept-Encoding and other types are sent as they are."""
+        small = make_tween(lambda: json_response(b'{"ok": true}'))(
+            Request.blank("/", headers={"Accept-Encoding": "gzip"})
+        )
+        unrequested = make_tween(json_response)(Request.blank("/"))
+        refused = make_tween(json_response)(Request.blank("/", headers={"Accept-Encoding": "identity"}))
+        html = make_tween(lambda: Response(body=BODY, content_type="text/html"))(
+            Request.blank("/", headers={"Accept-Encoding": "gzip"})
+        )
+
+        assert small.body == b'{"ok": true}' and small.content_encoding is None
+        assert small.headers["Vary"] == "Accept-Encoding"
+        assert unrequested.body == BODY and unrequested.headers["Vary"] == "Accept-Encoding"
+        assert refused.content_encoding is None
+        assert html.content_encoding is None and "Vary" not in html.headers
+
+    def test_compresses_streams_while_streaming(self):
+        """Test a streamed body stays streamed and its source is closed with the response."""
+        source = Source([BODY[:600], BODY[600:1200], BODY[1200:]])
+        tween = make_tween(lambda: json_response(app_iter=StreamingBody(iter(source), source)))
+
+        response = tween(Request.blank("/", headers={"Accept-Encoding": "gzip"}))
+
+        assert isinstance(response.app_iter, StreamingBody)
+        assert response.content_length is None
+        assert gzip.decompress(b"".join(response.app_iter)) == BODY
+        response.app_iter.close()
+        assert source.closed
+
+    def test_caches_public_versions(self):
+        """Test a public response with an ETag is compressed once per version and gets a weak ETag."""
+        calls = []
+
+        def public_response():
+            calls.append(1)
+            response = json_response()
+            response.etag = "v1"
+            response.cache_control.public = True
+            return response
+
+        tween = make_tween(public_response)
+        request = Request.blank("/api/decks/1", headers={"Accept-Encoding": "gzip"})
+
+        first = tween(request)
+        hits = COMPRESSED.hits
+        second = tween(request)
+
+        assert len(calls) == 2
+        assert COMPRESSED.hits == hits + 1
+        assert second.body == first.body and gzip.decompress(second.body) == BODY
+        assert second.headers["ETag"] == 'W/"v1"'
+
+    def test_does_not_cache_private_responses(self):
+        """Test responses of private decks are compressed every time and never stored."""
+
+        def private_response():
+            response = json_response()
+            response.etag = "v1"
+            response.cache_control.private = True
+            return response
+
+        make_tween(private_response)(Request.blank("/", headers={"Accept-Encoding": "gzip"}))
+
+        assert len(COMPRESSED) == 0
+
+    def test_skips_errors_and_head(self):
+        """Test only successful GET responses are compressed."""
+        error = make_tween(lambda: json_response(status=500))(Request.blank("/", headers={"Accept-Encoding": "gzip"}))
+        head = make_tween(json_response)(Request.blank("/", method="HEAD", headers={"Accept-Encoding": "gzip"}))
+
+        assert error.content_encoding is None
+        assert head.content_encoding is None
+
+    def test_prefers_brotli_when_available(self):
+        """Test brotli is picked over gzip when the package is installed."""
+        brotli = pytest.importorskip("brotli")
+
+        response = make_tween(json_response)(Request.blank("/", headers={"Accept-Encoding": "gzip, br"}))
+
+        assert response.content_encoding == "br"
+        assert brotli.decompress(response.body) == BODY
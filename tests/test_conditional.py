@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from webob import Request
+
+from flashly.conditional import deck_etag, is_conditional, not_modified
+
+UPDATED_AT = datetime(2024, 1, 2, 3, 4, 5, 678000)
+
+
+class TestNotModified:
+    """Test cases for deciding 304 responses from a deck's version."""
+
+    def test_matching_etag(self):
+        """Test a matching If-None-Match gets a 304 carrying the validators."""
+        request = Request.blank("/", headers={"If-None-Match": f'"other", "{deck_etag("deck", UPDATED_AT)}"'})
+
+        response = not_modified(request, "deck", UPDATED_AT)
+
+        assert response.status_code == 304
+        assert response.headers["Last-Modified"] == "Tue, 02 Jan 2024 03:04:05 GMT"
+
+    def test_etag_takes_precedence_over_date(self):
+        """Test a stale ETag is not rescued by a recent If-Modified-Since."""
+        request = Request.blank(
+            "/", headers={"If-None-Match": '"stale"', "If-Modified-Since": "Wed, 03 Jan 2024 00:00:00 GMT"}
+        )
+
+        assert is_conditional(request)
+        assert not_modified(request, "deck", UPDATED_AT) is None
+
+    def test_modified_since(self):
+        """Test If-Modified-Since compares at the one second resolution of HTTP dates."""
+        current = Request.blank("/", headers={"If-Modified-Since": "Tue, 02 Jan 2024 03:04:05 GMT"})
+        stale = Request.blank("/", headers={"If-Modified-Since": "Tue, 02 Jan 2024 03:04:04 GMT"})
+
+        assert not_modified(current, "deck", UPDATED_AT).status_code == 304
+        assert not_modified(stale, "deck", UPDATED_AT) is None
+        assert not is_conditional(Request.blank("/"))
@@ -0,0 +1,89 @@
+import threading
+
+import bcrypt
+import pytest
+
+from flashly.hashing import HashingBusy, PasswordHasher, calibrate, rounds_of
+
+
+class TestPasswordHasher:
+    """Test cases for hashing passwords off the request threads."""
+
+    def test_hash_and_check_inline(self):
+        """Test hashes use the configured cost and check against the password."""
+        hasher = PasswordHasher(rounds=4)
+
+        hashed = hasher.hash("secret1")
+
+        assert rounds_of(hashed) == 4
+        assert hasher.check("secret1", hashed) is True
+        assert hasher.check("secret2", hashed) is False
+
+    def test_hash_in_worker_process(self):
+        """Test hashes made by the worker processes are regular bcrypt hashes."""
+        hasher = PasswordHasher(rounds=4, workers=1)
+        try:
+            hashed = hasher.hash("secret1")
+
+            assert bcrypt.checkpw(b"secret1", hashed.encode("utf-8"))
+            assert hasher.check("secret1", hashed) is True
+        finally:
+            hasher.shutdown()
+
+    def test_needs_rehash_when_cost_changes(self):
+        """Test hashes made with another cost than the configured one are flagged."""
+        hasher = PasswordHasher(rounds=4)
+        hashed = hasher.hash("secret1")
+
+        assert hasher.needs_rehash(hashed) is False
+        hasher.configure(rounds=5, workers=0, max_pending=0, timeout=1)
+        assert hasher.needs_rehash(hashed) is True
+
+    def test_needs_rehash_only_upgrades(self):
+        """Test hashes made with a higher cost than the configured one are kept."""
+        hasher = PasswordHasher(rounds=5)
+        hashed = hasher.hash("secret1")
+
+        hasher.configure(rounds=4, workers=0, max_pending=0, timeout=1)
+        assert hasher.needs_rehash(hashed) is False
+
+    def test_replaces_a_broken_worker_pool(self):
+        """Test a hash still succeeds after the worker processes died."""
+        hasher = PasswordHasher(rounds=4, workers=1)
+        try:
+            hasher.hash("secret1")
+            broken = hasher._executor
+            for process in list(broken._processes.values()):
+                process.kill()
+                process.join()
+
+            assert hasher.check("secret1", hasher.hash("secret1")) is True
+            assert hasher._executor is not broken
+        finally:
+            hasher.shutdown()
+
+    def test_slots_are_bounded_and_reentrant(self):
+        """Test callers beyond the slots give up after the timeout, while the holder can still hash."""
+        hasher = PasswordHasher(rounds=4, workers=0, max_pending=0, timeout=0.01)
+        errors = []
+
+        def other_thread():
+            try:
+                hasher.hash("secret1")
+            except HashingBusy as e:
+                errors.append(e)
+
+        with hasher.slot():
+            assert hasher.check("secret1", hasher.hash("secret1")) is True
+            thread = threading.Thread(target=other_thread)
+            thread.start()
+            thread.join()
+
+        assert len(errors) == 1
+        assert rounds_of(hasher.hash("secret1")) == 4
+
+
+@pytest.mark.parametrize("target_ms, expected", [(0.000001, 4), (1e9, 6)])
+def test_calibrate_stays_within_bounds(target_ms, expected):
+    """Test calibration picks the lowest cost for tiny targets and the highest for huge ones."""
+    assert calibrate(target_ms, min_rounds=4, max_rounds=6) == expected
@@ -0,0 +1,96 @@
+import time
+import uuid
+
+import psycopg2
+import pytest
+
+from flashly.cache import DECK_ACL, DECK_METADATA
+from flashly.invalidation import InvalidationListener
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def committed_deck(pg_dsn):
+    """A deck committed to the local Postgres test database, so its notifications are delivered."""
+    conn = psycopg2.connect(pg_dsn)
+    owner_id, deck_id = str(uuid.uuid4()), str(uuid.uuid4())
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+            VALUES (%s, 'Listen', 'Owner', %s, %s, 'x')
+            """,
+            (owner_id, f"listen_{owner_id}", f"listen_{owner_id}@example.com"),
+        )
+        cur.execute(
+            """
+            INSERT INTO decks (id, name, description, publish_status, owner_id, rating)
+            VALUES (%s, 'Listen deck', '', 'public', %s, 0.0)
+            """,
+            (deck_id, owner_id),
+        )
+    conn.commit()
+    yield conn, deck_id
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM users WHERE id = %s", (owner_id,))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def listener(pg_dsn):
+    listener = InvalidationListener(lambda: psycopg2.connect(pg_dsn), poll_interval=0.1, reconnect_delay=0.05)
+    listener.start()
+    assert listener.connected.wait(5)
+    yield listener
+    listener.stop(5)
+
+
+class TestInvalidationListener:
+    """Test cases for cross-worker cache invalidation over LISTEN/NOTIFY against the local Postgres test database."""
+
+    def test_committed_deck_writes_evict_cached_entries(self, listener, committed_deck):
+        """Test a write committed on another connection evicts the deck from every cache, and only that deck."""
+        conn, deck_id = committed_deck
+        other_id = str(uuid.uuid4())
+        DECK_ACL.set(deck_id, ("owner", "public", None, "Listen deck"))
+        DECK_METADATA.set(deck_id, {"id": deck_id})
+        DECK_METADATA.set(other_id, {"id": other_id})
+
+        with conn.cursor() as cur:
+            cur.execute("UPDATE decks SET name = 'Renamed' WHERE id = %s", (deck_id,))
+            # Nothing is delivered before the commit
+            time.sleep(0.2)
+            assert DECK_ACL.get(deck_id) is not None
+        conn.commit()
+
+        assert wait_for(lambda: DECK_ACL.get(deck_id) is None and DECK_METADATA.get(deck_id) is None)
+        assert DECK_METADATA.get(other_id) == {"id": other_id}
+
+    def test_reconnects_and_clears_caches(self, listener, committed_deck, pg_dsn):
+        """Test the listener comes back after its backend is killed, clears what it may have missed and keeps evicting."""
+        conn, deck_id = committed_deck
+        DECK_METADATA.set("stale", {"id": "stale"})
+        killed_pid = listener.backend_pid
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_terminate_backend(%s)", (killed_pid,))
+        conn.commit()
+
+        assert wait_for(lambda: listener.connected.is_set() and listener.backend_pid != killed_pid)
+        assert DECK_METADATA.get("stale") is None
+
+        DECK_ACL.set(deck_id, ("owner", "public", None, "Listen deck"))
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM decks WHERE id = %s", (deck_id,))
+        conn.commit()
+
+        assert wait_for(lambda: DECK_ACL.get(deck_id) is None)
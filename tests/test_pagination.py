@@ -0,0 +1,82 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from flashly.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    InvalidPageError,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+    parse_decimal,
+    parse_limit,
+    parse_timestamp,
+    parse_uuid,
+)
+
+SORT_KEY = (parse_decimal, parse_timestamp, parse_uuid)
+
+
+class TestPagination:
+    """Test cases for keyset pagination helpers."""
+
+    def test_cursor_round_trip(self):
+        """Test a cursor decodes to the sort key it was built from."""
+        deck_id = uuid.uuid4()
+        created_at = datetime(2024, 5, 1, 8, 30, 0)
+
+        cursor = encode_cursor((Decimal("4.5"), created_at, deck_id))
+
+        assert decode_cursor(cursor, SORT_KEY) == (Decimal("4.5"), created_at, str(deck_id))
+
+    def test_decode_no_cursor(self):
+        """Test the first page has no cursor."""
+        assert decode_cursor(None, SORT_KEY) is None
+        assert decode_cursor("", SORT_KEY) is None
+
+    def test_decode_invalid_cursor(self):
+        """Test garbage and wrongly sized cursors are rejected."""
+        with pytest.raises(InvalidPageError):
+            decode_cursor("%%%", SORT_KEY)
+
+        with pytest.raises(InvalidPageError):
+            decode_cursor(encode_cursor(("a", "b")), SORT_KEY)
+
+    def test_decode_tampered_values(self):
+        """Test each value must parse as the type of its sort key."""
+        deck_id = str(uuid.uuid4())
+        for values in [
+            ("x", "2024-05-01T08:30:00", deck_id),
+            ("NaN", "2024-05-01T08:30:00", deck_id),
+            (True, "2024-05-01T08:30:00", deck_id),
+            (4.5, 1714552200, deck_id),
+            (4.5, "2024-05-01T08:30:00", "id"),
+            (4.5, "2024-05-01T08:30:00", None),
+        ]:
+            with pytest.raises(InvalidPageError):
+                decode_cursor(encode_cursor(values), SORT_KEY)
+
+    def test_parse_limit(self):
+        """Test limit defaults, clamping and validation."""
+        assert parse_limit(None) == DEFAULT_PAGE_LIMIT
+        assert parse_limit("5") == 5
+        assert parse_limit(str(MAX_PAGE_LIMIT + 50)) == MAX_PAGE_LIMIT
+
+        for limit in ["0", "-1", "ten"]:
+            with pytest.raises(InvalidPageError):
+                parse_limit(limit)
+
+    def test_paginate(self):
+        """Test paginate trims the extra row and builds the next cursor."""
+        rows = [(1, "a"), (2, "b"), (3, "c")]
+
+        page, next_cursor = paginate(rows, 2, lambda row: (row[0],))
+        assert page == rows[:2]
+        assert decode_cursor(next_cursor, (parse_decimal,)) == (2,)
+
+        page, next_cursor = paginate(rows, 3, lambda row: (row[0],))
+        assert page == rows
+        assert next_cursor is None
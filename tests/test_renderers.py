@@ -0,0 +1,74 @@
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from pyramid import testing
+from pyramid.renderers import RendererHelper
+from pyramid.testing import DummyRequest
+
+from flashly.models.card import serialize_single_card_tuple
+from flashly.models.deck import serialize_single_deck_tuple
+from flashly.models.rows import CardRow, DeckSummaryRow
+from flashly.renderers import JSONRenderer, dumps
+
+CREATED_AT = datetime(2024, 1, 2, 3, 4, 5, 678000)
+
+
+class TestDumps:
+    """Test cases for encoding values of psycopg2 rows natively."""
+
+    def test_encodes_like_str_and_isoformat(self):
+        """Test UUIDs, datetimes and decimals read as the strings and floats the serializers used to build."""
+        card_id = uuid.uuid4()
+
+        encoded = dumps({"id": card_id, "created_at": CREATED_AT, "rating": Decimal("4.5"), 1: None})
+
+        assert json.loads(encoded) == {
+            "id": str(card_id),
+            "created_at": CREATED_AT.isoformat(),
+            "rating": 4.5,
+            "1": None,
+        }
+
+    def test_rejects_unknown_types(self):
+        """Test values without a JSON form still fail loudly."""
+        with pytest.raises(TypeError):
+            dumps({"value": object()})
+
+    def test_serialized_rows_keep_their_format(self):
+        """Test cards and decks serialized from raw rows encode to the same JSON as before."""
+        card = CardRow("c1", "Front", "Back", "easy", 3, Decimal("66.67"), "d1", CREATED_AT, None)
+        deck = DeckSummaryRow("d1", "Deck", "", Decimal("4.0"), CREATED_AT, CREATED_AT, "owner", 12)
+
+        assert json.loads(dumps(serialize_single_card_tuple(card))) == {
+            "id": "c1",
+            "front_text": "Front",
+            "back_text": "Back",
+            "difficulty": "easy",
+            "times_reviewed": 3,
+            "success_rate": 66.67,
+            "deck_id": "d1",
+            "created_at": "2024-01-02T03:04:05.678000",
+            "updated_at": None,
+        }
+        assert json.loads(dumps(serialize_single_deck_tuple(deck)))["rating"] == 4.0
+
+
+class TestJSONRenderer:
+    """Test cases for the orjson json renderer."""
+
+    def test_renders_bytes_with_json_content_type(self):
+        """Test the renderer replaces the built-in json one and sets the content type."""
+        config = testing.setUp()
+        try:
+            config.add_renderer("json", JSONRenderer())
+            helper = RendererHelper("json", registry=config.registry)
+
+            response = helper.render_to_response({"created_at": CREATED_AT}, None, request=DummyRequest())
+        finally:
+            testing.tearDown()
+
+        assert response.content_type == "application/json"
+        assert response.body == b'{"created_at":"2024-01-02T03:04:05.678000"}'
@@ -0,0 +1,89 @@
+import pytest
+from pyramid import testing
+from webob import Request
+
+from flashly.schemas import (
+    ChangePasswordBody,
+    CreateCardBody,
+    InvalidBody,
+    RegisterBody,
+    UpdateCardBody,
+    UpdateDeckBody,
+    decode_body,
+)
+
+
+def make_request(body, settings=None):
+    request = Request.blank("/", method="POST", body=body)
+    request.registry = testing.DummyResource(settings=settings or {})
+    return request
+
+
+def decode(body: bytes, schema, settings=None):
+    return decode_body(make_request(body, settings), schema)
+
+
+class TestDecodeBody:
+    """Test cases for decoding request bodies into schemas."""
+
+    def test_decodes_and_normalizes(self):
+        """Test camelCase keys map to fields, values are stripped and defaults filled in."""
+        card = decode(b'{"frontText": "  Question ", "backText": "Answer", "extra": 1}', CreateCardBody)
+
+        assert (card.front_text, card.back_text, card.difficulty) == ("Question", "Answer", "easy")
+
+    def test_lists_every_missing_field(self):
+        """Test absent and whitespace-only fields are reported together, in the usual format."""
+        with pytest.raises(InvalidBody, match="^Missing required fields: firstName, username, password$"):
+            decode(b'{"lastName": "Doe", "username": "  ", "email": "a@b.c"}', RegisterBody)
+
+    def test_rejects_invalid_json_and_types(self):
+        """Test malformed JSON and values of the wrong type are 400 errors."""
+        with pytest.raises(InvalidBody, match="^Invalid JSON$") as malformed:
+            decode(b'{"frontText": ', CreateCardBody)
+        with pytest.raises(InvalidBody, match=r"Expected `str`, got `int` - at `\$.frontText`"):
+            decode(b'{"frontText": 1, "backText": "A"}', CreateCardBody)
+        with pytest.raises(InvalidBody, match="Expected `object`, got `array`"):
+            decode(b"[]", CreateCardBody)
+
+        assert malformed.value.status_code == 400
+
+    def test_refuses_large_bodies_before_parsing(self):
+        """Test bodies over request.max_body_size are a 413, whether or not they carry a Content-Length."""
+        body = b'{"name": "' + b"x" * 100 + b'"}'
+        request = make_request(body, {"request.max_body_size": "64"})
+
+        with pytest.raises(InvalidBody, match="At most 64 bytes") as error:
+            decode_body(request, UpdateDeckBody)
+        assert error.value.status_code == 413
+
+        request.content_length = None
+        with pytest.raises(InvalidBody):
+            decode_body(request, UpdateDeckBody)
+
+    def test_max_size_overrides_the_setting(self):
+        """Test views accepting larger bodies can raise the limit for themselves."""
+        body = b'{"name": "' + b"x" * 100 + b'"}'
+        request = make_request(body, {"request.max_body_size": "64"})
+
+        assert decode_body(request, UpdateDeckBody, max_size=1024).name == "x" * 100
+
+    def test_partial_updates(self):
+        """Test partial bodies leave absent fields as None and still validate the others."""
+        deck = decode(b'{"description": " New "}', UpdateDeckBody)
+        card = decode(b'{"frontText": "", "difficulty": "hard"}', UpdateCardBody)
+
+        assert (deck.name, deck.description, deck.publish_status) == (None, "New", None)
+        assert (card.front_text, card.back_text, card.difficulty) == (None, None, "hard")
+        with pytest.raises(InvalidBody, match="^Name cannot be empty$"):
+            decode(b'{"name": "  "}', UpdateDeckBody)
+        with pytest.raises(InvalidBody, match="^Invalid publish status. Must be one of: private, public$"):
+            decode(b'{"publishStatus": "shared"}', UpdateDeckBody)
+
+    def test_passwords_are_not_stripped(self):
+        """Test password fields are kept as sent."""
+        body = decode(b'{"currentPassword": " old ", "newPassword": "  new  "}', ChangePasswordBody)
+
+        assert (body.current_password, body.new_password) == (" old ", "  new  ")
+        with pytest.raises(InvalidBody, match="^New password must be at least 6 characters long$"):
+            decode(b'{"currentPassword": "old", "newPassword": "short"}', ChangePasswordBody)
@@ -0,0 +1,173 @@
+import json
+from collections import namedtuple
+from unittest.mock import MagicMock, Mock
+
+import pytest
+from pyramid.renderers import RendererHelper
+from pyramid import testing
+from pyramid.testing import DummyRequest
+
+from flashly.renderers import dumps
+from flashly.streaming import (
+    JSONStreamRenderer,
+    ServerSideRows,
+    StreamingBody,
+    close_with_body,
+    encode_chunks,
+    iter_json,
+)
+
+
+@pytest.fixture
+def mock_pool():
+    pool = Mock()
+    conn = MagicMock()
+    cursor = conn.cursor.return_value.__enter__.return_value
+    cursor.__iter__.return_value = iter([(1,), (2,), (3,)])
+    pool.getconn.return_value = conn
+    return pool
+
+
+class TestServerSideRows:
+    """Test cases for iterating over a query through a named cursor."""
+
+    def test_checks_out_connection_up_front(self, mock_pool):
+        """Test the connection is taken when the rows are created, before iteration."""
+        rows = ServerSideRows(mock_pool, "SELECT 1")
+
+        mock_pool.getconn.assert_called_once()
+        assert rows.connection is mock_pool.getconn.return_value
+
+    def test_iterates_named_cursor_in_batches(self, mock_pool):
+        """Test rows come from a named cursor fetching batch_size rows per round trip."""
+        rows = ServerSideRows(mock_pool, "SELECT * FROM cards WHERE deck_id = %s", ("deck",), batch_size=50)
+        conn = mock_pool.getconn.return_value
+
+        assert list(rows) == [(1,), (2,), (3,)]
+        assert conn.cursor.call_args.kwargs["name"].startswith("stream_")
+        cursor = conn.cursor.return_value.__enter__.return_value
+        assert cursor.itersize == 50
+        cursor.execute.assert_called_once_with("SELECT * FROM cards WHERE deck_id = %s", ("deck",))
+
+    def test_builds_row_type(self, mock_pool):
+        """Test rows are built as row_type instances when one is given."""
+        Row = namedtuple("Row", ["value"])
+
+        rows = list(ServerSideRows(mock_pool, "SELECT value FROM t", row_type=Row))
+
+        assert rows == [(1,), (2,), (3,)]
+        assert [row.value for row in rows] == [1, 2, 3]
+
+    def test_close_returns_connection_once(self, mock_pool):
+        """Test close gives the connection back to the pool, even when it was never iterated."""
+        rows = ServerSideRows(mock_pool, "SELECT 1")
+
+        rows.close()
+        rows.close()
+
+        mock_pool.putconn.assert_called_once_with(mock_pool.getconn.return_value)
+        assert list(rows) == []
+
+
+class TestEncodeChunks:
+    """Test cases for grouping encoded parts into chunks."""
+
+    def test_groups_parts_up_to_flush_size(self):
+        """Test parts are joined until flush_size bytes and the rest is flushed at the end."""
+        chunks = list(encode_chunks(["ab", "cd", "é", "f"], flush_size=4))
+
+        assert chunks == [b"abcd", "éf".encode("utf-8")]
+
+    def test_empty_input_yields_nothing(self):
+        """Test an empty iterator produces no chunk."""
+        assert list(encode_chunks([])) == []
+
+
+class TestStreamingBody:
+    """Test cases for the closing WSGI app_iter."""
+
+    def test_close_closes_chunks_and_sources(self):
+        """Test close stops the chunk generator and closes every source."""
+        source = Mock()
+        chunks = encode_chunks(iter(["a", "b"]), flush_size=1)
+        body = StreamingBody(chunks, source)
+
+        assert next(iter(body)) == b"a"
+        body.close()
+
+        source.close.assert_called_once()
+        assert list(chunks) == []
+
+
+class TestIterJson:
+    """Test cases for incremental JSON encoding."""
+
+    def test_matches_dumps(self):
+        """Test iterators encode exactly like the lists they stand for."""
+        cards = [{"id": str(i), "front_text": f"Q{i}", "tags": ["a", "b"]} for i in range(3)]
+        envelope = {"message": "ok", "cards": iter(cards), "deck_info": {"id": "d", "card_count": 3}}
+
+        encoded = b"".join(iter_json(envelope))
+
+        assert encoded == dumps({"message": "ok", "cards": cards, "deck_info": {"id": "d", "card_count": 3}})
+
+    def test_nested_iterators(self):
+        """Test iterators inside streamed items and inside nested dicts are streamed too."""
+        value = {"decks": ({"id": i, "cards": iter(range(i))} for i in range(3)), "empty": iter([])}
+
+        assert json.loads(b"".join(iter_json(value))) == {
+            "decks": [{"id": 0, "cards": []}, {"id": 1, "cards": [0]}, {"id": 2, "cards": [0, 1]}],
+            "empty": [],
+        }
+
+
+@pytest.fixture
+def renderer_config():
+    config = testing.setUp()
+    yield config
+    testing.tearDown()
+
+
+class TestJSONStreamRenderer:
+    """Test cases for the json_stream renderer."""
+
+    def test_streams_json_in_flush_sized_chunks(self, renderer_config):
+        """Test the body is a streamed app_iter with a JSON content type."""
+        renderer_config.add_renderer("json_stream", JSONStreamRenderer(flush_size=32))
+        rows = ({"id": i, "text": "x" * 10} for i in range(20))
+
+        helper = RendererHelper("json_stream", registry=renderer_config.registry)
+        response = helper.render_to_response({"message": "ok", "cards": rows}, None, request=DummyRequest())
+        chunks = list(response.app_iter)
+
+        assert response.content_type == "application/json"
+        assert len(chunks) > 1
+        assert all(len(chunk) >= 32 for chunk in chunks[:-1])
+        assert json.loads(b"".join(chunks))["cards"][-1] == {"id": 19, "text": "x" * 10}
+
+    def test_closes_sources_with_body(self, renderer_config):
+        """Test sources registered by the view are closed once the server is done with the body."""
+        renderer_config.add_renderer("json_stream", JSONStreamRenderer())
+        request = DummyRequest()
+        source = Mock()
+        close_with_body(request, source)
+
+        helper = RendererHelper("json_stream", registry=renderer_config.registry)
+        response = helper.render_to_response({"cards": iter([1, 2])}, None, request=request)
+
+        assert json.loads(b"".join(response.app_iter)) == {"cards": [1, 2]}
+        source.close.assert_not_called()
+        response.app_iter.close()
+        source.close.assert_called_once_with()
+
+    def test_keeps_explicit_content_type(self, renderer_config):
+        """Test a content type set by the view is not overridden."""
+        renderer_config.add_renderer("json_stream", JSONStreamRenderer())
+        request = DummyRequest()
+        request.response.content_type = "application/vnd.flashly+json"
+
+        helper = RendererHelper("json_stream", registry=renderer_config.registry)
+        response = helper.render_to_response({"error": "Deck not found"}, None, request=request)
+
+        assert response.content_type == "application/vnd.flashly+json"
+        assert json.loads(b"".join(response.app_iter)) == {"error": "Deck not found"}
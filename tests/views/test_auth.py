@@ -1,7 +1,10 @@
+import threading
 import uuid
 from unittest.mock import Mock, patch
 import pytest
 
+from flashly.hashing import PasswordHasher, rounds_of
+from flashly.models.user import UserModel
 from flashly.views.auth import register, login
 
 
@@ -126,6 +129,7 @@ class TestUserViews:
         with (
             patch("flashly.models.user.UserModel.find_by_email") as mock_find_email,
             patch("flashly.models.user.UserModel.find_by_username") as mock_find_username,
+            patch("flashly.models.user.UserModel.set_password") as mock_set_password,
         ):
 
             mock_find_email.return_value = None
@@ -135,6 +139,8 @@ class TestUserViews:
 
             assert result["error"] == "Email or username already taken"
             assert mock_request.response.status == 400
+            # Taken names are refused before the password is hashed
+            mock_set_password.assert_not_called()
 
     def test_login_success(self, mock_request):
         """Test successful login."""
@@ -214,3 +220,49 @@ class TestUserViews:
 
             assert result["user"]["firstName"] == "John"  # Should be title case
             assert result["user"]["lastName"] == "Doe"  # Should be title case
+
+    def test_login_rehashes_outdated_hash(self, mock_request):
+        """Test a hash made with an older cost is replaced after a successful login."""
+        mock_request.json_body = {"email": "john@example.com", "password": "password123"}
+        user = UserModel(uuid.uuid4(), "John", "Doe", "johndoe", "john@example.com", "", None, None)
+
+        with (
+            patch("flashly.views.auth.HASHER", PasswordHasher(rounds=4)) as hasher,
+            patch("flashly.models.user.HASHER", hasher),
+            patch("flashly.models.user.UserModel.find_by_email") as mock_find,
+            patch("flashly.models.user.UserModel.update_password") as mock_update,
+        ):
+            user.set_password("password123")
+            mock_find.return_value = user
+            hasher.configure(rounds=5, workers=0, max_pending=0, timeout=1)
+
+            result = login(mock_request)
+
+            assert result["message"] == "Login successful"
+            assert rounds_of(user.password_hash) == 5
+            mock_update.assert_called_once_with(mock_request.db_conn)
+
+            mock_update.reset_mock()
+            login(mock_request)
+            mock_update.assert_not_called()
+
+    def test_login_busy(self, mock_request):
+        """Test logins that get no hashing slot in time are a 503, before any database access."""
+        mock_request.json_body = {"email": "john@example.com", "password": "password123"}
+        mock_request.response.headers = {}
+        hasher = PasswordHasher(rounds=4, workers=0, max_pending=0, timeout=0.01)
+        results = []
+
+        with (
+            patch("flashly.views.auth.HASHER", hasher),
+            patch("flashly.models.user.UserModel.find_by_email") as mock_find,
+        ):
+            with hasher.slot():
+                thread = threading.Thread(target=lambda: results.append(login(mock_request)))
+                thread.start()
+                thread.join()
+
+        assert results == [{"error": "Too many sign-in attempts, please try again"}]
+        assert mock_request.response.status == 503
+        assert mock_request.response.headers["Retry-After"] == "1"
+        mock_find.assert_not_called()
@@ -1,30 +1,31 @@
+import io
 import uuid
 from datetime import datetime
 from unittest.mock import patch
 import pytest
 
-from flashly.views.card import get_cards, create_card
+from flashly.conditional import deck_etag
+from flashly.models.card_import import CardImportError
+from flashly.models.rows import CardRow, DeckAclRow
+from flashly.schemas import MAX_BULK_BODY_SIZE, MAX_BULK_CARDS
+from flashly.views.card import bulk_create_cards, get_cards, create_card, import_deck_cards
 
 
 class TestCardViews:
     """Test cases for card view functions."""
 
-    def test_get_cards_success(self, mock_request):
+    def test_get_cards_success(self, mock_request, render_json):
         """Test successfully getting cards from a public deck."""
         deck_id = str(uuid.uuid4())
         mock_request.matchdict = {"deck_id": deck_id}
         mock_request.params = {}
 
         # Mock deck data (public deck)
-        mock_deck_data = (
-            uuid.uuid4(),  # id
-            "Test Deck",  # name
-            "Description",  # description
-            "public",  # publish_status
+        mock_deck_data = DeckAclRow(
             uuid.uuid4(),  # owner_id
-            4.5,  # rating
-            datetime.now(),  # created_at
+            "public",  # publish_status
             datetime.now(),  # updated_at
+            "Test Deck",  # name
         )
 
         # Mock card data
@@ -33,64 +34,67 @@ class TestCardViews:
             (uuid.uuid4(), "Front 2", "Back 2", "medium", 3, 0.6, deck_id, datetime.now(), datetime.now()),
         ]
 
+        # Rows come from a server-side cursor on the connection the stream checks out
+        stream_conn = mock_request.db_read_pool.getconn.return_value
+        stream_conn.cursor.return_value.__enter__.return_value.__iter__.return_value = iter(mock_card_data)
+
+        version = datetime(2024, 1, 1, 12, 0)
+
         with (
-            patch("flashly.models.deck.DeckModel.find_deck_by_id") as mock_find_deck,
-            patch("flashly.models.card.CardModel.find_cards_by_deck_id") as mock_find_cards,
-            patch("flashly.models.card.serialize_card_data") as mock_serialize,
+            patch("flashly.models.deck.DeckModel.find_deck_version") as mock_find_version,
+            patch("flashly.models.deck.DeckModel.find_deck_acl") as mock_find_deck,
         ):
-
+            mock_find_version.return_value = version
             mock_find_deck.return_value = mock_deck_data
-            mock_find_cards.return_value = mock_card_data
-            mock_serialize.return_value = [{"id": "card1"}, {"id": "card2"}]
 
-            result = get_cards(mock_request)
+            result = render_json(get_cards(mock_request))
 
             assert "message" in result
-            assert "cards" in result
-            assert "deck_info" in result
-            assert len(result["cards"]) == 2
-
-    def test_get_cards_deck_not_found(self, mock_request):
+            assert [card["front_text"] for card in result["cards"]] == ["Front 1", "Front 2"]
+            assert result["deck_info"]["card_count"] == 2
+            # The deck is checked on the stream's connection, no other one is checked out
+            mock_find_deck.assert_called_once_with(stream_conn, deck_id, fill_cache=True, version=version)
+            mock_request.db_read_pool.getconn.assert_called_once_with()
+            # The validators come from the current version, not from the ACL's updated_at
+            assert mock_request.response.etag == deck_etag(deck_id, version)
+
+    def test_get_cards_deck_not_found(self, mock_request, render_json):
         """Test getting cards from non-existent deck."""
         deck_id = str(uuid.uuid4())
         mock_request.matchdict = {"deck_id": deck_id}
         mock_request.params = {}
 
-        with patch("flashly.models.deck.DeckModel.find_deck_by_id") as mock_find_deck:
+        with patch("flashly.models.deck.DeckModel.find_deck_acl") as mock_find_deck:
             mock_find_deck.return_value = None
 
-            result = get_cards(mock_request)
+            result = render_json(get_cards(mock_request))
 
             assert result["error"] == "Deck not found"
             assert mock_request.response.status_code == 404
 
-    def test_get_cards_private_deck_no_token(self, mock_request):
+    def test_get_cards_private_deck_no_token(self, mock_request, render_json):
         """Test accessing private deck without token."""
         deck_id = str(uuid.uuid4())
         mock_request.matchdict = {"deck_id": deck_id}
         mock_request.params = {}
 
         # Mock private deck data
-        mock_deck_data = (
-            uuid.uuid4(),  # id
-            "Private Deck",  # name
-            "Description",  # description
-            "private",  # publish_status
+        mock_deck_data = DeckAclRow(
             uuid.uuid4(),  # owner_id
-            4.5,  # rating
-            datetime.now(),  # created_at
+            "private",  # publish_status
             datetime.now(),  # updated_at
+            "Private Deck",  # name
         )
 
-        with patch("flashly.models.deck.DeckModel.find_deck_by_id") as mock_find_deck:
+        with patch("flashly.models.deck.DeckModel.find_deck_acl") as mock_find_deck:
             mock_find_deck.return_value = mock_deck_data
 
-            result = get_cards(mock_request)
+            result = render_json(get_cards(mock_request))
 
             assert result["error"] == "Access denied. This is a private deck."
             assert mock_request.response.status_code == 403
 
-    def test_get_cards_private_deck_with_valid_token(self, mock_request):
+    def test_get_cards_private_deck_with_valid_token(self, mock_request, render_json):
         """Test accessing private deck with valid owner token."""
         deck_id = str(uuid.uuid4())
         owner_id = uuid.uuid4()
@@ -99,35 +103,22 @@ class TestCardViews:
         mock_request.params = {"token": str(owner_id)}
 
         # Mock private deck data
-        mock_deck_data = (
-            uuid.uuid4(),  # id
-            "Private Deck",  # name
-            "Description",  # description
-            "private",  # publish_status
+        mock_deck_data = DeckAclRow(
             owner_id,  # owner_id
-            4.5,  # rating
-            datetime.now(),  # created_at
+            "private",  # publish_status
             datetime.now(),  # updated_at
+            "Private Deck",  # name
         )
 
-        mock_card_data = []
-
-        with (
-            patch("flashly.models.deck.DeckModel.find_deck_by_id") as mock_find_deck,
-            patch("flashly.models.card.CardModel.find_cards_by_deck_id") as mock_find_cards,
-            patch("flashly.models.card.serialize_card_data") as mock_serialize,
-        ):
-
+        with patch("flashly.models.deck.DeckModel.find_deck_acl") as mock_find_deck:
             mock_find_deck.return_value = mock_deck_data
-            mock_find_cards.return_value = mock_card_data
-            mock_serialize.return_value = []
 
-            result = get_cards(mock_request)
+            result = render_json(get_cards(mock_request))
 
-            assert "cards" in result
-            assert "deck_info" in result
+            assert result["cards"] == []
+            assert result["deck_info"]["card_count"] == 0
 
-    def test_get_cards_private_deck_with_invalid_token(self, mock_request):
+    def test_get_cards_private_deck_with_invalid_token(self, mock_request, render_json):
         """Test accessing private deck with invalid token."""
         deck_id = str(uuid.uuid4())
         owner_id = uuid.uuid4()
@@ -137,24 +128,22 @@ class TestCardViews:
         mock_request.params = {"token": wrong_token}
 
         # Mock private deck data
-        mock_deck_data = (
-            uuid.uuid4(),  # id
-            "Private Deck",  # name
-            "Description",  # description
-            "private",  # publish_status
+        mock_deck_data = DeckAclRow(
             owner_id,  # owner_id (different from token)
-            4.5,  # rating
-            datetime.now(),  # created_at
+            "private",  # publish_status
             datetime.now(),  # updated_at
+            "Private Deck",  # name
         )
 
-        with patch("flashly.models.deck.DeckModel.find_deck_by_id") as mock_find_deck:
+        with patch("flashly.models.deck.DeckModel.find_deck_acl") as mock_find_deck:
             mock_find_deck.return_value = mock_deck_data
 
-            result = get_cards(mock_request)
+            result = render_json(get_cards(mock_request))
 
             assert result["error"] == "Access denied. This is a private deck."
             assert mock_request.response.status_code == 403
+            # The stream's connection goes back to the pool right away
+            mock_request.db_read_pool.putconn.assert_called_once_with(mock_request.db_read_pool.getconn.return_value)
 
     def test_create_card_success(self, mock_request):
         """Test successfully creating a card."""
@@ -169,27 +158,30 @@ class TestCardViews:
             "difficulty": "medium",
         }
 
-        # Mock deck data
-        mock_deck_data = (
+        # Mock the inserted card row
+        mock_card_data = CardRow(
             uuid.uuid4(),  # id
-            "Test Deck",  # name
-            "Description",  # description
-            "public",  # publish_status
-            owner_id,  # owner_id
-            4.5,  # rating
+            "What is Python?",  # front_text
+            "A programming language",  # back_text
+            "medium",  # difficulty
+            0,  # times_reviewed
+            0.0,  # success_rate
+            deck_id,  # deck_id
             datetime.now(),  # created_at
             datetime.now(),  # updated_at
         )
 
-        with (patch("flashly.models.deck.DeckModel.find_deck_by_id") as mock_find_deck,):
-
-            mock_find_deck.return_value = mock_deck_data
+        with patch("flashly.models.card.CardModel.create_for_owner") as mock_create:
+            mock_create.return_value = mock_card_data
 
             result = create_card(mock_request)
 
-            # Note: This test may need adjustment based on the actual create_card implementation
-            # as the full function wasn't provided in the file read
-            assert isinstance(result, dict)
+            assert result["message"] == "Card successfully created"
+            assert result["card"]["front_text"] == "What is Python?"
+            assert result["card"]["difficulty"] == "medium"
+            args = mock_create.call_args[0]
+            assert args[1:3] == (deck_id, str(owner_id))
+            assert args[4:] == ("What is Python?", "A programming language", "medium")
 
     @pytest.mark.skip(reason="Complex JSON body property mocking - framework behavior")
     def test_create_card_invalid_json(self, mock_request):
@@ -215,8 +207,12 @@ class TestCardViews:
         mock_request.params = {"token": "some_token"}
         mock_request.json_body = {"frontText": "Test", "backText": "Test"}
 
-        with patch("flashly.models.deck.DeckModel.find_deck_by_id") as mock_find_deck:
-            mock_find_deck.return_value = None
+        with (
+            patch("flashly.models.card.CardModel.create_for_owner") as mock_create,
+            patch("flashly.models.deck.DeckModel.find_owner_id") as mock_find_owner,
+        ):
+            mock_create.return_value = None
+            mock_find_owner.return_value = None
 
             result = create_card(mock_request)
 
@@ -233,20 +229,12 @@ class TestCardViews:
         mock_request.params = {"token": str(different_user_id)}
         mock_request.json_body = {"frontText": "Test", "backText": "Test"}
 
-        # Mock deck data with different owner
-        mock_deck_data = (
-            uuid.uuid4(),  # id
-            "Test Deck",  # name
-            "Description",  # description
-            "public",  # publish_status
-            owner_id,  # owner_id (different from token)
-            4.5,  # rating
-            datetime.now(),  # created_at
-            datetime.now(),  # updated_at
-        )
-
-        with patch("flashly.models.deck.DeckModel.find_deck_by_id") as mock_find_deck:
-            mock_find_deck.return_value = mock_deck_data
+        with (
+            patch("flashly.models.card.CardModel.create_for_owner") as mock_create,
+            patch("flashly.models.deck.DeckModel.find_owner_id") as mock_find_owner,
+        ):
+            mock_create.return_value = None
+            mock_find_owner.return_value = owner_id
 
             result = create_card(mock_request)
 
@@ -266,18 +254,14 @@ class TestCardViews:
         }
 
         # Mock deck data
-        mock_deck_data = (
-            uuid.uuid4(),  # id
-            "Test Deck",  # name
-            "Description",  # description
-            "public",  # publish_status
+        mock_deck_data = DeckAclRow(
             owner_id,  # owner_id
-            4.5,  # rating
-            datetime.now(),  # created_at
+            "public",  # publish_status
             datetime.now(),  # updated_at
+            "Test Deck",  # name
         )
 
-        with patch("flashly.models.deck.DeckModel.find_deck_by_id") as mock_find_deck:
+        with patch("flashly.models.deck.DeckModel.find_deck_acl") as mock_find_deck:
             mock_find_deck.return_value = mock_deck_data
 
             result = create_card(mock_request)
@@ -285,3 +269,192 @@ class TestCardViews:
             assert "error" in result
             assert "Missing required fields" in result["error"]
             assert mock_request.response.status_code == 400
+
+
+class TestBulkCreateCardsView:
+    """Test cases for the bulk card creation view."""
+
+    def make_deck(self, owner_id):
+        return DeckAclRow(
+            owner_id,  # owner_id
+            "public",  # publish_status
+            datetime.now(),  # updated_at
+            "Test Deck",  # name
+        )
+
+    def test_bulk_create_success(self, mock_request):
+        """Test all cards are validated once and inserted with a single model call."""
+        deck_id = str(uuid.uuid4())
+        owner_id = uuid.uuid4()
+        mock_request.matchdict = {"deck_id": deck_id}
+        mock_request.params = {"token": str(owner_id)}
+        mock_request.json_body = [
+            {"frontText": " Q1 ", "backText": "A1"},
+            {"frontText": "Q2", "backText": "A2", "difficulty": "hard"},
+        ]
+        created_rows = [
+            CardRow(uuid.uuid4(), "Q1", "A1", "easy", 0, 0.0, deck_id, datetime.now(), datetime.now()),
+            CardRow(uuid.uuid4(), "Q2", "A2", "hard", 0, 0.0, deck_id, datetime.now(), datetime.now()),
+        ]
+
+        with (
+            patch("flashly.models.deck.DeckModel.find_deck_acl") as mock_find_deck,
+            patch("flashly.models.card.CardModel.bulk_create") as mock_bulk_create,
+        ):
+            mock_find_deck.return_value = self.make_deck(owner_id)
+            mock_bulk_create.return_value = created_rows
+
+            result = bulk_create_cards(mock_request)
+
+        mock_find_deck.assert_called_once()
+        mock_bulk_create.assert_called_once()
+        _, called_deck_id, cards = mock_bulk_create.call_args[0]
+        assert called_deck_id == deck_id
+        assert [card[1:] for card in cards] == [("Q1", "A1", "easy"), ("Q2", "A2", "hard")]
+        assert result["message"] == "2 cards successfully created"
+        assert [card["front_text"] for card in result["cards"]] == ["Q1", "Q2"]
+
+    @pytest.mark.parametrize(
+        "body, error",
+        [
+            ({"frontText": "Q", "backText": "A"}, "Expected `array`, got `object`"),
+            ([], "Expected `array` of length >= 1"),
+            (["not a card"], "Expected `object`, got `str` - at `$[0]`"),
+            (
+                [{"frontText": "Q", "backText": "A"}, {"frontText": "Q"}],
+                "Missing required fields: backText - at `$[1]`",
+            ),
+            ([{"frontText": "Q", "backText": 3}], "Expected `str`, got `int` - at `$[0].backText`"),
+            (
+                [{"frontText": "Q", "backText": "A", "difficulty": "extreme"}],
+                "Invalid difficulty. Must be one of: easy, medium, hard - at `$[0]`",
+            ),
+        ],
+    )
+    def test_bulk_create_rejects_invalid_payload(self, mock_request, body, error):
+        """Test an invalid array is rejected before the database is touched."""
+        mock_request.matchdict = {"deck_id": str(uuid.uuid4())}
+        mock_request.params = {"token": str(uuid.uuid4())}
+        mock_request.json_body = body
+
+        with patch("flashly.models.deck.DeckModel.find_deck_acl") as mock_find_deck:
+            result = bulk_create_cards(mock_request)
+
+        assert result["error"] == error
+        assert mock_request.response.status_code == 400
+        mock_find_deck.assert_not_called()
+
+    def test_bulk_create_too_many_cards(self, mock_request):
+        """Test requests over MAX_BULK_CARDS are rejected."""
+        mock_request.matchdict = {"deck_id": str(uuid.uuid4())}
+        mock_request.params = {"token": str(uuid.uuid4())}
+        mock_request.json_body = [{"frontText": "Q", "backText": "A"}] * (MAX_BULK_CARDS + 1)
+
+        result = bulk_create_cards(mock_request)
+
+        assert result["error"] == f"Expected `array` of length <= {MAX_BULK_CARDS}"
+        assert mock_request.response.status_code == 400
+
+    def test_bulk_create_body_too_large(self, mock_request):
+        """Test bodies over MAX_BULK_BODY_SIZE are refused before they are parsed."""
+        mock_request.matchdict = {"deck_id": str(uuid.uuid4())}
+        mock_request.params = {"token": str(uuid.uuid4())}
+        mock_request.json_body = [{"frontText": "Q" * MAX_BULK_BODY_SIZE, "backText": "A"}]
+
+        result = bulk_create_cards(mock_request)
+
+        assert result["error"] == f"Request body too large. At most {MAX_BULK_BODY_SIZE} bytes are accepted"
+        assert mock_request.response.status_code == 413
+
+    def test_bulk_create_not_owner(self, mock_request):
+        """Test only the deck owner can add cards in bulk."""
+        mock_request.matchdict = {"deck_id": str(uuid.uuid4())}
+        mock_request.params = {"token": str(uuid.uuid4())}
+        mock_request.json_body = [{"frontText": "Q", "backText": "A"}]
+
+        with (
+            patch("flashly.models.deck.DeckModel.find_deck_acl") as mock_find_deck,
+            patch("flashly.models.card.CardModel.bulk_create") as mock_bulk_create,
+        ):
+            mock_find_deck.return_value = self.make_deck(uuid.uuid4())
+
+            result = bulk_create_cards(mock_request)
+
+        assert result["error"] == "You can only add cards to your own decks"
+        assert mock_request.response.status_code == 403
+        mock_bulk_create.assert_not_called()
+
+
+class TestImportDeckCardsView:
+    """Test cases for the CSV/TSV card import view."""
+
+    def make_request(self, mock_request, owner_id, content_type="text/csv", params=None):
+        mock_request.matchdict = {"deck_id": str(uuid.uuid4())}
+        mock_request.params = {"token": str(owner_id), **(params or {})}
+        mock_request.content_type = content_type
+        mock_request.body_file = io.BytesIO(b"front,back\nQ,A\n")
+        return mock_request
+
+    def make_deck(self, owner_id):
+        return DeckAclRow(owner_id, "public", datetime.now(), "Test Deck")
+
+    @pytest.mark.parametrize(
+        "content_type, params, expected_format",
+        [
+            ("text/csv", {}, "csv"),
+            ("text/tab-separated-values", {}, "tsv"),
+            ("application/octet-stream", {"format": "tsv"}, "tsv"),
+        ],
+    )
+    def test_import_streams_body(self, mock_request, content_type, params, expected_format):
+        """Test the request body is handed to import_cards in the requested format."""
+        owner_id = uuid.uuid4()
+        request = self.make_request(mock_request, owner_id, content_type, params)
+
+        with (
+            patch("flashly.models.deck.DeckModel.find_deck_acl") as mock_find_deck,
+            patch("flashly.views.card.import_cards") as mock_import,
+        ):
+            mock_find_deck.return_value = self.make_deck(owner_id)
+            mock_import.return_value = 2
+
+            result = import_deck_cards(request)
+
+        mock_import.assert_called_once_with(
+            request.db_conn, request.matchdict["deck_id"], request.body_file, expected_format
+        )
+        assert result == {"message": "2 cards successfully imported", "imported": 2}
+
+    def test_import_reports_invalid_rows(self, mock_request):
+        """Test validation errors are returned with the offending rows."""
+        owner_id = uuid.uuid4()
+        request = self.make_request(mock_request, owner_id)
+        rows = [{"row": 2, "error": "Missing required fields: backText"}]
+
+        with (
+            patch("flashly.models.deck.DeckModel.find_deck_acl") as mock_find_deck,
+            patch("flashly.views.card.import_cards") as mock_import,
+        ):
+            mock_find_deck.return_value = self.make_deck(owner_id)
+            mock_import.side_effect = CardImportError("1 invalid rows, nothing was imported", rows=rows, rejected=1)
+
+            result = import_deck_cards(request)
+
+        assert result == {"error": "1 invalid rows, nothing was imported", "rows": rows}
+        assert request.response.status_code == 400
+
+    def test_import_not_owner(self, mock_request):
+        """Test only the deck owner can import cards."""
+        request = self.make_request(mock_request, uuid.uuid4())
+
+        with (
+            patch("flashly.models.deck.DeckModel.find_deck_acl") as mock_find_deck,
+            patch("flashly.views.card.import_cards") as mock_import,
+        ):
+            mock_find_deck.return_value = self.make_deck(uuid.uuid4())
+
+            result = import_deck_cards(request)
+
+        assert result["error"] == "You can only add cards to your own decks"
+        assert request.response.status_code == 403
+        mock_import.assert_not_called()
@@ -0,0 +1,114 @@
+import uuid
+
+import psycopg2
+import pytest
+from psycopg2.extensions import parse_dsn
+from webtest import TestApp
+
+from flashly import main
+from flashly.models.card import CardModel
+
+
+@pytest.fixture
+def app(pg_dsn, monkeypatch):
+    """Flashly app on the local Postgres test database, without a replica or an invalidation listener."""
+    params = parse_dsn(pg_dsn)
+    monkeypatch.setenv("DB_HOST", params.get("host", "localhost"))
+    monkeypatch.setenv("DB_NAME", params.get("dbname", ""))
+    monkeypatch.setenv("DB_USER", params.get("user", ""))
+    monkeypatch.setenv("DB_PASSWORD", params.get("password", ""))
+    monkeypatch.setenv("DB_PORT", params.get("port", "5432"))
+    monkeypatch.setenv("DB_REPLICA_HOST", "")
+    monkeypatch.setenv("CACHE_INVALIDATION_LISTEN", "false")
+
+    wsgi_app = main({})
+    yield TestApp(wsgi_app)
+    wsgi_app.registry.settings["db_pool"].closeall()
+
+
+@pytest.fixture
+def deck(pg_dsn):
+    """A deck with one card committed to the local Postgres test database, removed after the test."""
+    conn = psycopg2.connect(pg_dsn)
+    owner_id, deck_id, card_id = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+            VALUES (%s, 'Etag', 'Owner', %s, %s, 'x')
+            """,
+            (owner_id, f"etag_{owner_id}", f"etag_{owner_id}@example.com"),
+        )
+        cur.execute(
+            """
+            INSERT INTO decks (id, name, description, publish_status, owner_id, rating)
+            VALUES (%s, 'Etag deck', '', 'private', %s, 0.0)
+            """,
+            (deck_id, owner_id),
+        )
+    conn.commit()
+    CardModel.create_for_owner(conn, deck_id, owner_id, card_id, "Front", "Back", "easy")
+
+    yield conn, owner_id, deck_id, card_id
+
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM users WHERE id = %s", (owner_id,))
+    conn.commit()
+    conn.close()
+
+
+class TestConditionalGet:
+    """Test cases for ETag/Last-Modified revalidation of deck and card reads through the whole app."""
+
+    def test_deck_revalidation(self, app, deck):
+        """Test a current ETag or date gets an empty 304 and a write makes the next request a 200 again."""
+        conn, owner_id, deck_id, _ = deck
+
+        first = app.get(f"/api/decks/{deck_id}")
+        etag, last_modified = first.headers["ETag"], first.headers["Last-Modified"]
+
+        not_modified = app.get(f"/api/decks/{deck_id}", headers={"If-None-Match": etag}, status=304)
+        assert not_modified.body == b""
+        assert not_modified.headers["ETag"] == etag
+        app.get(f"/api/decks/{deck_id}", headers={"If-Modified-Since": last_modified}, status=304)
+
+        CardModel.create_for_owner(conn, deck_id, owner_id, str(uuid.uuid4()), "Second", "Card", "easy")
+
+        changed = app.get(f"/api/decks/{deck_id}", headers={"If-None-Match": etag}, status=200)
+        assert changed.headers["ETag"] != etag
+        assert changed.json["deck"]["card_count"] == 2
+
+    def test_cards_revalidation(self, app, deck):
+        """Test card lists and single cards share the deck's version and private decks stay private."""
+        _, owner_id, deck_id, card_id = deck
+
+        cards = app.get(f"/api/decks/{deck_id}/cards", params={"token": owner_id})
+        card = app.get(f"/api/decks/{deck_id}/cards/{card_id}", params={"token": owner_id})
+        assert cards.headers["ETag"] == card.headers["ETag"]
+        etag = cards.headers["ETag"]
+
+        app.get(f"/api/decks/{deck_id}/cards", params={"token": owner_id}, headers={"If-None-Match": etag}, status=304)
+        app.get(
+            f"/api/decks/{deck_id}/cards/{card_id}",
+            params={"token": owner_id},
+            headers={"If-None-Match": etag},
+            status=304,
+        )
+        # The permission check runs before revalidation
+        app.get(f"/api/decks/{deck_id}/cards", headers={"If-None-Match": etag}, status=403)
+
+        # The card list streams from its own connection, which every response gives back
+        assert cards.json["deck_info"]["card_count"] == 1
+        assert app.app.registry.settings["db_pool"].metrics.snapshot()["in_use"] == 0
+
+    def test_username_change_revalidates_decks(self, app, deck):
+        """Test renaming the owner changes the deck's ETag, so no 304 keeps the old username."""
+        _, owner_id, deck_id, _ = deck
+        first = app.get(f"/api/decks/{deck_id}")
+        etag = first.headers["ETag"]
+
+        app.put_json(f"/api/users/{owner_id}?token={owner_id}", {"username": f"renamed_{owner_id}"})
+
+        changed = app.get(f"/api/decks/{deck_id}", headers={"If-None-Match": etag}, status=200)
+        assert changed.headers["ETag"] != etag
+        assert changed.json["deck"]["owner"] == f"renamed_{owner_id}"
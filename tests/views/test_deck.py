@@ -1,20 +1,28 @@
+import json
 import uuid
 from datetime import datetime
+from decimal import Decimal
 from unittest.mock import patch
+import psycopg2
 import pytest
+from psycopg2.extensions import parse_dsn
+from webob import Request
 
-from flashly.views.deck import explore_decks, feed, get_decks, create_deck
+from flashly import main
+from flashly.models.rows import CardRow, DeckAclRow, DeckSummaryRow, OwnedDeckRow
+from flashly.pagination import decode_cursor, encode_cursor
+from flashly.views.deck import EXPLORE_CURSOR, FEED_CURSOR, explore_decks, export_deck, feed, get_decks, create_deck
 
 
 class TestDeckViews:
     """Test cases for deck view functions."""
 
-    def test_explore_decks_success(self, mock_request):
+    def test_explore_decks_success(self, mock_request, render_json):
         """Test successfully getting explore decks."""
-        # Mock deck data - 8 element format for explore_decks (id, name, description, rating, created_at, updated_at, owner, card_count)
+        # Mock deck rows as returned by find_explore_decks
         mock_decks_data = [
-            (uuid.uuid4(), "Deck 1", "Description 1", 4.5, datetime.now(), datetime.now(), "owner1", 10),
-            (uuid.uuid4(), "Deck 2", "Description 2", 4.0, datetime.now(), datetime.now(), "owner2", 5),
+            DeckSummaryRow(uuid.uuid4(), "Deck 1", "Description 1", 4.5, datetime.now(), datetime.now(), "owner1", 10),
+            DeckSummaryRow(uuid.uuid4(), "Deck 2", "Description 2", 4.0, datetime.now(), datetime.now(), "owner2", 5),
         ]
 
         with (
@@ -25,29 +33,107 @@ class TestDeckViews:
             mock_find.return_value = mock_decks_data
             mock_serialize.return_value = [{"id": "deck1"}, {"id": "deck2"}]
 
-            result = explore_decks(mock_request)
+            result = render_json(explore_decks(mock_request))
 
             assert result["message"] == "Explore feed loaded successfully"
             assert "decks" in result
             assert len(result["decks"]) == 2
 
-    def test_explore_decks_failure(self, mock_request):
+    def test_explore_decks_failure(self, mock_request, render_json):
         """Test explore decks when database fails."""
         with patch("flashly.models.deck.DeckModel.find_explore_decks") as mock_find:
             mock_find.return_value = None
 
-            result = explore_decks(mock_request)
+            result = render_json(explore_decks(mock_request))
 
             assert result["error"] == "Unable to load explore feed"
             assert mock_request.response.status_code == 500
 
-    def test_feed_success(self, mock_request):
+    def test_explore_decks_next_cursor(self, mock_request, render_json):
+        """Test explore decks returns a cursor when more decks exist."""
+        mock_request.params = {"limit": "2"}
+        created_at = datetime(2024, 1, 1, 12, 0, 0)
+        last_id = uuid.uuid4()
+        mock_decks_data = [
+            DeckSummaryRow(uuid.uuid4(), "Deck 1", "Description 1", 4.5, datetime.now(), datetime.now(), "owner1", 10),
+            DeckSummaryRow(last_id, "Deck 2", "Description 2", 4.0, created_at, datetime.now(), "owner2", 5),
+            DeckSummaryRow(uuid.uuid4(), "Deck 3", "Description 3", 3.0, datetime.now(), datetime.now(), "owner3", 1),
+        ]
+
+        with patch("flashly.models.deck.DeckModel.find_explore_decks") as mock_find:
+            mock_find.return_value = mock_decks_data
+
+            result = render_json(explore_decks(mock_request))
+
+            mock_find.assert_called_once_with(mock_request.db_conn, limit=3, cursor=None)
+            assert len(result["decks"]) == 2
+            assert decode_cursor(result["next_cursor"], EXPLORE_CURSOR) == (Decimal("4.0"), created_at, str(last_id))
+
+    def test_explore_decks_last_page(self, mock_request, render_json):
+        """Test explore decks returns no cursor on the last page."""
+        last_id = str(uuid.uuid4())
+        mock_request.params = {"cursor": encode_cursor((4.0, datetime(2024, 1, 1, 12), last_id))}
+        mock_decks_data = [
+            DeckSummaryRow(uuid.uuid4(), "Deck 1", "Description 1", 3.5, datetime.now(), datetime.now(), "owner1", 10),
+        ]
+
+        with patch("flashly.models.deck.DeckModel.find_explore_decks") as mock_find:
+            mock_find.return_value = mock_decks_data
+
+            result = render_json(explore_decks(mock_request))
+
+            mock_find.assert_called_once_with(
+                mock_request.db_conn, limit=21, cursor=(Decimal("4.0"), datetime(2024, 1, 1, 12), last_id)
+            )
+            assert len(result["decks"]) == 1
+            assert result["next_cursor"] is None
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            ("x", "2024-01-01T12:00:00", str(uuid.UUID(int=1))),
+            (4.0, "yesterday", str(uuid.UUID(int=1))),
+            (4.0, "2024-01-01T12:00:00", "id"),
+        ],
+    )
+    def test_explore_decks_tampered_cursor(self, mock_request, render_json, values):
+        """Test cursors whose values do not parse are a 400 and never reach the query."""
+        mock_request.params = {"cursor": encode_cursor(values)}
+
+        with patch("flashly.models.deck.DeckModel.find_explore_decks") as mock_find:
+            result = render_json(explore_decks(mock_request))
+
+        assert result["error"] == "Invalid cursor"
+        assert mock_request.response.status_code == 400
+        mock_find.assert_not_called()
+
+    def test_explore_decks_invalid_cursor(self, mock_request, render_json):
+        """Test explore decks with a malformed cursor."""
+        mock_request.params = {"cursor": "not-a-cursor"}
+
+        result = render_json(explore_decks(mock_request))
+
+        assert result["error"] == "Invalid cursor"
+        assert mock_request.response.status_code == 400
+
+    def test_explore_decks_invalid_limit(self, mock_request, render_json):
+        """Test explore decks with a non numeric limit."""
+        mock_request.params = {"limit": "abc"}
+
+        result = render_json(explore_decks(mock_request))
+
+        assert result["error"] == "Invalid limit"
+        assert mock_request.response.status_code == 400
+
+    def test_feed_success(self, mock_request, render_json):
         """Test successfully getting user feed."""
         token = str(uuid.uuid4())
         mock_request.params = {"token": token}
 
-        # Mock deck data - 8 element format for feed_decks (id, name, description, rating, created_at, updated_at, owner, card_count)
-        mock_decks_data = [(uuid.uuid4(), "Deck 1", "Description 1", 4.5, datetime.now(), datetime.now(), "owner1", 8)]
+        # Mock deck rows as returned by find_feed_decks
+        mock_decks_data = [
+            DeckSummaryRow(uuid.uuid4(), "Deck 1", "Description 1", 4.5, datetime.now(), datetime.now(), "owner1", 8)
+        ]
 
         with (
             patch("flashly.models.deck.DeckModel.find_feed_decks") as mock_find,
@@ -57,12 +143,43 @@ class TestDeckViews:
             mock_find.return_value = mock_decks_data
             mock_serialize.return_value = [{"id": "deck1"}]
 
-            result = feed(mock_request)
+            result = render_json(feed(mock_request))
 
             assert result["message"] == "User feed loaded successfully"
             assert "decks" in result
 
-    def test_feed_failure(self, mock_request):
+    def test_feed_next_cursor(self, mock_request, render_json):
+        """Test user feed returns a (created_at, id) cursor when more decks exist."""
+        token = str(uuid.uuid4())
+        mock_request.params = {"token": token, "limit": "1"}
+        created_at = datetime(2024, 3, 2, 9, 0, 0)
+        first_id = uuid.uuid4()
+        mock_decks_data = [
+            DeckSummaryRow(first_id, "Deck 1", "Description 1", 4.5, created_at, datetime.now(), "owner1", 8),
+            DeckSummaryRow(
+                uuid.uuid4(), "Deck 2", "Description 2", 4.0, datetime(2024, 3, 1), datetime.now(), "owner2", 3
+            ),
+        ]
+
+        with patch("flashly.models.deck.DeckModel.find_feed_decks") as mock_find:
+            mock_find.return_value = mock_decks_data
+
+            result = render_json(feed(mock_request))
+
+            mock_find.assert_called_once_with(mock_request.db_conn, token, limit=2, cursor=None)
+            assert len(result["decks"]) == 1
+            assert decode_cursor(result["next_cursor"], FEED_CURSOR) == (created_at, str(first_id))
+
+    def test_feed_invalid_cursor(self, mock_request, render_json):
+        """Test user feed rejects a cursor from another sort order."""
+        mock_request.params = {"token": str(uuid.uuid4()), "cursor": "WzEsMiwzXQ"}
+
+        result = render_json(feed(mock_request))
+
+        assert result["error"] == "Invalid cursor"
+        assert mock_request.response.status_code == 400
+
+    def test_feed_failure(self, mock_request, render_json):
         """Test user feed when database fails."""
         token = str(uuid.uuid4())
         mock_request.params = {"token": token}
@@ -70,20 +187,24 @@ class TestDeckViews:
         with patch("flashly.models.deck.DeckModel.find_feed_decks") as mock_find:
             mock_find.return_value = None
 
-            result = feed(mock_request)
+            result = render_json(feed(mock_request))
 
             assert result["error"] == "Unable to load user feed"
             assert mock_request.response.status_code == 500
 
-    def test_get_decks_success(self, mock_request):
+    def test_get_decks_success(self, mock_request, render_json):
         """Test successfully getting user's decks."""
         token = str(uuid.uuid4())
         mock_request.params = {"token": token}
 
-        # Mock deck data - 9 element format for find_decks_by_user_id (id, name, description, publish_status, rating, created_at, updated_at, owner, card_count)
+        # Mock deck rows as returned by find_decks_by_user_id
         mock_decks_data = [
-            (uuid.uuid4(), "My Deck 1", "Description 1", "private", 4.5, datetime.now(), datetime.now(), "owner1", 12),
-            (uuid.uuid4(), "My Deck 2", "Description 2", "public", 4.0, datetime.now(), datetime.now(), "owner1", 6),
+            OwnedDeckRow(
+                uuid.uuid4(), "My Deck 1", "Description 1", "private", 4.5, datetime.now(), datetime.now(), "owner1", 12
+            ),
+            OwnedDeckRow(
+                uuid.uuid4(), "My Deck 2", "Description 2", "public", 4.0, datetime.now(), datetime.now(), "owner1", 6
+            ),
         ]
 
         with (
@@ -94,13 +215,13 @@ class TestDeckViews:
             mock_find.return_value = mock_decks_data
             mock_serialize.return_value = [{"id": "deck1"}, {"id": "deck2"}]
 
-            result = get_decks(mock_request)
+            result = render_json(get_decks(mock_request))
 
             assert result["message"] == "User feed loaded successfully"
             assert "decks" in result
             assert len(result["decks"]) == 2
 
-    def test_get_decks_failure(self, mock_request):
+    def test_get_decks_failure(self, mock_request, render_json):
         """Test get user's decks when database fails."""
         token = str(uuid.uuid4())
         mock_request.params = {"token": token}
@@ -108,7 +229,7 @@ class TestDeckViews:
         with patch("flashly.models.deck.DeckModel.find_decks_by_user_id") as mock_find:
             mock_find.return_value = None
 
-            result = get_decks(mock_request)
+            result = render_json(get_decks(mock_request))
 
             assert result["error"] == "Unable to load user's decks"
             assert mock_request.response.status_code == 500
@@ -190,31 +311,31 @@ class TestDeckViews:
             # The function should handle missing optional fields with defaults
             assert isinstance(result, dict)
 
-    def test_feed_no_token(self, mock_request):
+    def test_feed_no_token(self, mock_request, render_json):
         """Test user feed with no token."""
         mock_request.params = {}
 
         with patch("flashly.models.deck.DeckModel.find_feed_decks") as mock_find:
             mock_find.return_value = []
 
-            result = feed(mock_request)
+            result = render_json(feed(mock_request))
 
             # Should still work, might return empty feed or error depending on implementation
             assert isinstance(result, dict)
 
-    def test_get_decks_no_token(self, mock_request):
+    def test_get_decks_no_token(self, mock_request, render_json):
         """Test get user decks with no token."""
         mock_request.params = {}
 
         with patch("flashly.models.deck.DeckModel.find_decks_by_user_id") as mock_find:
             mock_find.return_value = []
 
-            result = get_decks(mock_request)
+            result = render_json(get_decks(mock_request))
 
             # Should still work, might return empty list or error depending on implementation
             assert isinstance(result, dict)
 
-    def test_empty_explore_feed(self, mock_request):
+    def test_empty_explore_feed(self, mock_request, render_json):
         """Test explore decks when no decks exist."""
         with (
             patch("flashly.models.deck.DeckModel.find_explore_decks") as mock_find,
@@ -224,8 +345,174 @@ class TestDeckViews:
             mock_find.return_value = []
             mock_serialize.return_value = []
 
-            result = explore_decks(mock_request)
+            result = render_json(explore_decks(mock_request))
 
             assert result["message"] == "Explore feed loaded successfully"
             assert "decks" in result
             assert len(result["decks"]) == 0
+
+
+class StreamedRows(list):
+    """Rows stand-in that records whether the export closed it."""
+
+    connection = object()
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestExportDeckView:
+    """Test cases for the streaming deck export view."""
+
+    def make_deck(self, owner_id, publish_status="public"):
+        return DeckAclRow(owner_id, publish_status, datetime.now(), "Deck")
+
+    def make_rows(self, deck_id):
+        now = datetime(2024, 1, 1, 12, 0)
+        return StreamedRows(
+            [
+                CardRow(uuid.uuid4(), "Q1", "A, 1", "easy", 0, 0.0, deck_id, now, now),
+                CardRow(uuid.uuid4(), "Q2", "A2", "hard", 3, 0.5, deck_id, now, now),
+            ]
+        )
+
+    def export(self, mock_request, params, deck=None):
+        deck_id = str(uuid.uuid4())
+        mock_request.matchdict = {"deck_id": deck_id}
+        mock_request.params = params
+        rows = self.make_rows(deck_id)
+
+        with (
+            patch("flashly.models.deck.DeckModel.find_deck_acl") as mock_find_deck,
+            patch("flashly.models.card.CardModel.stream_cards_by_deck_id") as mock_stream,
+        ):
+            mock_find_deck.return_value = deck or self.make_deck(uuid.uuid4())
+            mock_stream.return_value = rows
+
+            response = export_deck(mock_request)
+
+        return response, rows, mock_stream, mock_find_deck
+
+    def test_export_ndjson(self, mock_request):
+        """Test the default export streams one JSON card per line."""
+        response, rows, mock_stream, mock_find_deck = self.export(mock_request, {})
+
+        deck_id = mock_request.matchdict["deck_id"]
+        mock_stream.assert_called_once_with(mock_request.db_read_pool, deck_id)
+        # The deck is checked on the stream's connection, the request checks out no other one
+        mock_find_deck.assert_called_once_with(rows.connection, deck_id, fill_cache=True)
+        assert response.content_type == "application/x-ndjson"
+        assert "attachment" in response.content_disposition
+        lines = b"".join(response.app_iter).decode("utf-8").splitlines()
+        assert [json.loads(line)["front_text"] for line in lines] == ["Q1", "Q2"]
+
+        response.app_iter.close()
+        assert rows.closed
+
+    def test_export_csv(self, mock_request):
+        """Test the CSV export has a header row that the import understands."""
+        response, rows, _, _ = self.export(mock_request, {"format": "csv"})
+
+        body = b"".join(response.app_iter).decode("utf-8").splitlines()
+        assert response.content_type == "text/csv"
+        assert body[0] == "id,front_text,back_text,difficulty,times_reviewed,success_rate,created_at,updated_at"
+        assert body[1].split(",", 1)[1] == 'Q1,"A, 1",easy,0,0.0,2024-01-01T12:00:00,2024-01-01T12:00:00'
+        assert len(body) == 3
+
+    def test_export_invalid_format(self, mock_request):
+        """Test unknown formats are rejected."""
+        response, _, mock_stream, _ = self.export(mock_request, {"format": "xml"})
+
+        assert response == {"error": "Invalid format. Must be one of: ndjson, csv"}
+        assert mock_request.response.status_code == 400
+        mock_stream.assert_not_called()
+
+    def test_export_private_deck_requires_owner(self, mock_request):
+        """Test private decks are only exported for their owner."""
+        response, rows, _, _ = self.export(
+            mock_request, {"token": str(uuid.uuid4())}, self.make_deck(uuid.uuid4(), "private")
+        )
+
+        assert response == {"error": "Access denied. This is a private deck."}
+        assert mock_request.response.status_code == 403
+        assert rows.closed
+
+
+@pytest.fixture
+def small_pool_app(pg_dsn, monkeypatch):
+    """WSGI app on the local Postgres test database whose pool holds two connections and waits one second for them."""
+    params = parse_dsn(pg_dsn)
+    monkeypatch.setenv("DB_HOST", params.get("host", "localhost"))
+    monkeypatch.setenv("DB_NAME", params.get("dbname", ""))
+    monkeypatch.setenv("DB_USER", params.get("user", ""))
+    monkeypatch.setenv("DB_PASSWORD", params.get("password", ""))
+    monkeypatch.setenv("DB_PORT", params.get("port", "5432"))
+    monkeypatch.setenv("DB_REPLICA_HOST", "")
+    monkeypatch.setenv("CACHE_INVALIDATION_LISTEN", "false")
+    monkeypatch.setenv("DB_POOL_MAX", "2")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "1")
+
+    wsgi_app = main({})
+    yield wsgi_app
+    wsgi_app.registry.settings["db_pool"].closeall()
+
+
+@pytest.fixture
+def exported_deck(pg_dsn):
+    """A public deck with one card committed to the local Postgres test database, removed after the test."""
+    conn = psycopg2.connect(pg_dsn)
+    owner_id, deck_id = str(uuid.uuid4()), str(uuid.uuid4())
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+            VALUES (%s, 'Export', 'Owner', %s, %s, 'x')
+            """,
+            (owner_id, f"export_{owner_id}", f"export_{owner_id}@example.com"),
+        )
+        cur.execute(
+            """
+            INSERT INTO decks (id, name, description, publish_status, owner_id, rating)
+            VALUES (%s, 'Export deck', '', 'public', %s, 0.0)
+            """,
+            (deck_id, owner_id),
+        )
+        cur.execute(
+            "INSERT INTO cards (id, front_text, back_text, deck_id) VALUES (gen_random_uuid(), 'Q', 'A', %s)",
+            (deck_id,),
+        )
+    conn.commit()
+
+    yield deck_id
+
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM users WHERE id = %s", (owner_id,))
+    conn.commit()
+    conn.close()
+
+
+def test_concurrent_exports_fill_the_pool(small_pool_app, exported_deck):
+    """Test as many exports as the pool has connections can stream at once, each holding a single connection."""
+    pool = small_pool_app.registry.settings["db_pool"]
+    bodies = []
+    try:
+        # Start every export before reading any body, the streams keep their connections until closed
+        for _ in range(pool.maxconn):
+            statuses = []
+            body = small_pool_app(
+                Request.blank(f"/api/decks/{exported_deck}/export").environ,
+                lambda status, headers, exc_info=None: statuses.append(status),
+            )
+            bodies.append(body)
+            assert statuses == ["200 OK"]
+
+        for body in bodies:
+            assert len(b"".join(body).splitlines()) == 1
+    finally:
+        for body in bodies:
+            # Only streamed bodies have a close, error responses are plain lists
+            if hasattr(body, "close"):
+                body.close()
+
+    assert pool.metrics.snapshot()["in_use"] == 0
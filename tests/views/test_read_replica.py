@@ -0,0 +1,163 @@
+import uuid
+
+import psycopg2
+import pytest
+from psycopg2.extensions import parse_dsn
+from webtest import TestApp
+
+from flashly import main
+from flashly.cache import invalidate
+from flashly.models import READ_PRIMARY_COOKIE
+
+
+def insert_user(conn, user_id):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+            VALUES (%s, 'Replica', 'Reader', %s, %s, 'x')
+            """,
+            (user_id, f"replica_{user_id}", f"replica_{user_id}@example.com"),
+        )
+    conn.commit()
+
+
+def insert_deck(conn, deck_id, owner_id, name):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO decks (id, name, description, publish_status, owner_id, rating)
+            VALUES (%s, %s, '', 'public', %s, 0.0)
+            """,
+            (deck_id, name, owner_id),
+        )
+    conn.commit()
+
+
+def delete_user(conn, user_id):
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+    conn.commit()
+
+
+@pytest.fixture
+def replica_app(pg_dsn, pg_replica_dsn, monkeypatch):
+    """Flashly app whose primary and replica are two separate local databases."""
+    for prefix, dsn in (("DB", pg_dsn), ("DB_REPLICA", pg_replica_dsn)):
+        params = parse_dsn(dsn)
+        monkeypatch.setenv(f"{prefix}_HOST", params.get("host", "localhost"))
+        monkeypatch.setenv(f"{prefix}_NAME", params.get("dbname", ""))
+        monkeypatch.setenv(f"{prefix}_USER", params.get("user", ""))
+        monkeypatch.setenv(f"{prefix}_PASSWORD", params.get("password", ""))
+        monkeypatch.setenv(f"{prefix}_PORT", params.get("port", "5432"))
+    monkeypatch.setenv("DB_REPLICA_STICKINESS", "60")
+
+    app = main({})
+    yield TestApp(app)
+
+    settings = app.registry.settings
+    settings["cache_invalidation_listener"].stop(5)
+    settings["db_pool"].closeall()
+    settings["db_replica_pool"].closeall()
+
+
+@pytest.fixture
+def user_on_both(pg_dsn, pg_replica_dsn):
+    """A user replicated to both databases, removed after the test."""
+    user_id = str(uuid.uuid4())
+    primary = psycopg2.connect(pg_dsn)
+    replica = psycopg2.connect(pg_replica_dsn)
+    insert_user(primary, user_id)
+    insert_user(replica, user_id)
+
+    yield user_id, primary, replica
+
+    delete_user(primary, user_id)
+    delete_user(replica, user_id)
+    primary.close()
+    replica.close()
+
+
+class TestReadReplica:
+    """GET routes read from the replica, authors read their own writes from the primary."""
+
+    def test_get_routes_read_from_replica(self, replica_app, user_on_both):
+        user_id, primary, replica = user_on_both
+        deck_id = str(uuid.uuid4())
+        insert_deck(replica, deck_id, user_id, "Only on the replica")
+
+        deck = replica_app.get(f"/api/decks/{deck_id}").json["deck"]
+        decks = replica_app.get(f"/api/decks?token={user_id}").json["decks"]
+
+        assert deck["name"] == "Only on the replica"
+        assert [d["id"] for d in decks] == [deck_id]
+
+    def test_author_reads_own_write_from_primary(self, replica_app, user_on_both):
+        user_id, primary, replica = user_on_both
+        insert_deck(replica, str(uuid.uuid4()), user_id, "Only on the replica")
+
+        created = replica_app.post_json(
+            f"/api/decks?token={user_id}", {"name": "Fresh deck", "description": "Just written"}
+        ).json["deck"]
+        decks = replica_app.get(f"/api/decks?token={user_id}").json["decks"]
+
+        assert [d["name"] for d in decks] == ["Fresh deck"]
+        assert decks[0]["id"] == created["id"]
+
+    def test_author_reads_own_write_without_token(self, replica_app, user_on_both):
+        user_id, primary, replica = user_on_both
+        insert_deck(replica, str(uuid.uuid4()), user_id, "Only on the replica")
+
+        replica_app.post_json(f"/api/decks?token={user_id}", {"name": "Fresh deck", "description": "Just written"})
+        profile_decks = replica_app.get(f"/api/users/{user_id}?include=decks").json["decks"]
+
+        assert [d["name"] for d in profile_decks] == ["Fresh deck"]
+
+    def test_other_users_keep_reading_from_replica(self, replica_app, user_on_both):
+        user_id, primary, replica = user_on_both
+        insert_deck(replica, str(uuid.uuid4()), user_id, "Only on the replica")
+
+        replica_app.post_json(f"/api/decks?token={user_id}", {"name": "Fresh deck", "description": "Just written"})
+        # Another client, without the author's cookies or token
+        other = TestApp(replica_app.app)
+        profile_decks = other.get(f"/api/users/{user_id}?include=decks").json["decks"]
+
+        assert [d["name"] for d in profile_decks] == ["Only on the replica"]
+
+    def test_lagging_replica_does_not_refill_the_caches(self, replica_app, user_on_both):
+        user_id, primary, replica = user_on_both
+        deck_id = str(uuid.uuid4())
+        insert_deck(primary, deck_id, user_id, "Before the rename")
+        insert_deck(replica, deck_id, user_id, "Before the rename")
+
+        # The rename reaches the primary and invalidates the caches, the replica has yet to replay it
+        with primary.cursor() as cur:
+            cur.execute("UPDATE decks SET name = 'Renamed' WHERE id = %s", (deck_id,))
+        primary.commit()
+        invalidate("deck", deck_id)
+
+        # Another client still reads the old row from the replica...
+        other = TestApp(replica_app.app)
+        assert other.get(f"/api/decks/{deck_id}").json["deck"]["name"] == "Before the rename"
+        assert other.get(f"/api/decks/{deck_id}/cards").json["deck_info"]["name"] == "Before the rename"
+
+        # ...but does not cache it for the readers of the primary
+        replica_app.set_cookie(READ_PRIMARY_COOKIE, "1")
+        assert replica_app.get(f"/api/decks/{deck_id}").json["deck"]["name"] == "Renamed"
+        assert replica_app.get(f"/api/decks/{deck_id}/cards").json["deck_info"]["name"] == "Renamed"
+
+    def test_export_streams_from_replica(self, replica_app, user_on_both):
+        user_id, primary, replica = user_on_both
+        deck_id = str(uuid.uuid4())
+        insert_deck(replica, deck_id, user_id, "Only on the replica")
+        with replica.cursor() as cur:
+            cur.execute(
+                "INSERT INTO cards (id, front_text, back_text, deck_id) VALUES (gen_random_uuid(), 'Q', 'A', %s)",
+                (deck_id,),
+            )
+        replica.commit()
+
+        lines = replica_app.get(f"/api/decks/{deck_id}/export").text.splitlines()
+
+        assert len(lines) == 1
+        assert replica_app.app.registry.settings["db_replica_pool"].metrics.snapshot()["in_use"] == 0
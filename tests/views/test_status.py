@@ -1,7 +1,8 @@
 import datetime
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
-from flashly.views.status import status_check
+from flashly.models.pool import PoolTimeout
+from flashly.views.status import pool_timeout, status_check
 
 
 class TestStatusViews:
@@ -20,3 +21,27 @@ class TestStatusViews:
             assert result["message"] == "Backend is healthy"
             assert "timestamp" in result
             assert result["timestamp"].endswith("Z")
+
+    def test_status_check_pool_metrics(self, mock_request):
+        """Test status exposes the connection pool metrics when a pool is configured."""
+        db_pool = Mock()
+        db_pool.metrics.snapshot.return_value = {"in_use": 3, "idle": 2, "waiters": 0}
+        mock_request.registry = Mock(settings={"db_pool": db_pool})
+
+        result = status_check(mock_request)
+
+        assert result["db_pool"] == {"in_use": 3, "idle": 2, "waiters": 0}
+
+    def test_status_check_cache_counters(self, mock_request):
+        """Test status exposes the counters of every in-process cache."""
+        result = status_check(mock_request)
+
+        assert set(result["caches"]) == {"deck_acl", "deck", "compressed"}
+        assert {"hits", "misses", "evictions", "size", "maxsize"} <= set(result["caches"]["deck"])
+
+    def test_pool_timeout(self, mock_request):
+        """Test an exhausted pool is reported as 503."""
+        result = pool_timeout(PoolTimeout("no connection available within 30s"), mock_request)
+
+        assert mock_request.response.status_code == 503
+        assert "error" in result
@@ -0,0 +1,242 @@
+import uuid
+from datetime import datetime
+from unittest.mock import patch
+
+import bcrypt
+
+from flashly.views.user import change_password, follow, get_profile, unfollow, update_user
+
+
+def make_profile(with_decks=True, with_statistics=True):
+    now = datetime.now().isoformat()
+    profile = {
+        "id": "user-id",
+        "first_name": "John",
+        "last_name": "Doe",
+        "username": "johndoe",
+        "email": "john@example.com",
+        "created_at": now,
+        "updated_at": now,
+        "about_me": "Hello",
+    }
+    if with_statistics:
+        profile.update({"following_count": 1, "followers_count": 2, "decks_count": 1})
+    if with_decks:
+        profile["decks"] = [
+            {
+                "id": "deck-id",
+                "name": "Deck",
+                "description": "Description",
+                "publish_status": "public",
+                "rating": 4.5,
+                "created_at": now,
+                "updated_at": now,
+                "card_count": 1,
+                "cards": [
+                    {
+                        "id": "card-id",
+                        "front_text": "Front",
+                        "back_text": "Back",
+                        "difficulty": "easy",
+                        "times_reviewed": 0,
+                        "success_rate": 0.0,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                ],
+                "categories": [],
+            }
+        ]
+    return profile
+
+
+class TestUserViews:
+    """Test cases for user view functions."""
+
+    def test_get_profile_full(self, mock_request, render_json):
+        """Test the whole profile is returned when no include is given."""
+        mock_request.matchdict = {"user_id": "user-id"}
+
+        with patch("flashly.models.user.UserModel.get_profile_with_details") as mock_get:
+            mock_get.return_value = make_profile()
+
+            result = render_json(get_profile(mock_request))
+
+            mock_get.assert_called_once_with(mock_request.db_conn, "user-id", include=None)
+            assert result["decks"][0]["cardsCount"] == 1
+            assert result["decks"][0]["cards"][0]["frontText"] == "Front"
+            assert result["decks"][0]["categories"] == []
+            assert result["statistics"] == {"followingCount": 1, "followersCount": 2, "decksCount": 1}
+
+    def test_get_profile_header_only(self, mock_request, render_json):
+        """Test statistics can be requested without any deck data."""
+        mock_request.matchdict = {"user_id": "user-id"}
+        mock_request.params = {"include": "statistics"}
+
+        with patch("flashly.models.user.UserModel.get_profile_with_details") as mock_get:
+            mock_get.return_value = make_profile(with_decks=False)
+
+            result = render_json(get_profile(mock_request))
+
+            mock_get.assert_called_once_with(mock_request.db_conn, "user-id", include={"statistics"})
+            assert "decks" not in result
+            assert result["statistics"]["decksCount"] == 1
+
+    def test_get_profile_deck_tiles(self, mock_request, render_json):
+        """Test decks can be requested without their cards."""
+        mock_request.matchdict = {"user_id": "user-id"}
+        mock_request.params = {"fields": "decks"}
+
+        with patch("flashly.models.user.UserModel.get_profile_with_details") as mock_get:
+            mock_get.return_value = make_profile(with_statistics=False)
+
+            result = render_json(get_profile(mock_request))
+
+            assert "cards" not in result["decks"][0]
+            assert "categories" not in result["decks"][0]
+            assert result["decks"][0]["cardsCount"] == 1
+            assert "statistics" not in result
+
+    def test_get_profile_nested_include_implies_decks(self, mock_request):
+        """Test requesting deck cards also loads the decks."""
+        mock_request.matchdict = {"user_id": "user-id"}
+        mock_request.params = {"include": "decks.cards"}
+
+        with patch("flashly.models.user.UserModel.get_profile_with_details") as mock_get:
+            mock_get.return_value = make_profile(with_statistics=False)
+
+            get_profile(mock_request)
+
+            mock_get.assert_called_once_with(mock_request.db_conn, "user-id", include={"decks", "decks.cards"})
+
+    def test_get_profile_invalid_include(self, mock_request, render_json):
+        """Test unknown profile parts are rejected."""
+        mock_request.matchdict = {"user_id": "user-id"}
+        mock_request.params = {"include": "decks,secrets"}
+
+        result = render_json(get_profile(mock_request))
+
+        assert result["error"].startswith("Invalid include: secrets")
+        assert mock_request.response.status_code == 400
+
+    def test_get_profile_not_found(self, mock_request, render_json):
+        """Test profile of an unknown user."""
+        mock_request.matchdict = {"user_id": "missing"}
+
+        with patch("flashly.models.user.UserModel.get_profile_with_details") as mock_get:
+            mock_get.return_value = None
+
+            result = render_json(get_profile(mock_request))
+
+            assert result["error"] == "User not found"
+            assert mock_request.response.status_code == 404
+
+
+class TestFollowViews:
+    """Test cases for follow/unfollow against the local Postgres test database."""
+
+    def seed_user(self, conn):
+        user_id = str(uuid.uuid4())
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+                VALUES (%s, 'Follow', 'View', %s, %s, 'x')
+                """,
+                (user_id, f"follow_view_{user_id}", f"follow_view_{user_id}@example.com"),
+            )
+        return user_id
+
+    def call(self, view, request, conn, token, user_id):
+        request.db_conn = conn
+        request.params = {"token": token}
+        request.matchdict = {"user_id": user_id}
+        return view(request)
+
+    def test_follow_then_unfollow(self, mock_request, recording_conn):
+        """Test the follow lifecycle and its error messages."""
+        follower_id, following_id = self.seed_user(recording_conn), self.seed_user(recording_conn)
+
+        result = self.call(follow, mock_request, recording_conn, follower_id, following_id)
+        assert result == {"message": "Successfully followed user"}
+
+        result = self.call(follow, mock_request, recording_conn, follower_id, following_id)
+        assert result == {"error": "Already following this user"}
+        assert mock_request.response.status_code == 400
+
+        result = self.call(unfollow, mock_request, recording_conn, follower_id, following_id)
+        assert result == {"message": "Successfully unfollowed user"}
+
+        result = self.call(unfollow, mock_request, recording_conn, follower_id, following_id)
+        assert result == {"error": "Not following this user"}
+        assert mock_request.response.status_code == 404
+
+    def test_follow_unknown_users(self, mock_request, recording_conn):
+        """Test foreign key violations are reported as 404s naming the missing user."""
+        user_id = self.seed_user(recording_conn)
+
+        result = self.call(follow, mock_request, recording_conn, user_id, str(uuid.uuid4()))
+        assert result == {"error": "User to follow not found"}
+        assert mock_request.response.status_code == 404
+
+        # The rollback above dropped the seeded user as well
+        user_id = self.seed_user(recording_conn)
+        result = self.call(follow, mock_request, recording_conn, str(uuid.uuid4()), user_id)
+        assert result == {"error": "Current user not found"}
+        assert mock_request.response.status_code == 404
+
+        result = self.call(follow, mock_request, recording_conn, "not-a-uuid", user_id)
+        assert result == {"error": "Current user not found"}
+
+
+class TestAccountViews:
+    """Test cases for profile and password updates against the local Postgres test database."""
+
+    def seed_user(self, conn, password="secret1"):
+        user_id = str(uuid.uuid4())
+        password_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(4)).decode("utf-8")
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO users (id, first_name, last_name, username, email, password_hash)
+                VALUES (%s, 'Account', 'View', %s, %s, %s)
+                """,
+                (user_id, f"account_{user_id}", f"account_{user_id}@example.com", password_hash),
+            )
+        return user_id
+
+    def test_update_user(self, mock_request, recording_conn):
+        """Test a partial update decodes, normalizes and commits only the fields sent."""
+        user_id = self.seed_user(recording_conn)
+        mock_request.db_conn = recording_conn
+        mock_request.params = {"token": user_id}
+        mock_request.matchdict = {"user_id": user_id}
+        mock_request.json_body = {"firstName": "  jane ", "email": ""}
+
+        result = update_user(mock_request)
+
+        assert result["user"]["firstName"] == "Jane"
+        assert result["user"]["lastName"] == "View"
+        assert recording_conn.commits == 1
+
+        mock_request.json_body = {"email": "not-an-email"}
+        assert update_user(mock_request) == {"error": "Invalid email format"}
+        assert mock_request.response.status_code == 400
+
+    def test_change_password(self, mock_request, recording_conn):
+        """Test the password is only changed with the current one and a valid new one."""
+        user_id = self.seed_user(recording_conn)
+        mock_request.db_conn = recording_conn
+        mock_request.params = {"token": user_id}
+
+        mock_request.json_body = {"newPassword": "secret2"}
+        assert change_password(mock_request) == {"error": "Missing required fields: currentPassword"}
+
+        mock_request.json_body = {"currentPassword": "wrong12", "newPassword": "secret2"}
+        assert change_password(mock_request) == {"error": "Current password is incorrect"}
+
+        mock_request.json_body = {"currentPassword": "secret1", "newPassword": "secret2"}
+        assert change_password(mock_request) == {"message": "Password changed successfully"}
+        with recording_conn.cursor() as cur:
+            cur.execute("SELECT password_hash FROM users WHERE id = %s", (user_id,))
+            assert bcrypt.checkpw(b"secret2", cur.fetchone()[0].encode("utf-8"))